@@ -0,0 +1,128 @@
+"""
+Benchmark do relatório de vendas (/api/admin/analytics).
+
+Popula order_history com N pedidos entregues espalhados pelos últimos DIAS dias (1 a 3 sabores
+por pedido, tempos de entrega variados), reconstrói sales_rollup e mede a latência do endpoint
+para intervalos de 7, 30, 90 e 365 dias. Para comparação, mede também a mesma agregação feita
+direto em order_history (varredura + json_each/jsonb_array_elements dos itens).
+
+Uso:
+    python benchmarks/bench_analytics.py                     # SQLite em benchmarks/bench_analytics.db, 1M pedidos
+    python benchmarks/bench_analytics.py --rows 200000
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/bench_analytics.py
+
+ATENÇÃO: o script apaga e recria as tabelas do banco apontado por BENCH_DATABASE_URL (sem ela, um
+SQLite local). O DATABASE_URL do ambiente (ou do .env) é ignorado.
+Nunca rode contra o banco de produção.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script apaga e recria as tabelas); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(BASE_DIR, 'benchmarks', 'bench_analytics.db'))
+os.environ['RESPONSE_CACHE_BACKEND'] = 'off' # Mede a consulta, não o cache
+os.environ['RATE_LIMIT_BACKEND'] = 'off'
+
+from sqlalchemy import bindparam, text  # noqa: E402
+
+from app import app  # noqa: E402
+from pizzaria.analytics import rebuild_sales_rollup  # noqa: E402
+from pizzaria.auth import generate_token  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+from pizzaria.models import User, OrderHistory, OrderItem  # noqa: E402
+
+CHUNK_SIZE = 10_000
+RANGES_DAYS = (7, 30, 90, 365)
+PIZZAS = [('Margherita', 25.0), ('Calabresa', 23.0), ('Portuguesa', 28.0), ('Frango com Catupiry', 27.0),
+          ('Quatro Queijos', 30.0), ('Pepperoni', 29.0), ('Vegetariana', 26.0), ('Chocolate', 32.0)]
+
+# Agregação equivalente sem o consolidado, direto no histórico
+RAW_SQL = (
+    "SELECT i.name, sum(i.quantity), sum(i.unit_price * i.quantity) FROM order_history h "
+    "JOIN order_items i ON i.order_id = h.original_order_id "
+    "WHERE h.completed_at >= :start AND h.completed_at < :end GROUP BY 1"
+)
+
+
+def seed(num_rows: int, days: int):
+    """Recria as tabelas e insere o histórico em lotes (executemany), sem passar pelo ORM."""
+    db.drop_all()
+    db.create_all()
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.session.execute(User.__table__.insert(), [
+        {'name': 'Master', 'email': 'master@bench.local', 'password_hash': 'x', 'role': 'master', 'created_at': now}
+    ])
+    span_seconds = days * 86400
+    for start in range(0, num_rows, CHUNK_SIZE):
+        rows, item_rows = [], []
+        for i in range(start, min(start + CHUNK_SIZE, num_rows)):
+            chosen = Counter(random.choices(PIZZAS, k=random.randint(1, 3)))
+            item_rows.extend({'order_id': i + 1, 'name': name, 'unit_price': price, 'quantity': quantity}
+                             for (name, price), quantity in chosen.items())
+            completed = now - timedelta(seconds=random.randint(0, span_seconds))
+            rows.append({
+                'original_order_id': i + 1, 'user_id': 1, 'customer_name': 'Cliente',
+                'total': sum(price * quantity for (_, price), quantity in chosen.items()), 'status': 'entregue',
+                'created_at': completed - timedelta(minutes=random.gauss(45, 15)), 'completed_at': completed
+            })
+        db.session.execute(OrderHistory.__table__.insert(), rows)
+        db.session.execute(OrderItem.__table__.insert(), item_rows)
+    db.session.commit()
+
+
+def measure(call, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': statistics.median(timings), 'max_ms': max(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='pedidos no histórico (padrão: 1M)')
+    parser.add_argument('--days', type=int, default=730, help='período coberto pelo histórico (padrão: 730 dias)')
+    parser.add_argument('--repeat', type=int, default=20, help='execuções por intervalo')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f'Banco: {db.engine.url.render_as_string(hide_password=True)}')
+        start = time.perf_counter()
+        seed(args.rows, args.days)
+        print(f'Seed de {args.rows} pedidos concluído em {time.perf_counter() - start:.1f}s')
+
+        start = time.perf_counter()
+        rollup_rows = rebuild_sales_rollup()
+        print(f'rebuild-analytics: {rollup_rows} linhas em {time.perf_counter() - start:.1f}s')
+
+        headers = {'Authorization': 'Bearer ' + generate_token(1, db.session.get(User, 1).to_dict())}
+        raw = text(RAW_SQL).bindparams(bindparam('start', type_=db.DateTime), bindparam('end', type_=db.DateTime))
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    client = app.test_client()
+    print()
+    for days in RANGES_DAYS:
+        url = f'/api/admin/analytics?from={(now - timedelta(days=days)).date().isoformat()}'
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        result = measure(lambda: client.get(url, headers=headers), args.repeat)
+        print(f'endpoint {days:4d} dias     mediana {result["median_ms"]:9.2f} ms   máx {result["max_ms"]:9.2f} ms')
+
+        with app.app_context():
+            params = {'start': now - timedelta(days=days), 'end': now}
+            result = measure(lambda: db.session.execute(raw, params).fetchall(), max(3, args.repeat // 5))
+        print(f'varredura {days:4d} dias    mediana {result["median_ms"]:9.2f} ms   máx {result["max_ms"]:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""
+Benchmark reprodutível da API de pedidos.
+
+1. Popula o banco (BENCH_DATABASE_URL) com usuários, pedidos ativos e histórico gerados pelo Faker,
+   com semente fixa (--seed), usando inserts em lote.
+2. Dispara as cargas de trabalho register, login, create-order, status-update e admin-stats, cada
+   uma com --requests requisições em --concurrency clientes simultâneos. Por padrão usa o cliente de
+   teste do Flask no próprio processo; com --url, usa um servidor já em execução (apontado para o
+   mesmo banco e com RATE_LIMIT_BACKEND=off).
+3. Grava vazão e percentis de latência por endpoint num JSON (--output). Com --compare, mostra a
+   variação em relação a um relatório anterior.
+
+Uso:
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --users 5000 --orders 50000 --history 100000 --concurrency 16
+    python benchmarks/bench_api.py --url http://127.0.0.1:8000 --compare benchmarks/results/anterior.json
+
+ATENÇÃO: o seed apaga e recria as tabelas do banco apontado por BENCH_DATABASE_URL (sem ela, um
+SQLite local). O DATABASE_URL do ambiente (ou do .env) é ignorado.
+Nunca rode contra o banco de produção.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script apaga e recria as tabelas); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_api.db'))
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'off')  # O limite de taxa por cliente não é o alvo deste teste
+
+from faker import Faker  # noqa: E402
+
+from app import app  # noqa: E402
+from pizzaria.auth import MASTER_PASSWORD, MASTER_USER, initialize_database  # noqa: E402
+from pizzaria.catalog import CATALOG  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+from pizzaria.models import User, Order, OrderHistory, OrderItem, ORDER_TRANSITIONS  # noqa: E402
+from pizzaria.order_items import order_item_rows  # noqa: E402
+from pizzaria.passwords import hash_password  # noqa: E402
+from pizzaria.stats import rebuild_store_stats  # noqa: E402
+
+SEED_PASSWORD = 'bench-senha'
+CHUNK_SIZE = 5_000
+ACTIVE_STATUSES = ['pendente', 'preparando', 'saiu-entrega']
+WORKLOADS = ['register', 'login', 'create-order', 'status-update', 'admin-stats']
+PERCENTILES = (50, 90, 95, 99)
+
+
+# --- Seed ---
+
+def random_pizzas(rng: random.Random, pizzas: list[dict]) -> tuple[list[dict], float]:
+    chosen = rng.sample(pizzas, rng.randint(1, min(3, len(pizzas))))
+    return chosen, round(sum(float(pizza['price']) for pizza in chosen), 2)
+
+
+def seed(num_users: int, num_orders: int, num_history: int, rng: random.Random, fake: Faker) -> dict:
+    """Recria as tabelas e insere os dados em lotes (executemany), sem passar pelo ORM."""
+    db.drop_all()
+    db.create_all()
+    MASTER_USER['id'] = None
+    initialize_database()
+
+    now = datetime.now(timezone.utc)
+    password_hash = hash_password(SEED_PASSWORD) # Mesmo hash para todos: o custo do bcrypt fica só no login
+    emails = [f'{i}.{fake.user_name()}@bench.local' for i in range(num_users)]
+    for start in range(0, num_users, CHUNK_SIZE):
+        db.session.execute(User.__table__.insert(), [
+            {'name': fake.name(), 'email': emails[i], 'phone': fake.phone_number()[:20],
+             'address': fake.street_address()[:200], 'password_hash': password_hash, 'role': 'customer',
+             'created_at': now - timedelta(days=rng.randint(0, 365))}
+            for i in range(start, min(start + CHUNK_SIZE, num_users))
+        ])
+    user_ids = [row[0] for row in db.session.query(User.id).filter(User.role == 'customer').all()]
+
+    pizzas = CATALOG.get().pizzas
+    for start in range(0, num_orders, CHUNK_SIZE):
+        rows, chosen = [], []
+        for _ in range(start, min(start + CHUNK_SIZE, num_orders)):
+            order_pizzas, total = random_pizzas(rng, pizzas)
+            chosen.append(order_pizzas)
+            created = now - timedelta(minutes=rng.randint(0, 60 * 24))
+            rows.append({'user_id': rng.choice(user_ids), 'customer_name': fake.name(), 'customer_phone': fake.phone_number()[:50],
+                         'customer_address': fake.street_address(), 'total': total,
+                         'status': rng.choice(ACTIVE_STATUSES), 'created_at': created, 'updated_at': created})
+        order_ids = db.session.execute(Order.__table__.insert().returning(Order.id, sort_by_parameter_order=True), rows).scalars().all()
+        db.session.execute(OrderItem.__table__.insert(), [
+            item for order_id, order_pizzas in zip(order_ids, chosen) for item in order_item_rows(order_id, order_pizzas)
+        ])
+
+    for start in range(0, num_history, CHUNK_SIZE):
+        rows, item_rows = [], []
+        for i in range(start, min(start + CHUNK_SIZE, num_history)):
+            order_pizzas, total = random_pizzas(rng, pizzas)
+            item_rows.extend(order_item_rows(10_000_000 + i, order_pizzas))
+            created = now - timedelta(days=rng.randint(1, 365), minutes=rng.randint(0, 60 * 24))
+            rows.append({'original_order_id': 10_000_000 + i, 'user_id': rng.choice(user_ids), 'customer_name': fake.name(),
+                         'customer_phone': fake.phone_number()[:50], 'customer_address': fake.street_address(),
+                         'total': total, 'status': 'entregue', 'created_at': created,
+                         'completed_at': created + timedelta(minutes=rng.randint(20, 90))})
+        db.session.execute(OrderHistory.__table__.insert(), rows)
+        db.session.execute(OrderItem.__table__.insert(), item_rows)
+    db.session.commit()
+    rebuild_store_stats()
+
+    return {'emails': emails, 'orders': order_states(), 'pizza_names': [pizza['name'] for pizza in pizzas]}
+
+
+def order_states() -> dict:
+    """{id: (status, version)} dos pedidos ativos, para status-update mandar transições válidas."""
+    return {row.id: (row.status, row.version) for row in db.session.query(Order.id, Order.status, Order.version)}
+
+
+def load_existing() -> dict:
+    """Reaproveita os dados de um seed anterior (--no-seed)."""
+    emails = [row[0] for row in db.session.query(User.email).filter(User.email.like('%@bench.local')).all()]
+    return {'emails': emails, 'orders': order_states(), 'pizza_names': [pizza['name'] for pizza in CATALOG.get().pizzas]}
+
+
+# --- Transporte (cliente de teste do Flask ou HTTP) ---
+
+class FlaskTransport:
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: dict | None = None, token: str | None = None) -> tuple[int, dict | None]:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpTransport:
+    def __init__(self, base_url: str):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+
+    def request(self, method: str, path: str, body: dict | None = None, token: str | None = None) -> tuple[int, dict | None]:
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        try:
+            conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+        finally:
+            conn.close()
+        try:
+            return response.status, json.loads(raw)
+        except ValueError:
+            return response.status, None
+
+
+# --- Cargas de trabalho ---
+
+def login(transport, email: str, password: str) -> str:
+    status, body = transport.request('POST', '/api/login', {'email': email, 'password': password})
+    if status != 200:
+        raise SystemExit(f'Falha no login de {email}: {status} {body}')
+    return body['token']
+
+
+def build_workloads(transport, data: dict, rng: random.Random, fake: Faker, customers: int) -> dict:
+    """Cada carga é uma função sem argumentos que faz uma requisição e devolve o status HTTP."""
+    admin_token = login(transport, MASTER_USER['email'], MASTER_PASSWORD)
+    customer_tokens = [login(transport, email, SEED_PASSWORD) for email in rng.sample(data['emails'], min(customers, len(data['emails'])))]
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def pick(sequence):
+        with lock:
+            return rng.choice(sequence)
+
+    def register():
+        n = next(counter)
+        body = {'name': fake.name(), 'email': f'novo-{n}-{time.time_ns()}@bench.local', 'phone': '0', 'address': 'x', 'password': SEED_PASSWORD}
+        return transport.request('POST', '/api/register', body)[0]
+
+    def login_workload():
+        return transport.request('POST', '/api/login', {'email': pick(data['emails']), 'password': SEED_PASSWORD})[0]
+
+    def create_order():
+        with lock:
+            items = rng.sample(data['pizza_names'], rng.randint(1, min(3, len(data['pizza_names']))))
+        return transport.request('POST', '/api/orders', {'items': items}, pick(customer_tokens))[0]
+
+    order_ids = list(data['orders'])
+
+    def status_update():
+        # Só status ativos (o pedido continua na tabela e pode ser sorteado de novo), com o status e a
+        # versão conhecidos: 409 só quando duas requisições sorteiam o mesmo pedido ao mesmo tempo
+        with lock:
+            order_id = rng.choice(order_ids)
+            status, version = data['orders'][order_id]
+            new_status = rng.choice([target for target in ORDER_TRANSITIONS[status] if target in ACTIVE_STATUSES])
+        body = {'status': new_status, 'expected_status': status, 'version': version}
+        response_status, response_body = transport.request('PUT', f'/api/admin/orders/{order_id}', body, admin_token)
+        if response_status == 200:
+            with lock:
+                data['orders'][order_id] = (new_status, response_body['order']['version'])
+        return response_status
+
+    def admin_stats():
+        return transport.request('GET', '/api/admin/stats', token=admin_token)[0]
+
+    return {
+        'register': ('POST /api/register', register),
+        'login': ('POST /api/login', login_workload),
+        'create-order': ('POST /api/orders', create_order),
+        'status-update': ('PUT /api/admin/orders/<id>', status_update),
+        'admin-stats': ('GET /api/admin/stats', admin_stats),
+    }
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    """Percentil pelo método nearest-rank."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return round(sorted_values[min(rank, len(sorted_values) - 1)], 2)
+
+
+def run_workload(func, total_requests: int, concurrency: int) -> dict:
+    def timed(_):
+        started_at = time.perf_counter()
+        try:
+            status = func()
+        except Exception:
+            status = None
+        return status, (time.perf_counter() - started_at) * 1000
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(total_requests)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies = sorted(ms for status, ms in results if status is not None and status < 400)
+    errors = {}
+    for status, _ in results:
+        if status is None or status >= 400:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    report = {
+        'requests': total_requests,
+        'ok': len(latencies),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+    }
+    for pct in PERCENTILES:
+        report[f'p{pct}_ms'] = percentile(latencies, pct)
+    return report
+
+
+# --- Relatório ---
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(current: dict, previous_path: str):
+    with open(previous_path, encoding='utf-8') as previous_file:
+        previous = json.load(previous_file)
+    print(f"\nComparação com {previous_path} (commit {previous['meta'].get('git_revision')}):")
+    for name, result in current['results'].items():
+        before = previous['results'].get(name)
+        if not before:
+            continue
+        changes = []
+        for key in ('throughput_rps', 'p50_ms', 'p99_ms'):
+            if before.get(key) and result.get(key) is not None:
+                changes.append(f"{key} {(result[key] - before[key]) / before[key] * 100:+.1f}%")
+        print(f"  {name:15s} {'  '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1_000, help='usuários clientes no seed')
+    parser.add_argument('--orders', type=int, default=5_000, help='pedidos ativos no seed')
+    parser.add_argument('--history', type=int, default=20_000, help='linhas de histórico no seed')
+    parser.add_argument('--no-seed', action='store_true', help='reaproveita os dados já existentes no banco')
+    parser.add_argument('--seed', type=int, default=42, help='semente do Faker e do sorteio das requisições')
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument('--requests', type=int, default=200, help='requisições por carga de trabalho')
+    parser.add_argument('--concurrency', type=int, default=8, help='clientes simultâneos')
+    parser.add_argument('--customers', type=int, default=50, help='clientes logados usados em create-order')
+    parser.add_argument('--url', help='servidor em execução (padrão: cliente de teste do Flask no processo)')
+    parser.add_argument('--output', help='arquivo JSON do relatório (padrão: benchmarks/results/bench_api-<data>.json)')
+    parser.add_argument('--compare', help='relatório anterior para comparar')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fake = Faker('pt_BR')
+    fake.seed_instance(args.seed)
+
+    with app.app_context():
+        started_at = time.perf_counter()
+        data = load_existing() if args.no_seed else seed(args.users, args.orders, args.history, rng, fake)
+        print(f'Banco: {db.engine.url.render_as_string(hide_password=True)}  '
+              f'({len(data["emails"])} usuários, {len(data["orders"])} pedidos ativos, preparo em {time.perf_counter() - started_at:.1f}s)')
+        dialect = db.engine.dialect.name
+        db.session.remove()
+
+    transport = HttpTransport(args.url) if args.url else FlaskTransport()
+    workloads = build_workloads(transport, data, rng, fake, args.customers)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'database': dialect,
+            'target': args.url or 'flask-test-client',
+            'args': vars(args),
+        },
+        'results': {}
+    }
+    print(f"\n{'carga':15s} {'endpoint':28s} {'req/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'erros':>6s}")
+    for name in args.workloads:
+        endpoint, func = workloads[name]
+        result = run_workload(func, args.requests, args.concurrency)
+        report['results'][name] = dict(result, endpoint=endpoint)
+        print(f"{name:15s} {endpoint:28s} {result['throughput_rps']:8.1f} {result['p50_ms']!s:>8s} "
+              f"{result['p95_ms']!s:>8s} {result['p99_ms']!s:>8s} {sum(result['errors'].values()):6d}")
+
+    output = args.output or os.path.join(BASE_DIR, 'benchmarks', 'results', f"bench_api-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as output_file:
+        json.dump(report, output_file, indent=2, ensure_ascii=False)
+    print(f'\nRelatório gravado em {output}')
+
+    if args.compare:
+        print_comparison(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
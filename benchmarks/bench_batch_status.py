@@ -0,0 +1,94 @@
+"""
+Benchmark da atualização de status em lote (PUT /api/admin/orders/batch) contra N chamadas
+individuais de PUT /api/admin/orders/<id>.
+
+Cria N pedidos, muda o status de todos (metade para 'entregue', que agenda a ida para o
+histórico na fila de tarefas) das duas formas e reporta tempo total, consultas SQL e commits de cada uma.
+
+Uso:
+    python benchmarks/bench_batch_status.py --orders 100
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/bench_batch_status.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script apaga e recria as tabelas); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_batch_status.db'))
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'off')  # O limite de taxa por cliente não é o alvo deste teste
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app  # noqa: E402
+from pizzaria.auth import initialize_database  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+
+COUNTERS = {'queries': 0, 'commits': 0}
+
+
+def count_query(*_):
+    COUNTERS['queries'] += 1
+
+
+def count_commit(*_):
+    COUNTERS['commits'] += 1
+
+
+def login(client, email: str, password: str) -> dict:
+    token = client.post('/api/login', json={'email': email, 'password': password}).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def create_orders(client, headers: dict, count: int) -> list[int]:
+    return [
+        client.post('/api/orders', json={'items': ['Margherita', 'Calabresa']}, headers=headers).get_json()['order']['id']
+        for _ in range(count)
+    ]
+
+
+def target_status(position: int) -> str:
+    return 'entregue' if position % 2 else 'preparando'
+
+
+def measure(label: str, func):
+    COUNTERS.update(queries=0, commits=0)
+    start = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{label:28s} {elapsed:9.1f} ms   consultas: {COUNTERS['queries']:5d}   commits: {COUNTERS['commits']:4d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100, help='pedidos atualizados em cada rodada (máx. 200 no lote)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        initialize_database()
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+        event.listen(db.engine, 'commit', count_commit)
+
+    client = app.test_client()
+    client.post('/api/register', json={'name': 'Bench', 'email': 'batch@bench.local', 'phone': '0', 'address': 'x', 'password': 'bench'})
+    customer = login(client, 'batch@bench.local', 'bench')
+    admin = login(client, 'master@pizzaria.com', 'master123')
+
+    single_ids = create_orders(client, customer, args.orders)
+    measure(f'{args.orders} PUTs individuais', lambda: [
+        client.put(f'/api/admin/orders/{order_id}', json={'status': target_status(i)}, headers=admin)
+        for i, order_id in enumerate(single_ids)
+    ])
+
+    batch_ids = create_orders(client, customer, args.orders)
+    updates = [{'order_id': order_id, 'status': target_status(i)} for i, order_id in enumerate(batch_ids)]
+    measure('1 PUT em lote', lambda: client.put('/api/admin/orders/batch', json={'updates': updates}, headers=admin))
+
+
+if __name__ == '__main__':
+    main()
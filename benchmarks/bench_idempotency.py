@@ -0,0 +1,134 @@
+"""
+Verificação das chaves de idempotência de POST /api/orders sob repetições simultâneas.
+
+Dispara N requisições iguais (mesma Idempotency-Key) ao mesmo tempo, em threads, e confere que:
+- só um pedido foi gravado;
+- todas as respostas trazem o mesmo pedido, e N-1 delas vêm marcadas com 'Idempotent-Replayed';
+- reusar a chave com outro corpo devolve 422;
+- a varredura descarta as chaves expiradas (MemoryIdempotencyStore com relógio falso).
+
+Repete isso por --rounds chaves diferentes e reporta o tempo da primeira resposta contra o das
+repetições. Sai com código 1 se alguma verificação falhar.
+
+Uso:
+    python benchmarks/bench_idempotency.py --concurrency 16 --rounds 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script apaga e recria as tabelas); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_idempotency.db'))
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'off')  # O limite de taxa por cliente não é o alvo deste teste
+os.environ['IDEMPOTENCY_BACKEND'] = 'memory'
+
+from app import app  # noqa: E402
+from pizzaria.auth import initialize_database  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+from pizzaria.idempotency import MemoryIdempotencyStore  # noqa: E402
+from pizzaria.models import Order  # noqa: E402
+
+ORDER_BODY = {'items': ['Margherita', 'Calabresa']}
+FAILURES = []
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        FAILURES.append(message)
+        print(f'FALHOU: {message}')
+
+
+def login(client, email: str, password: str) -> dict:
+    token = client.post('/api/login', json={'email': email, 'password': password}).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def fire_duplicates(headers: dict, concurrency: int) -> tuple[list, dict]:
+    """Manda `concurrency` POSTs com a mesma chave, todos liberados juntos por uma barreira."""
+    key_headers = {**headers, 'Idempotency-Key': str(uuid.uuid4())}
+    barrier = threading.Barrier(concurrency)
+    results = [None] * concurrency
+
+    def worker(position: int):
+        client = app.test_client()
+        barrier.wait()
+        start = time.perf_counter()
+        response = client.post('/api/orders', json=ORDER_BODY, headers=key_headers)
+        elapsed = (time.perf_counter() - start) * 1000
+        results[position] = (response.status_code, response.get_json(), response.headers.get('Idempotent-Replayed'), elapsed)
+
+    threads = [threading.Thread(target=worker, args=(position,)) for position in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, key_headers
+
+
+def check_sweep():
+    now = [0.0]
+    store = MemoryIdempotencyStore(ttl_seconds=10, lock_seconds=5, sweep_seconds=1, clock=lambda: now[0])
+    store.begin('a', 'x')
+    store.complete('a', {'fingerprint': 'x', 'status': 201, 'body': '{}', 'mimetype': 'application/json'})
+    store.begin('b', 'y') # Fica em andamento e expira pelo lock_seconds
+    check(store.begin('a', 'x')[0] == 'done', 'chave concluída deveria ser repetida antes do TTL')
+    now[0] = 6
+    check(store.sweep() == 1 and len(store) == 1, 'a chave em andamento deveria expirar após lock_seconds')
+    now[0] = 11
+    check(store.begin('c', 'z') == ('new', None) and len(store) == 1, 'a varredura em begin() deveria descartar a chave expirada')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16, help='requisições simultâneas com a mesma chave')
+    parser.add_argument('--rounds', type=int, default=20, help='chaves diferentes testadas')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        initialize_database()
+
+    client = app.test_client()
+    client.post('/api/register', json={'name': 'Bench', 'email': 'idem@bench.local', 'phone': '0', 'address': 'x', 'password': 'bench'})
+    headers = login(client, 'idem@bench.local', 'bench')
+
+    first_ms, replay_ms = [], []
+    for _ in range(args.rounds):
+        results, key_headers = fire_duplicates(headers, args.concurrency)
+        statuses = {status for status, _, _, _ in results}
+        order_ids = {body['order']['id'] for status, body, _, _ in results if status == 201}
+        replayed = [result for result in results if result[2] == 'true']
+        check(statuses == {201}, f'todas as respostas deveriam ser 201, vieram {sorted(statuses)}')
+        check(len(order_ids) == 1, f'esperado 1 pedido por chave, vieram {len(order_ids)}')
+        check(len(replayed) == args.concurrency - 1, f'esperadas {args.concurrency - 1} repetições, vieram {len(replayed)}')
+        first_ms += [elapsed for _, _, flag, elapsed in results if flag != 'true']
+        replay_ms += [elapsed for _, _, flag, elapsed in replayed]
+
+        conflict = client.post('/api/orders', json={'items': ['Margherita']}, headers=key_headers)
+        check(conflict.status_code == 422, f'chave reusada com outro corpo deveria dar 422, veio {conflict.status_code}')
+
+    with app.app_context():
+        orders = db.session.query(Order).count()
+    check(orders == args.rounds, f'esperados {args.rounds} pedidos gravados, há {orders}')
+    check_sweep()
+
+    print(f'{args.rounds} chaves x {args.concurrency} requisições simultâneas -> {orders} pedidos gravados')
+    if first_ms:
+        print(f'primeira resposta   mediana {statistics.median(first_ms):8.1f} ms')
+    if replay_ms:
+        print(f'repetições          mediana {statistics.median(replay_ms):8.1f} ms (inclui a espera pela original)')
+    if FAILURES:
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark dos índices das consultas mais usadas (pedidos/histórico por usuário e stats do admin).
+
+Popula um banco local com N pedidos e N/2 linhas de histórico, mede o plano de execução e a
+latência de cada consulta SEM os índices e depois COM os índices.
+
+Uso:
+    python benchmarks/bench_indexes.py                       # SQLite em benchmarks/bench_indexes.db
+    python benchmarks/bench_indexes.py --orders 200000
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/bench_indexes.py
+
+ATENÇÃO: o script apaga e recria as tabelas do banco apontado por BENCH_DATABASE_URL (sem ela, um
+SQLite local). O DATABASE_URL do ambiente (ou do .env) é ignorado.
+Nunca rode contra o banco de produção.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script apaga e recria as tabelas); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(BASE_DIR, 'benchmarks', 'bench_indexes.db'))
+
+from sqlalchemy import text  # noqa: E402
+
+from app import app  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+from pizzaria.models import User, Order, OrderHistory  # noqa: E402
+
+CHUNK_SIZE = 10_000
+STATUSES = ['pendente', 'preparando', 'saiu-entrega']
+
+QUERIES = {
+    'my-orders': (
+        "SELECT * FROM orders WHERE user_id = :user_id ORDER BY created_at DESC"
+    ),
+    'my-history': (
+        "SELECT * FROM order_history WHERE user_id = :user_id ORDER BY completed_at DESC"
+    ),
+    'stats-status': (
+        "SELECT status, count(id) FROM orders GROUP BY status"
+    ),
+    'admin-history-page': (
+        "SELECT * FROM order_history ORDER BY completed_at DESC, id DESC LIMIT 100"
+    ),
+}
+
+
+def seed(num_users: int, num_orders: int):
+    """Recria as tabelas e insere os dados em lotes (executemany), sem passar pelo ORM."""
+    db.drop_all()
+    db.create_all()
+    drop_indexes()
+
+    now = datetime.now(timezone.utc)
+    users = [
+        {'name': f'Cliente {i}', 'email': f'cliente{i}@bench.local', 'password_hash': 'x', 'role': 'customer', 'created_at': now}
+        for i in range(num_users)
+    ]
+    db.session.execute(User.__table__.insert(), users)
+
+    for start in range(0, num_orders, CHUNK_SIZE):
+        rows = []
+        for i in range(start, min(start + CHUNK_SIZE, num_orders)):
+            created = now - timedelta(minutes=i)
+            rows.append({
+                'user_id': random.randint(1, num_users), 'customer_name': 'Cliente',
+                'total': 25, 'status': random.choice(STATUSES), 'created_at': created, 'updated_at': created
+            })
+        db.session.execute(Order.__table__.insert(), rows)
+
+    for start in range(0, num_orders // 2, CHUNK_SIZE):
+        rows = []
+        for i in range(start, min(start + CHUNK_SIZE, num_orders // 2)):
+            created = now - timedelta(minutes=i)
+            rows.append({
+                'original_order_id': num_orders + i, 'user_id': random.randint(1, num_users), 'customer_name': 'Cliente',
+                'total': 25, 'status': 'entregue', 'created_at': created,
+                'completed_at': created + timedelta(minutes=40)
+            })
+        db.session.execute(OrderHistory.__table__.insert(), rows)
+    db.session.commit()
+
+
+def model_indexes():
+    return [index for table in (Order.__table__, OrderHistory.__table__) for index in table.indexes]
+
+
+def drop_indexes():
+    with db.engine.begin() as conn:
+        for index in model_indexes():
+            index.drop(conn, checkfirst=True)
+
+
+def create_indexes():
+    with db.engine.begin() as conn:
+        for index in model_indexes():
+            index.create(conn, checkfirst=True)
+        conn.execute(text('ANALYZE'))
+
+
+def explain(sql: str, params: dict) -> str:
+    prefix = 'EXPLAIN QUERY PLAN ' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    with db.engine.connect() as conn:
+        rows = conn.execute(text(prefix + sql), params).fetchall()
+    return '\n'.join('    ' + ' '.join(str(col) for col in row) for row in rows)
+
+
+def measure(sql: str, params: dict, repeat: int) -> dict:
+    timings = []
+    with db.engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(text(sql), params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': statistics.median(timings), 'max_ms': max(timings)}
+
+
+def run_suite(label: str, num_users: int, repeat: int):
+    print(f'\n=== {label} ===')
+    for name, sql in QUERIES.items():
+        params = {'user_id': random.randint(1, num_users)}
+        result = measure(sql, params, repeat)
+        print(f'{name:20s} mediana {result["median_ms"]:9.2f} ms   máx {result["max_ms"]:9.2f} ms')
+        print(explain(sql, params))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=1_000_000, help='quantidade de pedidos ativos (padrão: 1M)')
+    parser.add_argument('--users', type=int, default=10_000, help='quantidade de usuários (padrão: 10k)')
+    parser.add_argument('--repeat', type=int, default=20, help='execuções por consulta')
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f'Banco: {db.engine.url.render_as_string(hide_password=True)}')
+        start = time.perf_counter()
+        seed(args.users, args.orders)
+        print(f'Seed de {args.orders} pedidos concluído em {time.perf_counter() - start:.1f}s')
+
+        run_suite('SEM índices', args.users, args.repeat)
+        create_indexes()
+        run_suite('COM índices', args.users, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Micro-benchmark da serialização das listagens de pedidos (100k linhas por padrão).
+
+Compara, para a mesma consulta (pedidos ordenados por created_at DESC):
+  - orm+to_dict+json : objetos do ORM, Order.to_dict() e o json da biblioteca padrão (caminho antigo)
+  - tuplas+json      : só as colunas de Order.JSON_FIELDS e o json da biblioteca padrão (fallback)
+  - tuplas+orjson    : só as colunas de Order.JSON_FIELDS e o orjson (se instalado)
+Reporta separadamente o tempo de leitura do banco e o de codificação, e confere que os três
+caminhos geram o mesmo JSON.
+
+Uso:
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py --rows 200000 --repeat 5
+
+ATENÇÃO: o script apaga e recria as tabelas do banco apontado por BENCH_DATABASE_URL (sem ela, um
+SQLite local). O DATABASE_URL do ambiente (ou do .env) é ignorado.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script apaga e recria as tabelas); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_json.db'))
+
+from app import app  # noqa: E402
+from pizzaria import serialization  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+from pizzaria.models import User, Order, OrderItem  # noqa: E402
+
+CHUNK_SIZE = 10_000
+ITEMS = [{'pizza_id': 'margherita', 'name': 'Margherita', 'unit_price': 25, 'quantity': 1},
+         {'pizza_id': 'calabresa', 'name': 'Calabresa', 'unit_price': 28, 'quantity': 1}]
+
+
+def seed(num_rows: int):
+    db.drop_all()
+    db.create_all()
+    now = datetime.now(timezone.utc)
+    db.session.execute(db.insert(User), [{'name': 'Bench', 'email': 'json@bench.local', 'password_hash': 'x', 'role': 'customer', 'created_at': now}])
+    for start in range(0, num_rows, CHUNK_SIZE):
+        order_ids = db.session.execute(Order.__table__.insert().returning(Order.id, sort_by_parameter_order=True), [
+            {'user_id': 1, 'customer_name': f'Cliente {i}', 'customer_phone': '11 99999-0000', 'customer_address': f'Rua {i}, 100',
+             'total': 53, 'status': 'pendente', 'created_at': now - timedelta(seconds=i), 'updated_at': now}
+            for i in range(start, min(start + CHUNK_SIZE, num_rows))
+        ]).scalars().all()
+        db.session.execute(OrderItem.__table__.insert(), [dict(item, order_id=order_id) for order_id in order_ids for item in ITEMS])
+    db.session.commit()
+
+
+def stdlib_dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=serialization.json_default).encode('utf-8')
+
+
+def orm_path():
+    started_at = time.perf_counter()
+    orders = Order.query.order_by(Order.created_at.desc()).all()
+    rows = [order.to_dict() for order in orders]
+    fetched_at = time.perf_counter()
+    body = json.dumps({'orders': rows}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, fetched_at - started_at, time.perf_counter() - fetched_at
+
+
+def tuple_path(dumps):
+    def run():
+        started_at = time.perf_counter()
+        rows = serialization.select_json_rows(Order.query.order_by(Order.created_at.desc()), Order)
+        fetched_at = time.perf_counter()
+        body = dumps({'orders': rows})
+        return body, fetched_at - started_at, time.perf_counter() - fetched_at
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help='pedidos na listagem (padrão: 100k)')
+    parser.add_argument('--repeat', type=int, default=3, help='execuções por caminho (vale a mediana)')
+    args = parser.parse_args()
+
+    paths = {'orm+to_dict+json': orm_path, 'tuplas+json': tuple_path(stdlib_dumps)}
+    if serialization.orjson:
+        paths['tuplas+orjson'] = tuple_path(serialization.dumps)
+    else:
+        print('[AVISO] orjson não instalado: só o fallback da biblioteca padrão será medido.')
+
+    with app.app_context():
+        print(f'Banco: {db.engine.url.render_as_string(hide_password=True)}')
+        seed(args.rows)
+        print(f'{args.rows} pedidos inseridos\n')
+
+        print(f"{'caminho':18s} {'banco ms':>9s} {'json ms':>9s} {'total ms':>9s} {'linhas/s':>10s}")
+        reference = None
+        for label, run in paths.items():
+            fetch_times, encode_times = [], []
+            for _ in range(args.repeat):
+                db.session.expunge_all()
+                body, fetch_seconds, encode_seconds = run()
+                fetch_times.append(fetch_seconds)
+                encode_times.append(encode_seconds)
+            if reference is None:
+                reference = json.loads(body)
+            elif json.loads(body) != reference:
+                raise SystemExit(f'{label}: JSON diferente do caminho antigo')
+            fetch_ms = statistics.median(fetch_times) * 1000
+            encode_ms = statistics.median(encode_times) * 1000
+            total_ms = fetch_ms + encode_ms
+            print(f'{label:18s} {fetch_ms:9.1f} {encode_ms:9.1f} {total_ms:9.1f} {args.rows / (total_ms / 1000):10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark de vazão do login (/api/login) para diferentes custos do bcrypt.
+
+Para cada custo, regrava a senha do usuário de teste com esse custo e dispara logins
+concorrentes pelo cliente de teste do Flask, reportando logins/s, latência e as métricas
+de fila do pool de hash (PASSWORD_HASHER).
+
+Uso:
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --rounds 8 10 12 --requests 200 --concurrency 8
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script grava no banco); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_login.db'))
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'off')  # O limite de taxa por cliente não é o alvo deste teste
+
+from app import app  # noqa: E402
+from pizzaria import passwords  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+from pizzaria.models import User  # noqa: E402
+
+EMAIL = 'bench-login@pizzaria.local'
+PASSWORD = 'senha-de-benchmark'
+
+
+def prepare_user(rounds: int):
+    with app.app_context():
+        user = User.query.filter_by(email=EMAIL).first()
+        if user is None:
+            user = User(name='Benchmark', email=EMAIL, password_hash='x')
+            db.session.add(user)
+        user.password_hash = passwords.hash_password(PASSWORD, rounds=rounds)
+        db.session.commit()
+
+
+def login_once(_):
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.post('/api/login', json={'email': EMAIL, 'password': PASSWORD})
+    return response.status_code, (time.perf_counter() - start) * 1000
+
+
+def run(rounds: int, total_requests: int, concurrency: int) -> dict:
+    passwords.PASSWORD_HASH_ROUNDS = rounds
+    passwords.PASSWORD_HASHER = passwords.PasswordHasher(passwords.PASSWORD_HASH_WORKERS, passwords.PASSWORD_HASH_MAX_PENDING)
+    prepare_user(rounds)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(login_once, range(total_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(ms for status, ms in results if status == 200)
+    return {
+        'rounds': rounds,
+        'ok': len(latencies),
+        'rejected_503': sum(1 for status, _ in results if status == 503),
+        'logins_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 1) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1], 1) if latencies else None,
+        'pool': passwords.PASSWORD_HASHER.metrics()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, nargs='+', default=[4, 8, 10, 12], help='custos do bcrypt a testar')
+    parser.add_argument('--requests', type=int, default=100, help='logins por custo')
+    parser.add_argument('--concurrency', type=int, default=8, help='logins simultâneos')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+
+    print(f"workers do pool: {passwords.PASSWORD_HASH_WORKERS}  fila máx.: {passwords.PASSWORD_HASH_MAX_PENDING}")
+    for rounds in args.rounds:
+        result = run(rounds, args.requests, args.concurrency)
+        pool = result['pool']
+        print(f"custo {rounds:2d}: {result['logins_per_sec']:8.1f} logins/s  p50 {result['p50_ms']} ms  "
+              f"p99 {result['p99_ms']} ms  503: {result['rejected_503']}  "
+              f"fila média {pool['avg_queue_ms']} ms  máx {pool['max_queue_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
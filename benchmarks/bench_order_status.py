@@ -0,0 +1,201 @@
+"""
+Verificação das mudanças de status concorrentes em PUT /api/admin/orders/<id> (e no lote).
+
+Vários admins (threads) mexem no mesmo pedido ao mesmo tempo e o script confere que:
+- com o status e a versão que estavam vendo, só um consegue a mesma transição; os outros recebem 409;
+- sem versão (estado lido do banco), toda resposta é 200 ou 409, nunca 500, e a versão final é
+  1 + o número de respostas 200;
+- 'entregue' é aceito uma única vez: uma tarefa move_to_history, uma linha no histórico;
+- transições fora de ORDER_TRANSITIONS dão 409;
+- dois lotes simultâneos sobre os mesmos pedidos mudam cada pedido uma vez só;
+- ids de pedidos entregues ou apagados não são reaproveitados (entregar -> pedir de novo -> entregar;
+  apagar -> pedir de novo): o pedido novo não herda itens nem colide no histórico;
+- store_stats continua batendo com as tabelas (check_store_stats).
+
+Sai com código 1 se alguma verificação falhar.
+
+Uso:
+    python benchmarks/bench_order_status.py --concurrency 16 --rounds 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script apaga e recria as tabelas); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_order_status.db'))
+os.environ['RATE_LIMIT_BACKEND'] = 'off'
+
+from app import app  # noqa: E402
+from pizzaria.auth import MASTER_PASSWORD, MASTER_USER, initialize_database  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+from pizzaria.jobs import run_pending_jobs  # noqa: E402
+from pizzaria.models import Job, Order, OrderHistory, ORDER_STATUSES  # noqa: E402
+from pizzaria.stats import check_store_stats, rebuild_store_stats  # noqa: E402
+
+FAILURES = []
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        FAILURES.append(message)
+        print(f'FALHOU: {message}')
+
+
+def login(client, email: str, password: str) -> dict:
+    token = client.post('/api/login', json={'email': email, 'password': password}).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def hammer(concurrency: int, request_for) -> list[tuple[int, dict]]:
+    """Dispara `concurrency` requisições liberadas juntas por uma barreira; request_for(posição, client) faz cada uma."""
+    barrier = threading.Barrier(concurrency)
+    results = [None] * concurrency
+
+    def worker(position: int):
+        client = app.test_client()
+        barrier.wait()
+        response = request_for(position, client)
+        results[position] = (response.status_code, response.get_json())
+
+    threads = [threading.Thread(target=worker, args=(position,)) for position in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def order_state(order_id: int) -> tuple[str, int] | None:
+    with app.app_context():
+        row = db.session.execute(db.select(Order.status, Order.version).where(Order.id == order_id)).first()
+        return (row.status, row.version) if row else None
+
+
+def check_id_reuse(client, customer: dict, master: dict) -> list[int]:
+    """Entrega e apaga o pedido de maior id e confere que os próximos pedidos não herdam id nem itens."""
+    def create(pizza: str) -> dict:
+        return client.post('/api/orders', json={'items': [pizza]}, headers=customer).get_json()['order']
+
+    def item_names(order: dict) -> list[str]:
+        return [item['name'] for item in order['items']]
+
+    first = create('Margherita')
+    client.put(f"/api/admin/orders/{first['id']}", json={'status': 'entregue'}, headers=master)
+    with app.app_context():
+        while run_pending_jobs():
+            pass
+    second = create('Pepperoni')
+    check(second['id'] != first['id'], f"pedido novo reaproveitou o id {first['id']} de um pedido entregue")
+    check(item_names(second) == ['Pepperoni'], f"pedido {second['id']} com itens {item_names(second)}, esperado ['Pepperoni']")
+
+    deleted = create('Calabresa')
+    client.delete(f"/api/admin/orders/{deleted['id']}", headers=master)
+    third = create('Quatro Queijos')
+    check(third['id'] != deleted['id'], f"pedido novo reaproveitou o id {deleted['id']} de um pedido apagado")
+    check(item_names(third) == ['Quatro Queijos'], f"pedido {third['id']} com itens {item_names(third)}, esperado ['Quatro Queijos']")
+
+    for order in (second, third):
+        response = client.put(f"/api/admin/orders/{order['id']}", json={'status': 'entregue'}, headers=master)
+        check(response.status_code == 200, f"entrega do pedido {order['id']}: {response.status_code}")
+
+    history = client.get('/api/admin/history?limit=500', headers=master).get_json()['orders']
+    first_entry = next((entry for entry in history if entry['originalOrderId'] == first['id']), None)
+    check(first_entry is not None and item_names(first_entry) == ['Margherita'],
+          f"histórico do pedido {first['id']}: {first_entry and item_names(first_entry)}, esperado ['Margherita']")
+    return [first['id'], second['id'], third['id']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16, help='admins mexendo no mesmo pedido ao mesmo tempo')
+    parser.add_argument('--rounds', type=int, default=20, help='pedidos testados')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        MASTER_USER['id'] = None
+        initialize_database()
+        rebuild_store_stats()
+
+    client = app.test_client()
+    client.post('/api/register', json={'name': 'Cliente', 'email': 'status@bench.local', 'phone': '0', 'address': 'x', 'password': 'bench'})
+    customer = login(client, 'status@bench.local', 'bench')
+    master = login(client, MASTER_USER['email'], MASTER_PASSWORD)
+
+    def create_order() -> int:
+        return client.post('/api/orders', json={'items': ['Margherita']}, headers=customer).get_json()['order']['id']
+
+    started_at = time.perf_counter()
+    delivered = []
+    for _ in range(args.rounds):
+        order_id = create_order()
+        url = f'/api/admin/orders/{order_id}'
+
+        # 1. Mesma transição, com o status e a versão vistos: só uma passa
+        results = hammer(args.concurrency, lambda _, c: c.put(url, json={'status': 'preparando', 'expected_status': 'pendente', 'version': 1}, headers=master))
+        statuses = sorted(status for status, _ in results)
+        check(statuses.count(200) == 1 and statuses.count(409) == args.concurrency - 1,
+              f'pedido {order_id}: esperado 1x200 e {args.concurrency - 1}x409, vieram {statuses}')
+        check(order_state(order_id) == ('preparando', 2), f'pedido {order_id}: estado {order_state(order_id)}, esperado (preparando, 2)')
+
+        # 2. Sem versão: cada requisição lê o estado e tenta uma transição qualquer (exceto 'entregue')
+        targets = [rng.choice(ORDER_STATUSES[:-1]) for _ in range(args.concurrency)]
+        results = hammer(args.concurrency, lambda position, c: c.put(url, json={'status': targets[position]}, headers=master))
+        statuses = [status for status, _ in results]
+        check(set(statuses) <= {200, 409}, f'pedido {order_id}: respostas inesperadas {sorted(set(statuses))}')
+        check(order_state(order_id)[1] == 2 + statuses.count(200),
+              f'pedido {order_id}: versão {order_state(order_id)[1]}, esperada {2 + statuses.count(200)}')
+
+        # 3. 'entregue' ao mesmo tempo: uma vez só
+        results = hammer(args.concurrency, lambda _, c: c.put(url, json={'status': 'entregue'}, headers=master))
+        statuses = sorted(status for status, _ in results)
+        check(statuses.count(200) == 1 and set(statuses) <= {200, 409}, f'pedido {order_id}: entregue aceito {statuses.count(200)} vezes ({statuses})')
+        delivered.append(order_id)
+
+        # 4. Transição a partir do status final
+        response = client.put(url, json={'status': 'pendente'}, headers=master)
+        check(response.status_code == 409, f'pedido {order_id}: entregue -> pendente deveria dar 409, veio {response.status_code}')
+
+    # 5. Dois lotes simultâneos sobre os mesmos pedidos
+    batch_ids = [create_order() for _ in range(20)]
+    body = {'updates': [{'order_id': order_id, 'status': 'preparando'} for order_id in batch_ids]}
+    results = hammer(2, lambda _, c: c.put('/api/admin/orders/batch', json=body, headers=master))
+    updated = sum(data['updated'] for _, data in results)
+    check(all(status == 200 for status, _ in results), f'lote: respostas {[status for status, _ in results]}')
+    check(updated == len(batch_ids), f'lote: {updated} mudanças para {len(batch_ids)} pedidos')
+    check(all(order_state(order_id) == ('preparando', 2) for order_id in batch_ids), 'lote: pedidos fora de (preparando, 2)')
+    elapsed = time.perf_counter() - started_at
+    with app.app_context():
+        move_jobs = db.session.query(Job).filter(Job.kind == 'move_to_history').count()
+    check(move_jobs == len(delivered), f'esperadas {len(delivered)} tarefas move_to_history, há {move_jobs}')
+
+    # 6. Ids não reaproveitados depois de entregar ou apagar o pedido de maior id
+    delivered += check_id_reuse(client, customer, master)
+
+    with app.app_context():
+        while run_pending_jobs():
+            pass
+        history = db.session.query(OrderHistory).filter(OrderHistory.original_order_id.in_(delivered)).count()
+        dead = db.session.query(Job).filter(Job.status == 'dead').count()
+        differences = check_store_stats()
+    check(history == len(delivered), f'esperados {len(delivered)} pedidos no histórico, há {history}')
+    check(dead == 0, f'{dead} tarefas na dead-letter')
+    check(not differences, f'store_stats divergente: {differences}')
+
+    print(f'{args.rounds} pedidos x {args.concurrency} admins simultâneos em {elapsed:.1f}s; {len(delivered)} entregues, {history} no histórico')
+    if FAILURES:
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
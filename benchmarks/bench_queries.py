@@ -0,0 +1,167 @@
+"""
+Verificação do número de consultas SQL por rota (N+1 e leituras repetidas).
+
+Conta os comandos enviados ao banco em cada requisição (evento before_cursor_execute do engine)
+e compara com o limite de QUERY_BUDGETS. Uma rota que passa a ler uma linha por pedido, ou
+a consultar o mesmo usuário duas vezes, estoura o limite e o script sai com código 1.
+Os caches de resposta e de usuário ficam desligados: conta o caminho completo até o banco.
+
+Cada rota é chamada com --orders pedidos no banco, para que um N+1 apareça como excesso.
+
+Uso:
+    python benchmarks/bench_queries.py
+    python benchmarks/bench_queries.py --orders 50 --verbose
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+# Nunca usa o DATABASE_URL do ambiente (o script apaga e recria as tabelas); outro banco só via BENCH_DATABASE_URL
+os.environ['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_queries.db'))
+os.environ['RESPONSE_CACHE_BACKEND'] = 'off'
+os.environ['RATE_LIMIT_BACKEND'] = 'off'
+os.environ['IDEMPOTENCY_BACKEND'] = 'memory'
+os.environ['USER_CACHE_TTL'] = '0'
+
+from sqlalchemy import event  # noqa: E402
+
+from app import app  # noqa: E402
+from pizzaria.auth import MASTER_PASSWORD, MASTER_USER, initialize_database  # noqa: E402
+from pizzaria.extensions import db  # noqa: E402
+from pizzaria.jobs import run_pending_jobs  # noqa: E402
+from pizzaria.stats import rebuild_store_stats  # noqa: E402
+
+# Máximo de comandos SQL por requisição (o número não pode depender da quantidade de pedidos)
+QUERY_BUDGETS = {
+    'register': 3,             # e-mail existente, INSERT do usuário, consolidado
+    'login': 1,                # usuário por e-mail
+    'login-master': 0,         # id do master já conhecido
+    'verify-token': 1,         # usuário
+    'create-order': 4,         # usuário, pedido, itens, consolidado
+    'create-order-idempotent': 4,
+    'my-orders': 3,            # versão (ETag), pedidos, itens
+    'my-history': 3,
+    'admin-orders': 3,         # versão (ETag), página, itens
+    'admin-orders-ndjson': 2,  # um lote de pedidos + itens
+    'admin-orders-search': 3,
+    'admin-history': 3,
+    'admin-history-search': 3,
+    'admin-stats': 1,          # consolidado
+    'admin-analytics': 4,      # por dia, por hora, por sabor, tempo de entrega
+    'update-status': 5,        # pedido, itens, UPDATE, consolidado (+ tarefa na fila se 'entregue')
+    'update-status-batch': 6,  # pedidos, UPDATE em lote, consolidado, releitura, itens (+ tarefas)
+    'delete-order': 4,         # pedido, DELETE do pedido, DELETE dos itens, consolidado
+    'delete-user': 6,          # nome, contagens, consolidado, DELETE de itens, pedidos e usuário
+}
+ORDER_BODY = {'items': ['Margherita', 'Calabresa', 'Margherita']}
+FAILURES = []
+
+
+class QueryCounter:
+    """Conta (e guarda) os comandos SQL executados no engine enquanto está ativo."""
+
+    def __init__(self, engine):
+        self.statements = None
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.statements is not None:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        return self
+
+    def __exit__(self, *exc):
+        self.captured, self.statements = self.statements, None
+
+
+def login(client, email: str, password: str) -> dict:
+    token = client.post('/api/login', json={'email': email, 'password': password}).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=20, help='pedidos ativos e no histórico antes das medições')
+    parser.add_argument('--verbose', action='store_true', help='mostra os comandos SQL de cada rota')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        MASTER_USER['id'] = None
+        initialize_database()
+        counter = QueryCounter(db.engine)
+
+    client = app.test_client()
+    client.post('/api/register', json={'name': 'Cliente', 'email': 'queries@bench.local', 'phone': '0', 'address': 'x', 'password': 'bench'})
+    customer = login(client, 'queries@bench.local', 'bench')
+    master = login(client, MASTER_USER['email'], MASTER_PASSWORD)
+
+    order_ids = [client.post('/api/orders', json=ORDER_BODY, headers=customer).get_json()['order']['id'] for _ in range(args.orders * 2)]
+    for order_id in order_ids[:args.orders]:
+        client.put(f'/api/admin/orders/{order_id}', json={'status': 'entregue'}, headers=master)
+    with app.app_context():
+        while run_pending_jobs():
+            pass
+        rebuild_store_stats()
+    active_ids = order_ids[args.orders:]
+
+    requests = [
+        ('register', 'POST', '/api/register', {'name': 'Outro', 'email': 'outro@bench.local', 'phone': '0', 'address': 'x', 'password': 'bench'}, {}),
+        ('login', 'POST', '/api/login', {'email': 'queries@bench.local', 'password': 'bench'}, {}),
+        ('login-master', 'POST', '/api/login', {'email': MASTER_USER['email'], 'password': MASTER_PASSWORD}, {}),
+        ('verify-token', 'POST', '/api/verify-token', None, customer),
+        ('create-order', 'POST', '/api/orders', ORDER_BODY, customer),
+        ('create-order-idempotent', 'POST', '/api/orders', ORDER_BODY, {**customer, 'Idempotency-Key': 'bench-queries'}),
+        ('my-orders', 'GET', '/api/my-orders', None, customer),
+        ('my-history', 'GET', '/api/my-history', None, customer),
+        ('admin-orders', 'GET', '/api/admin/orders', None, master),
+        ('admin-orders-ndjson', 'GET', '/api/admin/orders?format=ndjson', None, master),
+        ('admin-orders-search', 'GET', '/api/admin/orders/search?pizza=Margherita', None, master),
+        ('admin-history', 'GET', '/api/admin/history', None, master),
+        ('admin-history-search', 'GET', '/api/admin/history/search?name=Cli', None, master),
+        ('admin-stats', 'GET', '/api/admin/stats', None, master),
+        ('admin-analytics', 'GET', '/api/admin/analytics', None, master),
+        ('update-status', 'PUT', f'/api/admin/orders/{active_ids[0]}', {'status': 'preparando'}, master),
+        ('update-status-batch', 'PUT', '/api/admin/orders/batch',
+         {'updates': [{'order_id': order_id, 'status': 'saiu-entrega'} for order_id in active_ids[1:]]}, master),
+        ('delete-order', 'DELETE', f'/api/admin/orders/{active_ids[0]}', None, master),
+    ]
+
+    def measure(name: str, method: str, url: str, body, headers: dict):
+        with counter:
+            response = client.open(url, method=method, json=body, headers=headers)
+            response.get_data() # Consome o corpo (o NDJSON só consulta o banco durante o streaming)
+        count, budget = len(counter.captured), QUERY_BUDGETS[name]
+        status = 'ok' if count <= budget else 'EXCEDEU'
+        print(f'{name:<26} {response.status_code:>4} {count:>4} consultas (limite {budget:>2})  {status}')
+        if response.status_code >= 400:
+            FAILURES.append(f'{name}: status {response.status_code}')
+        if count > budget:
+            FAILURES.append(f'{name}: {count} consultas, limite {budget}')
+        if args.verbose or count > budget:
+            for statement in counter.captured:
+                print('    ' + ' '.join(statement.split())[:160])
+
+    for request_args in requests:
+        measure(*request_args)
+
+    customer_id = client.post('/api/verify-token', headers=customer).get_json()['user']['id']
+    measure('delete-user', 'DELETE', f'/api/admin/users/{customer_id}', None, master)
+
+    missing = set(QUERY_BUDGETS) - {name for name, *_ in requests} - {'delete-user'}
+    if missing:
+        FAILURES.append(f'rotas sem medição: {sorted(missing)}')
+    if FAILURES:
+        print('\n'.join(['', 'FALHOU:'] + FAILURES))
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Teste de carga do stream de pedidos (/api/orders/stream) contra um servidor já em execução.
+
+Abre N conexões SSE simultâneas de um cliente de teste, muda o status de um pedido K vezes
+pelo admin e mede quanto tempo cada evento leva para chegar a todas as conexões. No fim,
+compara com a carga equivalente do polling atual (N clientes buscando /api/my-orders).
+
+Suba o servidor com workers que aguentem conexões longas (e sem o limite de taxa), por exemplo:
+    RATE_LIMIT_BACKEND=off GUNICORN_THREADS=200 gunicorn app:app
+    RATE_LIMIT_BACKEND=off GUNICORN_WORKER_CLASS=gevent gunicorn app:app
+
+Uso:
+    python benchmarks/bench_sse.py --url http://127.0.0.1:8000 --connections 100
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+MASTER_EMAIL = 'master@pizzaria.com'
+MASTER_PASSWORD = 'master123'
+STATUS_CYCLE = ['preparando', 'pendente'] # Ida e volta permitidas em ORDER_TRANSITIONS
+
+
+class Api:
+    def __init__(self, base_url: str):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+
+    def call(self, method: str, path: str, body: dict | None = None, token: str | None = None):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        raw = response.read()
+        conn.close()
+        return response.status, raw
+
+    def login(self, email: str, password: str) -> str:
+        status, raw = self.call('POST', '/api/login', {'email': email, 'password': password})
+        if status != 200:
+            raise SystemExit(f'Falha no login de {email}: {status} {raw[:200]!r}')
+        return json.loads(raw)['token']
+
+
+def stream_reader(api: Api, token: str, received: dict, ready: threading.Barrier, stop: threading.Event):
+    """Mantém uma conexão SSE aberta e registra o instante de chegada de cada evento por status."""
+    conn = http.client.HTTPConnection(api.host, api.port, timeout=60)
+    conn.request('GET', f'/api/orders/stream?token={token}')
+    response = conn.getresponse()
+    ready.wait()
+    event_name = None
+    while not stop.is_set():
+        line = response.fp.readline()
+        if not line:
+            break
+        line = line.decode('utf-8').rstrip('\n')
+        if line.startswith('event: '):
+            event_name = line[len('event: '):]
+        elif line.startswith('data: ') and event_name == 'order_status':
+            order = json.loads(line[len('data: '):])
+            with received['lock']:
+                received['arrivals'].setdefault(order['updatedAt'], []).append(time.perf_counter())
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--connections', type=int, default=100, help='conexões SSE simultâneas')
+    parser.add_argument('--updates', type=int, default=20, help='mudanças de status disparadas')
+    parser.add_argument('--poll-interval', type=float, default=5.0, help='intervalo do polling usado na comparação (s)')
+    args = parser.parse_args()
+
+    api = Api(args.url)
+    master_token = api.login(MASTER_EMAIL, MASTER_PASSWORD)
+
+    email = f'sse-{uuid.uuid4().hex[:8]}@bench.local'
+    api.call('POST', '/api/register', {'name': 'SSE Bench', 'email': email, 'phone': '0', 'address': 'x', 'password': 'bench'})
+    customer_token = api.login(email, 'bench')
+    status, raw = api.call('POST', '/api/orders', {'items': ['Margherita']}, customer_token)
+    order_id = json.loads(raw)['order']['id']
+
+    received = {'lock': threading.Lock(), 'arrivals': {}}
+    ready = threading.Barrier(args.connections + 1)
+    stop = threading.Event()
+    readers = [
+        threading.Thread(target=stream_reader, args=(api, customer_token, received, ready, stop), daemon=True)
+        for _ in range(args.connections)
+    ]
+    for reader in readers:
+        reader.start()
+    ready.wait()
+    time.sleep(0.5)
+
+    sent = {}
+    for i in range(args.updates):
+        start = time.perf_counter()
+        status, raw = api.call('PUT', f'/api/admin/orders/{order_id}', {'status': STATUS_CYCLE[i % len(STATUS_CYCLE)]}, master_token)
+        sent[json.loads(raw)['order']['updatedAt']] = start
+        time.sleep(0.2)
+    time.sleep(1)
+    stop.set()
+
+    latencies = []
+    delivered = 0
+    with received['lock']:
+        for updated_at, started in sent.items():
+            arrivals = received['arrivals'].get(updated_at, [])
+            delivered += len(arrivals)
+            latencies.extend((arrival - started) * 1000 for arrival in arrivals)
+    latencies.sort()
+
+    _, my_orders = api.call('GET', '/api/my-orders', token=customer_token)
+    polling_rps = args.connections / args.poll_interval
+
+    print(f'conexões SSE: {args.connections}  eventos entregues: {delivered}/{args.connections * args.updates}')
+    if latencies:
+        print(f'latência de entrega: p50 {statistics.median(latencies):.1f} ms  '
+              f'p99 {latencies[max(int(len(latencies) * 0.99) - 1, 0)]:.1f} ms')
+    print(f'polling equivalente ({args.poll_interval:.0f}s): {polling_rps:.1f} req/s, '
+          f'{polling_rps * len(my_orders) / 1024:.1f} KiB/s sempre, mesmo sem mudanças')
+    print(f'SSE: {args.updates} eventos enviados, ~{len(my_orders) / 1024:.2f} KiB por conexão por evento')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark de cold start: tempo de import do app e tempo até a primeira resposta da Gunicorn.
+
+Mede, em processos novos:
+  1. o tempo de 'import app' (média de N execuções);
+  2. o tempo desde o início da Gunicorn até a primeira resposta de /api/test, com e sem o
+     aquecimento do worker (DB_WARMUP=1/0), além da latência dessa primeira requisição.
+
+Uso:
+    python benchmarks/bench_startup.py
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATABASE_URL = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_startup.db')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env: dict) -> float:
+    code = 'import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)'
+    output = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1]) * 1000
+
+
+def measure_first_response(env: dict, warm_up: bool) -> tuple[float, float]:
+    port = free_port()
+    env = dict(env, DB_WARMUP='1' if warm_up else '0')
+    started_at = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'127.0.0.1:{port}', '--workers', '1'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                request_started_at = time.perf_counter()
+                conn.request('GET', '/api/test')
+                conn.getresponse().read()
+                finished_at = time.perf_counter()
+                return (finished_at - started_at) * 1000, (finished_at - request_started_at) * 1000
+            except (ConnectionRefusedError, http.client.RemoteDisconnected):
+                time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='repetições de cada medição')
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+    env['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', DEFAULT_DATABASE_URL) # Nunca o DATABASE_URL do ambiente
+    if env['DATABASE_URL'] == DEFAULT_DATABASE_URL:
+        subprocess.run(
+            [sys.executable, '-c', 'from app import app\nfrom pizzaria.extensions import db\nwith app.app_context(): db.create_all()'],
+            cwd=BASE_DIR, env=env, check=True, capture_output=True
+        )
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    print(f'import app: média {statistics.mean(imports):.0f} ms  (min {min(imports):.0f} ms)')
+
+    for warm_up in (False, True):
+        results = [measure_first_response(env, warm_up) for _ in range(args.runs)]
+        label = 'com aquecimento' if warm_up else 'sem aquecimento'
+        print(f'primeira resposta {label}: {statistics.mean(r[0] for r in results):.0f} ms desde o start, '
+              f'requisição em {statistics.mean(r[1] for r in results):.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Teste de carga comparando os tipos de worker da Gunicorn (sync, gthread, gevent).
+
+Para cada tipo de worker, sobe a Gunicorn com 'app:app' (mesma configuração de gunicorn.conf.py),
+dispara requisições concorrentes em POST /api/orders e GET /api/my-orders por alguns segundos e
+reporta req/s, p50, p99 e erros. O modo gevent só entra se o pacote gevent estiver instalado.
+
+Com SQLite os números servem apenas para conferir o script (o SQLite serializa as escritas e não
+cede o loop do gevent). Para uma comparação real, aponte para um PostgreSQL de teste:
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/bench_workers.py --concurrency 64
+
+Uso:
+    python benchmarks/bench_workers.py
+    python benchmarks/bench_workers.py --workers sync gthread --duration 20 --concurrency 32
+"""
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATABASE_URL = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'bench_workers.db')
+WORKER_CLASSES = ['sync', 'gthread', 'gevent']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def call(port: int, method: str, path: str, body: dict | None = None, token: str | None = None) -> tuple[int, bytes]:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def start_server(worker_class: str, env: dict, args) -> tuple[subprocess.Popen, int]:
+    port = free_port()
+    env = dict(env, GUNICORN_WORKER_CLASS=worker_class, GUNICORN_THREADS=str(args.threads),
+               WEB_CONCURRENCY=str(args.processes))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '--bind', f'127.0.0.1:{port}'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            call(port, 'GET', '/api/pizzas')
+            return server, port
+        except OSError:
+            time.sleep(0.05)
+    server.terminate()
+    raise SystemExit(f'A Gunicorn ({worker_class}) não respondeu em 30s')
+
+
+def create_customer(port: int) -> str:
+    email = f'workers-{uuid.uuid4().hex[:8]}@bench.local'
+    call(port, 'POST', '/api/register', {'name': 'Bench', 'email': email, 'phone': '0', 'address': 'x', 'password': 'bench'})
+    status, raw = call(port, 'POST', '/api/login', {'email': email, 'password': 'bench'})
+    if status != 200:
+        raise SystemExit(f'Falha no login do usuário de teste: {status} {raw[:200]!r}')
+    return json.loads(raw)['token']
+
+
+def load(port: int, method: str, path: str, body: dict | None, token: str, concurrency: int, duration: float) -> dict:
+    """Mantém 'concurrency' clientes fazendo requisições em sequência durante 'duration' segundos."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        local_latencies, local_errors = [], 0
+        while time.perf_counter() < stop_at:
+            started_at = time.perf_counter()
+            try:
+                status, _ = call(port, method, path, body, token)
+            except OSError:
+                status = None
+            if status is not None and status < 400:
+                local_latencies.append((time.perf_counter() - started_at) * 1000)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    started_at = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2], 1) if latencies else None,
+        'p99_ms': round(latencies[max(int(len(latencies) * 0.99) - 1, 0)], 1) if latencies else None,
+        'errors': errors[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', nargs='+', choices=WORKER_CLASSES, default=WORKER_CLASSES, help='tipos de worker a comparar')
+    parser.add_argument('--processes', type=int, default=2, help='processos da Gunicorn (WEB_CONCURRENCY)')
+    parser.add_argument('--threads', type=int, default=32, help='threads por worker no modo gthread')
+    parser.add_argument('--concurrency', type=int, default=32, help='clientes simultâneos')
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos de carga por endpoint')
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL='WARNING', DB_WARMUP='1', RATE_LIMIT_BACKEND='off')
+    env['DATABASE_URL'] = os.getenv('BENCH_DATABASE_URL', DEFAULT_DATABASE_URL) # Nunca o DATABASE_URL do ambiente
+    env.setdefault('PASSWORD_HASH_ROUNDS', '4') # O login não é o alvo deste teste
+    if env['DATABASE_URL'] == DEFAULT_DATABASE_URL:
+        subprocess.run(
+            [sys.executable, '-c', 'from app import app\nfrom pizzaria.extensions import db\n'
+                                   'with app.app_context(): db.create_all()'],
+            cwd=BASE_DIR, env=env, check=True, capture_output=True
+        )
+
+    print(f"{'worker':8s} {'endpoint':18s} {'req/s':>9s} {'p50 ms':>8s} {'p99 ms':>8s} {'erros':>6s}")
+    for worker_class in args.workers:
+        if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+            print(f'{worker_class:8s} (pulado: pacote gevent não instalado)')
+            continue
+        server, port = start_server(worker_class, env, args)
+        try:
+            token = create_customer(port)
+            workloads = [
+                ('POST /api/orders', 'POST', '/api/orders', {'items': ['Margherita', 'Calabresa']}),
+                ('GET /api/my-orders', 'GET', '/api/my-orders', None),
+            ]
+            for label, method, path, body in workloads:
+                result = load(port, method, path, body, token, args.concurrency, args.duration)
+                print(f"{worker_class:8s} {label:18s} {result['rps']:9.1f} {result['p50_ms']!s:>8s} "
+                      f"{result['p99_ms']!s:>8s} {result['errors']:6d}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# Configuração da Gunicorn (carregada automaticamente quando 'gunicorn' roda na raiz do projeto).
+#
+# Modos de worker (GUNICORN_WORKER_CLASS):
+#   gthread (padrão) - cada worker atende GUNICORN_THREADS requisições ao mesmo tempo em threads.
+#                      Uma consulta lenta prende só a sua thread, não o worker inteiro.
+#   gevent           - cada worker atende até GUNICORN_WORKER_CONNECTIONS requisições em greenlets
+#                      (requer 'pip install gevent'; com psycopg2, também 'psycogreen'). Indicado para
+#                      muitas conexões longas (stream SSE) ou muita espera de I/O.
+#   sync             - um processo por requisição, como antes. Só para comparação/diagnóstico.
+# O número de processos vem de WEB_CONCURRENCY (lido pela própria Gunicorn, padrão 1).
+# Lembre que cada worker tem o próprio pool de conexões (DB_POOL_SIZE + DB_MAX_OVERFLOW): com
+# gthread/gevent as requisições simultâneas de um worker disputam esse pool.
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+
+def post_worker_init(worker):
+    """Prepara o worker (modo gevent, conexões do pool e catálogo) antes de ele aceitar requisições."""
+    if worker_class == 'gevent':
+        configure_gevent(worker)
+
+    if os.getenv('DB_WARMUP', '1') == '0':
+        return
+    from pizzaria.warmup import warm_up
+    try:
+        warm_up(worker.wsgi)
+    except Exception as e:
+        # Sem banco no boot o worker sobe mesmo assim; a primeira requisição tenta de novo
+        worker.log.error("Falha no aquecimento do worker: %s", e)
+
+
+def configure_gevent(worker):
+    """
+    Ajustes do modo gevent (a Gunicorn já aplicou o monkey patch antes de carregar o app):
+    o psycopg2 passa a ceder o loop durante as consultas e o bcrypt roda em threads nativas.
+    """
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        worker.log.warning("psycogreen não instalado: consultas via psycopg2 vão bloquear o worker gevent.")
+
+    from gevent.threadpool import ThreadPoolExecutor
+    from pizzaria import passwords
+    passwords.PASSWORD_HASHER.use_executor(ThreadPoolExecutor(max_workers=passwords.PASSWORD_HASH_WORKERS))
@@ -0,0 +1,31 @@
+"""Add order_history_keys to keep one history row per order
+
+Revision ID: 0a5d7e3c9b42
+Revises: f3b8d1e6a925
+Create Date: 2026-10-17 00:41:12.508317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a5d7e3c9b42'
+down_revision = 'f3b8d1e6a925'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # No PostgreSQL particionado a unicidade de order_history é (original_order_id, completed_at);
+    # a chave primária desta tabela garante um registro por pedido. Os meses já arquivados não têm
+    # mais linhas para copiar: os ids deles continuam abaixo da sequência de orders.
+    op.create_table('order_history_keys',
+    sa.Column('original_order_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('original_order_id')
+    )
+    op.execute("INSERT INTO order_history_keys (original_order_id) SELECT DISTINCT original_order_id FROM order_history")
+
+
+def downgrade():
+    op.drop_table('order_history_keys')
@@ -0,0 +1,30 @@
+"""Add indexes for the hot query paths
+
+Revision ID: 3c1f9a7d2b45
+Revises: 8afb8486946b
+Create Date: 2026-10-16 10:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f9a7d2b45'
+down_revision = '8afb8486946b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_orders_status', 'orders', ['status'], unique=False)
+    op.create_index('ix_order_history_user_id_completed_at', 'order_history', ['user_id', sa.text('completed_at DESC')], unique=False)
+    op.create_index('ix_order_history_completed_at', 'order_history', ['completed_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_order_history_completed_at', table_name='order_history')
+    op.drop_index('ix_order_history_user_id_completed_at', table_name='order_history')
+    op.drop_index('ix_orders_status', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
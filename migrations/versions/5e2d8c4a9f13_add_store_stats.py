@@ -0,0 +1,51 @@
+"""Add store_stats rollup table
+
+Revision ID: 5e2d8c4a9f13
+Revises: 3c1f9a7d2b45
+Create Date: 2026-10-16 11:03:27.504816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2d8c4a9f13'
+down_revision = '3c1f9a7d2b45'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('store_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('users', sa.Integer(), nullable=False),
+    sa.Column('active_orders', sa.Integer(), nullable=False),
+    sa.Column('completed_orders', sa.Integer(), nullable=False),
+    sa.Column('pending_orders', sa.Integer(), nullable=False),
+    sa.Column('preparing_orders', sa.Integer(), nullable=False),
+    sa.Column('out_for_delivery_orders', sa.Integer(), nullable=False),
+    sa.Column('total_revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('pending_revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Popula o consolidado com os dados já existentes (equivalente a 'flask rebuild-stats')
+    op.execute("""
+        INSERT INTO store_stats (id, users, active_orders, completed_orders, pending_orders, preparing_orders,
+                                 out_for_delivery_orders, total_revenue, pending_revenue, updated_at)
+        SELECT 1,
+               (SELECT count(*) FROM users),
+               (SELECT count(*) FROM orders),
+               (SELECT count(*) FROM order_history),
+               (SELECT count(*) FROM orders WHERE status = 'pendente'),
+               (SELECT count(*) FROM orders WHERE status = 'preparando'),
+               (SELECT count(*) FROM orders WHERE status = 'saiu-entrega'),
+               (SELECT coalesce(sum(total), 0) FROM order_history),
+               (SELECT coalesce(sum(total), 0) FROM orders),
+               CURRENT_TIMESTAMP
+    """)
+
+
+def downgrade():
+    op.drop_table('store_stats')
@@ -0,0 +1,135 @@
+"""Partition order_history by month and add order_history_monthly
+
+Revision ID: 7b3e1d9c5a20
+Revises: 5e2d8c4a9f13
+Create Date: 2026-10-16 14:20:41.118203
+
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e1d9c5a20'
+down_revision = '5e2d8c4a9f13'
+branch_labels = None
+depends_on = None
+
+# Partições criadas além do mês atual (as seguintes vêm de 'flask history-partitions')
+PARTITIONS_AHEAD = 3
+
+HISTORY_COLUMNS = (
+    'id, original_order_id, user_id, customer_name, customer_phone, customer_address, '
+    'items, total, status, created_at, completed_at'
+)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_history_indexes():
+    op.create_index('ix_order_history_user_id_completed_at', 'order_history', ['user_id', sa.text('completed_at DESC')], unique=False)
+    op.create_index('ix_order_history_completed_at', 'order_history', ['completed_at'], unique=False)
+
+
+def upgrade():
+    op.create_table('order_history_monthly',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('archive_path', sa.String(length=500), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('month')
+    )
+    # completed_at passa a ser obrigatório (é a chave de partição)
+    op.execute("UPDATE order_history SET completed_at = coalesce(created_at, CURRENT_TIMESTAMP) WHERE completed_at IS NULL")
+
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite/dev: tabela única; o índice em completed_at já atende o arquivamento por mês
+        with op.batch_alter_table('order_history') as batch_op:
+            batch_op.alter_column('completed_at', existing_type=sa.DateTime(), nullable=False)
+        # O batch do SQLite recria a tabela e perde o DESC do índice composto
+        op.drop_index('ix_order_history_user_id_completed_at', table_name='order_history')
+        op.create_index('ix_order_history_user_id_completed_at', 'order_history', ['user_id', sa.text('completed_at DESC')], unique=False)
+        return
+
+    # PostgreSQL: recria order_history como tabela particionada por mês (RANGE em completed_at).
+    # Chave primária e unicidade precisam incluir a chave de partição.
+    op.execute("ALTER TABLE order_history RENAME TO order_history_old")
+    # Libera os nomes das constraints para a tabela nova
+    op.execute("ALTER TABLE order_history_old RENAME CONSTRAINT order_history_pkey TO order_history_old_pkey")
+    op.execute("ALTER TABLE order_history_old RENAME CONSTRAINT order_history_original_order_id_key TO order_history_old_original_order_id_key")
+    op.execute("ALTER SEQUENCE order_history_id_seq OWNED BY NONE")
+    op.drop_index('ix_order_history_completed_at', table_name='order_history_old')
+    op.drop_index('ix_order_history_user_id_completed_at', table_name='order_history_old')
+    op.execute("""
+        CREATE TABLE order_history (
+            id INTEGER NOT NULL DEFAULT nextval('order_history_id_seq'),
+            original_order_id INTEGER NOT NULL,
+            user_id INTEGER REFERENCES users (id) ON DELETE SET NULL,
+            customer_name VARCHAR(255) NOT NULL,
+            customer_phone VARCHAR(50),
+            customer_address TEXT,
+            items JSON,
+            total NUMERIC(10, 2) NOT NULL,
+            status VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            completed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, completed_at),
+            UNIQUE (original_order_id, completed_at)
+        ) PARTITION BY RANGE (completed_at)
+    """)
+    op.execute("CREATE TABLE order_history_default PARTITION OF order_history DEFAULT")
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(completed_at) FROM order_history_old")).scalar()
+    current = date(datetime.now(timezone.utc).year, datetime.now(timezone.utc).month, 1)
+    month = date(oldest.year, oldest.month, 1) if oldest else current
+    while month <= add_months(current, PARTITIONS_AHEAD):
+        op.execute(
+            f"CREATE TABLE order_history_y{month.year:04d}m{month.month:02d} PARTITION OF order_history "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+
+    op.execute(f"INSERT INTO order_history ({HISTORY_COLUMNS}) SELECT {HISTORY_COLUMNS} FROM order_history_old")
+    op.execute("DROP TABLE order_history_old")
+    op.execute("ALTER SEQUENCE order_history_id_seq OWNED BY order_history.id")
+    create_history_indexes()
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TABLE order_history RENAME TO order_history_partitioned")
+        op.execute("ALTER TABLE order_history_partitioned RENAME CONSTRAINT order_history_pkey TO order_history_partitioned_pkey")
+        op.execute("ALTER TABLE order_history_partitioned RENAME CONSTRAINT order_history_original_order_id_completed_at_key "
+                   "TO order_history_partitioned_original_order_id_completed_at_key")
+        op.execute("ALTER SEQUENCE order_history_id_seq OWNED BY NONE")
+        op.create_table('order_history',
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('order_history_id_seq')"), nullable=False),
+        sa.Column('original_order_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('customer_name', sa.String(length=255), nullable=False),
+        sa.Column('customer_phone', sa.String(length=50), nullable=True),
+        sa.Column('customer_address', sa.Text(), nullable=True),
+        sa.Column('items', sa.JSON(), nullable=True),
+        sa.Column('total', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('original_order_id')
+        )
+        op.execute(f"INSERT INTO order_history ({HISTORY_COLUMNS}) SELECT {HISTORY_COLUMNS} FROM order_history_partitioned")
+        op.execute("DROP TABLE order_history_partitioned")
+        op.execute("ALTER SEQUENCE order_history_id_seq OWNED BY order_history.id")
+        create_history_indexes()
+    else:
+        with op.batch_alter_table('order_history') as batch_op:
+            batch_op.alter_column('completed_at', existing_type=sa.DateTime(), nullable=True)
+
+    op.drop_table('order_history_monthly')
@@ -0,0 +1,49 @@
+"""Add indexes for the admin order/history search
+
+Revision ID: a6c3e8b1d507
+Revises: 9d4a2f6e1c38
+Create Date: 2026-10-16 22:41:08.775310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c3e8b1d507'
+down_revision = '9d4a2f6e1c38'
+branch_labels = None
+depends_on = None
+
+SEARCH_TABLES = ('orders', 'order_history')
+
+
+def upgrade():
+    # ix_orders_status vira (status, created_at DESC): atende o agrupamento por status e a busca por status + período
+    op.drop_index('ix_orders_status', table_name='orders')
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', sa.text('created_at DESC')], unique=False)
+    op.create_index('ix_orders_created_at', 'orders', [sa.text('created_at DESC')], unique=False)
+
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite/dev: a busca por prefixo e por sabor roda sem índice próprio
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in SEARCH_TABLES:
+        op.create_index(f'ix_{table}_customer_name_trgm', table, ['customer_name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'customer_name': 'gin_trgm_ops'})
+        op.create_index(f'ix_{table}_customer_phone_pattern', table, ['customer_phone'], unique=False,
+                        postgresql_ops={'customer_phone': 'text_pattern_ops'})
+        op.execute(f'CREATE INDEX ix_{table}_items_gin ON {table} USING gin ((items::jsonb) jsonb_path_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in SEARCH_TABLES:
+            op.drop_index(f'ix_{table}_items_gin', table_name=table)
+            op.drop_index(f'ix_{table}_customer_phone_pattern', table_name=table)
+            op.drop_index(f'ix_{table}_customer_name_trgm', table_name=table)
+
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.create_index('ix_orders_status', 'orders', ['status'], unique=False)
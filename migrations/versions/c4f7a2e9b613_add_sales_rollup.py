@@ -0,0 +1,76 @@
+"""Add sales_rollup table for the admin sales analytics
+
+Revision ID: c4f7a2e9b613
+Revises: a6c3e8b1d507
+Create Date: 2026-10-16 23:12:40.518902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f7a2e9b613'
+down_revision = 'a6c3e8b1d507'
+branch_labels = None
+depends_on = None
+
+# SQL de 'flask rebuild-analytics' nesta revisão (itens ainda na coluna JSON items), por dialeto
+REBUILD_SQL = (
+    "INSERT INTO sales_rollup (dimension, hour, key, quantity, revenue, delivery_seconds) "
+    "SELECT 'orders', {hour}, '', count(*), coalesce(sum(h.total), 0), 0 "
+    "FROM order_history h GROUP BY 2",
+    "INSERT INTO sales_rollup (dimension, hour, key, quantity, revenue, delivery_seconds) "
+    "SELECT 'delivery', hour, bucket, count(*), 0, sum(seconds) FROM ("
+    " SELECT {hour} AS hour, {bucket} AS bucket, {seconds} AS seconds"
+    " FROM order_history h WHERE h.created_at IS NOT NULL"
+    ") d GROUP BY hour, bucket",
+    "INSERT INTO sales_rollup (dimension, hour, key, quantity, revenue, delivery_seconds) "
+    "SELECT 'pizza', {hour}, {item_name}, count(*), coalesce(sum({item_price}), 0), 0 "
+    "FROM order_history h {items} WHERE {item_filter} GROUP BY 2, 3",
+)
+POSTGRESQL_SECONDS = 'greatest(extract(epoch FROM h.completed_at - h.created_at), 0)'
+SQLITE_SECONDS = 'max((julianday(h.completed_at) - julianday(h.created_at)) * 86400.0, 0)'
+REBUILD_PARTS = {
+    'postgresql': {
+        'hour': "date_trunc('hour', h.completed_at)",
+        'seconds': POSTGRESQL_SECONDS,
+        'bucket': f'least(floor({POSTGRESQL_SECONDS} / 60 / 5)::int * 5, 240)::text',
+        'items': ("CROSS JOIN LATERAL jsonb_array_elements(CASE WHEN jsonb_typeof(h.items::jsonb) = 'array' "
+                  "THEN h.items::jsonb ELSE '[]'::jsonb END) AS item(value)"),
+        'item_name': "left(item.value->>'name', 100)",
+        'item_price': "CASE WHEN jsonb_typeof(item.value->'price') = 'number' THEN (item.value->>'price')::numeric END",
+        'item_filter': "jsonb_typeof(item.value) = 'object' AND coalesce(item.value->>'name', '') <> ''",
+    },
+    'sqlite': {
+        'hour': "strftime('%Y-%m-%d %H:00:00.000000', h.completed_at)",
+        'seconds': SQLITE_SECONDS,
+        'bucket': f'CAST(min(CAST({SQLITE_SECONDS} / 60 / 5 AS INTEGER) * 5, 240) AS TEXT)',
+        'items': ", json_each(CASE WHEN json_type(h.items) = 'array' THEN h.items ELSE '[]' END) AS item",
+        'item_name': "substr(json_extract(item.value, '$.name'), 1, 100)",
+        'item_price': "CASE WHEN json_type(item.value, '$.price') IN ('integer', 'real') THEN json_extract(item.value, '$.price') END",
+        'item_filter': "item.type = 'object' AND coalesce(json_extract(item.value, '$.name'), '') <> ''",
+    },
+}
+
+
+def upgrade():
+    op.create_table('sales_rollup',
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('hour', sa.DateTime(), nullable=False),
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('delivery_seconds', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'hour', 'key'),
+    sqlite_with_rowid=False
+    )
+
+    # Consolida o histórico já existente (mesmas somas de 'flask rebuild-analytics')
+    parts = REBUILD_PARTS[op.get_bind().dialect.name]
+    for sql in REBUILD_SQL:
+        op.execute(sql.format(**parts))
+
+
+def downgrade():
+    op.drop_table('sales_rollup')
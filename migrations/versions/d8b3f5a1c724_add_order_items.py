@@ -0,0 +1,112 @@
+"""Move order items from the JSON items column to the order_items table
+
+Revision ID: d8b3f5a1c724
+Revises: c4f7a2e9b613
+Create Date: 2026-10-16 23:48:05.260417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b3f5a1c724'
+down_revision = 'c4f7a2e9b613'
+branch_labels = None
+depends_on = None
+
+# Catálogo padrão nesta revisão (PIZZA_NAMES de pizzaria/catalog.py), congelado: o resultado da
+# migração não depende do catálogo carregado no ambiente (PIZZA_CATALOG_FILE) nem do código atual.
+PIZZA_IDS_BY_NAME = {
+    'Margherita': 'margherita',
+    'Pepperoni': 'pepperoni',
+    'Calabresa': 'calabresa',
+    'Quatro Queijos': 'quatro-queijos',
+    'Especial Del Gatito': 'Especial-Del-Gatito',
+    'Hawaiana': 'Hawaiana',
+}
+
+# (tabela, coluna com o id do pedido que os itens guardam)
+ITEM_TABLES = (('orders', 'id'), ('order_history', 'original_order_id'))
+
+# Uma linha por pedido + sabor + preço, com a quantidade, na ordem em que o sabor aparece no JSON
+BACKFILL_SQL = {
+    'postgresql': (
+        "INSERT INTO order_items (order_id, name, unit_price, quantity) "
+        "SELECT t.{id_column}, left(item.value->>'name', 100), "
+        "CASE WHEN jsonb_typeof(item.value->'price') = 'number' THEN (item.value->>'price')::numeric END, count(*) "
+        "FROM {table} t CROSS JOIN LATERAL jsonb_array_elements(CASE WHEN jsonb_typeof(t.items::jsonb) = 'array' "
+        "THEN t.items::jsonb ELSE '[]'::jsonb END) WITH ORDINALITY AS item(value, position) "
+        "WHERE jsonb_typeof(item.value) = 'object' AND coalesce(item.value->>'name', '') <> '' "
+        "GROUP BY 1, 2, 3 ORDER BY 1, min(item.position)"
+    ),
+    'sqlite': (
+        "INSERT INTO order_items (order_id, name, unit_price, quantity) "
+        "SELECT t.{id_column}, substr(json_extract(item.value, '$.name'), 1, 100), "
+        "CASE WHEN json_type(item.value, '$.price') IN ('integer', 'real') THEN json_extract(item.value, '$.price') END, count(*) "
+        "FROM {table} t, json_each(CASE WHEN json_type(t.items) = 'array' THEN t.items ELSE '[]' END) AS item "
+        "WHERE item.type = 'object' AND coalesce(json_extract(item.value, '$.name'), '') <> '' "
+        "GROUP BY 1, 2, 3 ORDER BY 1, min(item.key)"
+    ),
+}
+
+# Volta dos itens para o JSON (uma entrada {'name', 'price'} por unidade)
+RESTORE_SQL = {
+    'postgresql': (
+        "UPDATE {table} t SET items = restored.items FROM ("
+        " SELECT i.order_id, json_agg(json_build_object('name', i.name, 'price', i.unit_price) ORDER BY i.id, n) AS items"
+        " FROM order_items i CROSS JOIN LATERAL generate_series(1, i.quantity) AS n GROUP BY i.order_id"
+        ") restored WHERE restored.order_id = t.{id_column}"
+    ),
+    'sqlite': (
+        "UPDATE {table} SET items = ("
+        " WITH RECURSIVE units(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM units WHERE n < 1000)"
+        " SELECT json_group_array(json_object('name', name, 'price', unit_price)) FROM ("
+        "  SELECT i.name, i.unit_price FROM order_items i JOIN units ON units.n <= i.quantity"
+        "  WHERE i.order_id = {table}.{id_column} ORDER BY i.id, units.n))"
+    ),
+}
+
+
+def upgrade():
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('pizza_id', sa.String(length=50), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('unit_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_order_items_name_order_id', 'order_items', ['name', 'order_id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    for table, id_column in ITEM_TABLES:
+        op.execute(BACKFILL_SQL[dialect].format(table=table, id_column=id_column))
+
+    # Id do catálogo pelo nome (sabores que saíram do cardápio ficam sem pizza_id)
+    update_pizza_id = sa.text("UPDATE order_items SET pizza_id = :pizza_id WHERE name = :name AND pizza_id IS NULL")
+    for name, pizza_id in PIZZA_IDS_BY_NAME.items():
+        op.get_bind().execute(update_pizza_id, {'pizza_id': pizza_id, 'name': name})
+
+    if dialect == 'postgresql':
+        for table, _ in ITEM_TABLES:
+            op.execute(f'DROP INDEX IF EXISTS ix_{table}_items_gin')
+    for table, _ in ITEM_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('items')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table, id_column in ITEM_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('items', sa.JSON(), nullable=True))
+        op.execute(RESTORE_SQL[dialect].format(table=table, id_column=id_column))
+        if dialect == 'postgresql':
+            op.execute(f'CREATE INDEX ix_{table}_items_gin ON {table} USING gin ((items::jsonb) jsonb_path_ops)')
+
+    op.drop_index('ix_order_items_name_order_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_table('order_items')
@@ -0,0 +1,27 @@
+"""Add orders.version for conditional status updates
+
+Revision ID: e2a7c9d4b816
+Revises: d8b3f5a1c724
+Create Date: 2026-10-16 23:58:41.731092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c9d4b816'
+down_revision = 'd8b3f5a1c724'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # server_default preenche os pedidos existentes com a versão 1
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,54 @@
+"""Stop SQLite from reusing orders.id (AUTOINCREMENT)
+
+Revision ID: f3b8d1e6a925
+Revises: e2a7c9d4b816
+Create Date: 2026-10-17 10:12:37.508214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1e6a925'
+down_revision = 'e2a7c9d4b816'
+branch_labels = None
+depends_on = None
+
+# Maior id já usado, ativo ou no histórico: a próxima linha de orders começa depois dele
+HIGHEST_ORDER_ID = (
+    "max((SELECT coalesce(max(id), 0) FROM orders), (SELECT coalesce(max(original_order_id), 0) FROM order_history))"
+)
+
+# A recriação da tabela copia os índices por reflexão, que perde o DESC: estes são refeitos como em 3c1f9a7d2b45/a6c3e8b1d507
+DESC_INDEXES = (
+    ('ix_orders_user_id_created_at', ['user_id', sa.text('created_at DESC')]),
+    ('ix_orders_status_created_at', ['status', sa.text('created_at DESC')]),
+    ('ix_orders_created_at', [sa.text('created_at DESC')]),
+)
+
+
+def recreate_orders(autoincrement: bool):
+    with op.batch_alter_table('orders', recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    for name, columns in DESC_INDEXES:
+        op.drop_index(name, table_name='orders')
+        op.create_index(name, 'orders', columns, unique=False)
+
+
+def upgrade():
+    # No PostgreSQL a sequência de orders.id nunca volta atrás; só o SQLite precisa recriar a tabela
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    recreate_orders(autoincrement=True)
+    op.execute(f"UPDATE sqlite_sequence SET seq = max(seq, {HIGHEST_ORDER_ID}) WHERE name = 'orders'")
+    op.execute(
+        f"INSERT INTO sqlite_sequence (name, seq) SELECT 'orders', {HIGHEST_ORDER_ID} "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'orders')"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    recreate_orders(autoincrement=False)
@@ -0,0 +1,68 @@
+import os
+
+from flask import Flask
+
+from .config import BASE_DIR, load_config
+from .logs import configure_logging
+
+
+def create_app(config: dict | None = None) -> Flask:
+    """
+    Fábrica do aplicativo: cria o Flask, liga as extensões, blueprints, métricas, eventos e comandos.
+    Cada chamada devolve um app independente (o broker de eventos e a configuração são por app);
+    'gunicorn app:app' e 'flask --app app' usam a instância criada em app.py.
+    """
+    configure_logging()
+
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(BASE_DIR, 'templates'),
+        static_folder=os.path.join(BASE_DIR, 'static')
+    )
+    app.config.update(load_config(config))
+
+    from .serialization import FastJSONProvider
+    app.json = FastJSONProvider(app) # jsonify/get_json com orjson quando instalado
+
+    # Proxies confiáveis na frente do app (o Render coloca um): request.remote_addr passa a ser o IP
+    # do cliente em X-Forwarded-For, usado no limite de taxa. Use 0 se o app for exposto direto.
+    trusted_proxies = int(os.getenv('TRUSTED_PROXIES', '1'))
+    if trusted_proxies:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies)
+
+    from .extensions import cors, db, migrate
+    db.init_app(app)
+    migrate.init_app(app, db)
+    # Configurações de CORS para permitir requisições de diferentes origens
+    # Permite todas as origens para '/api/*', o que é útil em desenvolvimento.
+    cors.init_app(app, resources={r"/api/*": {"origins": "*"}})
+
+    from .blueprints import BLUEPRINTS
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
+
+    from .events import init_order_events
+    from .metrics import init_metrics
+    from .idempotency import init_idempotency
+    from .ratelimit import init_rate_limiting
+    from .response_cache import init_response_cache
+    init_order_events(app)
+    init_response_cache(app)
+    init_metrics(app) # Antes do controle de admissão: as recusas com 503 também entram nas métricas
+    init_rate_limiting(app)
+    init_idempotency(app)
+
+    from .analytics import rebuild_analytics_command
+    from .history import archive_history_command, history_partitions_command
+    from .jobs import retry_dead_jobs_command, run_jobs_command
+    from .legacy import export_legacy_command, import_legacy_command
+    from .stats import check_stats_command, rebuild_stats_command
+    from .warmup import warm_up_command
+    for command in (rebuild_stats_command, check_stats_command, warm_up_command,
+                    history_partitions_command, archive_history_command,
+                    import_legacy_command, export_legacy_command,
+                    run_jobs_command, retry_dead_jobs_command, rebuild_analytics_command):
+        app.cli.add_command(command)
+
+    return app
@@ -0,0 +1,288 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .extensions import db
+from .models import OrderHistory, SalesRollup
+from .response_cache import invalidate_response_cache
+from .search import parse_timestamp_filter
+
+# --- Análise de Vendas (/api/admin/analytics) ---
+# As vendas do histórico ficam pré-agregadas por hora de conclusão em sales_rollup: o worker
+# (tarefa 'move_to_history' em pizzaria/jobs.py) soma cada lote de pedidos entregues na mesma
+# transação em que grava o histórico. Assim o relatório lê algumas linhas por hora do intervalo
+# pedido, em vez de varrer order_history e juntar os itens de cada pedido.
+#
+# 'flask rebuild-analytics' recalcula o consolidado a partir de order_history com INSERT ... SELECT
+# (após a migração, depois de 'flask import-legacy' ou se houver divergência). Meses já arquivados
+# ('flask archive-history') não estão mais em order_history: as horas anteriores ao pedido mais
+# antigo do histórico são preservadas.
+ANALYTICS_DEFAULT_DAYS = int(os.getenv('ANALYTICS_DEFAULT_DAYS', '30')) # Intervalo quando 'from' não é informado
+ANALYTICS_MAX_DAYS = int(os.getenv('ANALYTICS_MAX_DAYS', '366'))
+ANALYTICS_UTC_OFFSET = int(os.getenv('ANALYTICS_UTC_OFFSET', '0')) # Fuso (em horas) dos agrupamentos por dia/hora; ex.: -3
+DELIVERY_BUCKET_MINUTES = 5
+DELIVERY_MAX_MINUTES = 240 # Última faixa: 240 minutos ou mais
+
+def to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def hour_start(value: datetime) -> datetime:
+    """Início da hora em UTC, sem fuso (como as colunas guardam)."""
+    return to_naive_utc(value).replace(minute=0, second=0, microsecond=0)
+
+def delivery_bucket(seconds: float) -> int:
+    """Início da faixa de DELIVERY_BUCKET_MINUTES minutos do tempo de entrega (0, 5, 10, ..., DELIVERY_MAX_MINUTES)."""
+    minutes = int(max(seconds, 0) // 60)
+    return min(minutes // DELIVERY_BUCKET_MINUTES * DELIVERY_BUCKET_MINUTES, DELIVERY_MAX_MINUTES)
+
+# --- Atualização do consolidado ---
+
+def sales_deltas(history_rows: list[dict]) -> dict:
+    """
+    Agrega linhas do histórico ('items' com os OrderItem do pedido) em
+    {(dimensão, hora, chave): [quantidade, receita, segundos de entrega]}.
+    """
+    deltas = defaultdict(lambda: [0, Decimal('0'), 0.0])
+    for row in history_rows:
+        completed_at = to_naive_utc(row['completed_at'])
+        hour = hour_start(completed_at)
+
+        orders = deltas[('orders', hour, '')]
+        orders[0] += 1
+        orders[1] += Decimal(str(row['total']))
+
+        if row.get('created_at') is not None:
+            seconds = max((completed_at - to_naive_utc(row['created_at'])).total_seconds(), 0.0)
+            delivery = deltas[('delivery', hour, str(delivery_bucket(seconds)))]
+            delivery[0] += 1
+            delivery[2] += seconds
+
+        for item in row.get('items') or []:
+            pizza = deltas[('pizza', hour, item.name)]
+            pizza[0] += item.quantity
+            if item.unit_price is not None:
+                pizza[1] += item.unit_price * item.quantity
+    return deltas
+
+def record_sales(history_rows: list[dict]):
+    """
+    Soma as linhas recém-gravadas no histórico ao consolidado com um upsert (coluna = coluna + delta),
+    na transação corrente. Quem chama faz o commit, junto com a escrita no histórico.
+    """
+    deltas = sales_deltas(history_rows)
+    if not deltas:
+        return
+    # Ordem fixa das chaves: dois workers somando as mesmas horas travam as linhas na mesma sequência
+    values = [{
+        'dimension': dimension, 'hour': hour, 'key': key,
+        'quantity': quantity, 'revenue': revenue, 'delivery_seconds': seconds
+    } for (dimension, hour, key), (quantity, revenue, seconds) in sorted(deltas.items())]
+
+    insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    stmt = insert(SalesRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SalesRollup.dimension, SalesRollup.hour, SalesRollup.key],
+        set_={
+            'quantity': SalesRollup.quantity + stmt.excluded.quantity,
+            'revenue': SalesRollup.revenue + stmt.excluded.revenue,
+            'delivery_seconds': SalesRollup.delivery_seconds + stmt.excluded.delivery_seconds
+        }
+    )
+    db.session.execute(stmt, values)
+
+# Agregação completa de order_history (e dos itens em order_items), por dialeto. {hour} e
+# {delivery_seconds} são as expressões de truncamento da hora e do tempo de entrega.
+REBUILD_SQL = {
+    'orders': (
+        "INSERT INTO sales_rollup (dimension, hour, key, quantity, revenue, delivery_seconds) "
+        "SELECT 'orders', {hour}, '', count(*), coalesce(sum(h.total), 0), 0 "
+        "FROM order_history h WHERE h.completed_at >= :since GROUP BY 2"
+    ),
+    'delivery': (
+        "INSERT INTO sales_rollup (dimension, hour, key, quantity, revenue, delivery_seconds) "
+        "SELECT 'delivery', hour, bucket, count(*), 0, sum(seconds) FROM ("
+        " SELECT {hour} AS hour, {bucket} AS bucket, {delivery_seconds} AS seconds"
+        " FROM order_history h WHERE h.completed_at >= :since AND h.created_at IS NOT NULL"
+        ") d GROUP BY hour, bucket"
+    ),
+    'pizza': (
+        "INSERT INTO sales_rollup (dimension, hour, key, quantity, revenue, delivery_seconds) "
+        "SELECT 'pizza', {hour}, i.name, sum(i.quantity), coalesce(sum(i.unit_price * i.quantity), 0), 0 "
+        "FROM order_history h JOIN order_items i ON i.order_id = h.original_order_id "
+        "WHERE h.completed_at >= :since GROUP BY 2, 3"
+    ),
+}
+
+def rebuild_sql_parts(dialect: str) -> dict:
+    """Expressões de REBUILD_SQL para o dialeto (PostgreSQL ou SQLite)."""
+    if dialect == 'postgresql':
+        seconds = 'greatest(extract(epoch FROM h.completed_at - h.created_at), 0)'
+        return {
+            'hour': "date_trunc('hour', h.completed_at)",
+            'delivery_seconds': seconds,
+            'bucket': f'least(floor({seconds} / 60 / {DELIVERY_BUCKET_MINUTES})::int * {DELIVERY_BUCKET_MINUTES}, {DELIVERY_MAX_MINUTES})::text',
+        }
+    # SQLite: datas gravadas como texto 'AAAA-MM-DD HH:MM:SS.ffffff'
+    seconds = 'max((julianday(h.completed_at) - julianday(h.created_at)) * 86400.0, 0)'
+    return {
+        'hour': "strftime('%Y-%m-%d %H:00:00.000000', h.completed_at)",
+        'delivery_seconds': seconds,
+        'bucket': f'CAST(min(CAST({seconds} / 60 / {DELIVERY_BUCKET_MINUTES} AS INTEGER) * {DELIVERY_BUCKET_MINUTES}, {DELIVERY_MAX_MINUTES}) AS TEXT)',
+    }
+
+def rebuild_sales_rollup() -> int:
+    """
+    Recalcula sales_rollup a partir de order_history (com commit). As horas anteriores ao pedido
+    mais antigo do histórico (meses arquivados) são mantidas. Retorna o número de linhas geradas.
+    """
+    oldest = db.session.query(func.min(OrderHistory.completed_at)).scalar()
+    if oldest is None:
+        return 0
+    since = hour_start(oldest)
+    db.session.execute(db.delete(SalesRollup).where(SalesRollup.hour >= since))
+
+    parts = rebuild_sql_parts(db.engine.dialect.name)
+    rows = 0
+    for sql in REBUILD_SQL.values():
+        statement = text(sql.format(**parts)).bindparams(bindparam('since', type_=db.DateTime))
+        rows += db.session.execute(statement, {'since': since}).rowcount
+    db.session.commit()
+    invalidate_response_cache()
+    return rows
+
+# --- Consulta ---
+
+def parse_analytics_range(args, utc_offset: int = ANALYTICS_UTC_OFFSET) -> tuple[datetime, datetime]:
+    """
+    Converte 'from'/'to' (AAAA-MM-DD ou data e hora ISO) em [início, fim) UTC alinhados à hora.
+    Datas sem hora valem o dia inteiro no fuso utc_offset; sem 'to', vai até a hora atual; sem 'from',
+    cobre os últimos ANALYTICS_DEFAULT_DAYS dias. Lança ValueError (400) com a mensagem para o cliente.
+    """
+    local_shift = timedelta(hours=utc_offset)
+    if args.get('to'):
+        end, date_only = parse_timestamp_filter('to', args['to'])
+        end = end + timedelta(days=1) - local_shift if date_only else end
+    else:
+        end = datetime.now(timezone.utc).replace(tzinfo=None)
+    # A granularidade é a hora: o fim inclui a hora em que cai
+    end = hour_start(end) + (timedelta(hours=1) if end != hour_start(end) else timedelta(0))
+
+    if args.get('from'):
+        start, date_only = parse_timestamp_filter('from', args['from'])
+        start = hour_start(start - local_shift if date_only else start)
+    else:
+        start = end - timedelta(days=ANALYTICS_DEFAULT_DAYS)
+
+    if start >= end:
+        raise ValueError("O parâmetro 'from' deve ser anterior a 'to'")
+    if end - start > timedelta(days=ANALYTICS_MAX_DAYS):
+        raise ValueError(f'Intervalo máximo: {ANALYTICS_MAX_DAYS} dias')
+    return start, end
+
+def parse_utc_offset(raw: str | None) -> int:
+    if raw is None or raw == '':
+        return ANALYTICS_UTC_OFFSET
+    try:
+        offset = int(raw)
+    except ValueError:
+        raise ValueError("O parâmetro 'utc_offset' deve ser um número inteiro de horas")
+    if not -12 <= offset <= 14:
+        raise ValueError("O parâmetro 'utc_offset' deve estar entre -12 e 14")
+    return offset
+
+def local_time_columns(utc_offset: int):
+    """Expressões (dia 'AAAA-MM-DD', hora do dia 0-23) de SalesRollup.hour deslocada para o fuso utc_offset."""
+    if db.engine.dialect.name == 'postgresql':
+        local = SalesRollup.hour + text(f"interval '{int(utc_offset)} hours'")
+        return func.to_char(local, 'YYYY-MM-DD'), func.extract('hour', local)
+    modifier = f'{int(utc_offset):+d} hours'
+    return func.date(SalesRollup.hour, modifier), func.cast(func.strftime('%H', SalesRollup.hour, modifier), db.Integer)
+
+def delivery_percentile(histogram: list[tuple[int, int]], total: int, fraction: float) -> float | None:
+    """Percentil (em minutos) interpolado dentro da faixa do histograma [(início da faixa, pedidos)]."""
+    if not total:
+        return None
+    target = total * fraction
+    seen = 0
+    for bucket, count in histogram:
+        if seen + count >= target:
+            if bucket >= DELIVERY_MAX_MINUTES:
+                return float(DELIVERY_MAX_MINUTES)
+            return round(bucket + (target - seen) / count * DELIVERY_BUCKET_MINUTES, 1)
+        seen += count
+    return float(histogram[-1][0])
+
+def sales_analytics(start: datetime, end: datetime, utc_offset: int = ANALYTICS_UTC_OFFSET) -> dict:
+    """Relatório de vendas do intervalo [start, end) (UTC, alinhado à hora) lido de sales_rollup."""
+    in_range = (SalesRollup.hour >= start, SalesRollup.hour < end)
+    local_shift = timedelta(hours=utc_offset)
+
+    # Dias e horas do dia no fuso pedido, agrupados no banco (uma linha por hora com venda no intervalo)
+    local_day, local_hour = local_time_columns(utc_offset)
+    orders_filter = (SalesRollup.dimension == 'orders', *in_range)
+    daily = dict((str(day), (int(quantity), revenue)) for day, quantity, revenue in db.session.query(
+        local_day, func.sum(SalesRollup.quantity), func.sum(SalesRollup.revenue)).filter(*orders_filter).group_by(local_day))
+    hourly = dict((int(hour), (int(quantity), revenue)) for hour, quantity, revenue in db.session.query(
+        local_hour, func.sum(SalesRollup.quantity), func.sum(SalesRollup.revenue)).filter(*orders_filter).group_by(local_hour))
+
+    by_day = []
+    day, last_day = (start + local_shift).date(), (end - timedelta(microseconds=1) + local_shift).date()
+    while day <= last_day:
+        quantity, total = daily.get(day.isoformat(), (0, 0))
+        by_day.append({'date': day.isoformat(), 'orders': quantity, 'revenue': float(total or 0)})
+        day += timedelta(days=1)
+    orders = sum(quantity for quantity, _ in daily.values())
+    revenue = sum((Decimal(str(total or 0)) for _, total in daily.values()), Decimal('0'))
+
+    pizzas = db.session.query(
+        SalesRollup.key, func.sum(SalesRollup.quantity), func.sum(SalesRollup.revenue)
+    ).filter(SalesRollup.dimension == 'pizza', *in_range).group_by(SalesRollup.key).order_by(
+        func.sum(SalesRollup.quantity).desc(), SalesRollup.key).all()
+
+    delivery_rows = db.session.query(
+        SalesRollup.key, func.sum(SalesRollup.quantity), func.sum(SalesRollup.delivery_seconds)
+    ).filter(SalesRollup.dimension == 'delivery', *in_range).group_by(SalesRollup.key).all()
+    histogram = sorted((int(bucket), int(count)) for bucket, count, _ in delivery_rows)
+    delivered = sum(count for _, count in histogram)
+    delivery_seconds = sum(float(seconds or 0) for _, _, seconds in delivery_rows)
+
+    return {
+        'range': {
+            'from': start.replace(tzinfo=timezone.utc).isoformat(),
+            'to': end.replace(tzinfo=timezone.utc).isoformat(),
+            'utc_offset': utc_offset
+        },
+        'orders': orders,
+        'revenue': float(revenue),
+        'average_ticket': round(float(revenue) / orders, 2) if orders else 0.0,
+        'by_day': by_day,
+        'by_hour': [{'hour': hour, 'orders': hourly.get(hour, (0, 0))[0], 'revenue': float(hourly.get(hour, (0, 0))[1] or 0)}
+                    for hour in range(24)],
+        'pizzas': [{'name': name, 'quantity': int(quantity), 'revenue': float(total or 0)}
+                   for name, quantity, total in pizzas],
+        'delivery_time': {
+            'orders': delivered,
+            'average_minutes': round(delivery_seconds / delivered / 60, 1) if delivered else None,
+            'p50_minutes': delivery_percentile(histogram, delivered, 0.5),
+            'p90_minutes': delivery_percentile(histogram, delivered, 0.9),
+            'p95_minutes': delivery_percentile(histogram, delivered, 0.95),
+            'bucket_minutes': DELIVERY_BUCKET_MINUTES,
+            'histogram': [{'from_minutes': bucket, 'orders': count} for bucket, count in histogram]
+        }
+    }
+
+@click.command('rebuild-analytics')
+@with_appcontext
+def rebuild_analytics_command():
+    """Recalcula a tabela sales_rollup (relatório de vendas) a partir do histórico."""
+    rows = rebuild_sales_rollup()
+    print(f"[INFO] Consolidado de vendas reconstruído: {rows} linhas.")
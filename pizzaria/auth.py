@@ -0,0 +1,215 @@
+import os
+from datetime import datetime, timedelta, timezone # Importa timezone para melhor manejo de datas UTC
+
+import jwt
+from flask import current_app, g
+
+from .cache import TTLCache
+from .extensions import db
+from .logs import logger
+from .models import User
+from .passwords import hash_password
+from .stats import bump_store_stats
+
+# --- Funções de Utilitário ---
+
+MASTER_USER = {
+    'id': None,
+    'name': 'Administrador',
+    'email': 'master@pizzaria.com',
+    'phone': '(51) 99999-0000',
+    'address': 'Pizzaria Del Gatito',
+    'password_hash': None, # Calculado sob demanda por get_master_password_hash() (bcrypt é caro no import)
+    'role': 'master',
+    'createdAt': datetime.now(timezone.utc)
+}
+
+MASTER_PASSWORD = 'master123'
+
+def get_master_password_hash() -> str:
+    """Retorna o hash da senha do master, calculando-o na primeira chamada."""
+    if MASTER_USER['password_hash'] is None:
+        MASTER_USER['password_hash'] = hash_password(MASTER_PASSWORD)
+    return MASTER_USER['password_hash']
+
+def is_master_user(user: dict | User) -> bool:
+    """Verifica se o usuário fornecido é o usuário master."""
+    if isinstance(user, User):
+        return user.role == 'master'
+    elif isinstance(user, dict):
+        return user.get('role') == 'master'
+    return False
+
+
+# --- Funções JWT (JSON Web Token) ---
+# O token carrega o papel (role) e os dados básicos do perfil, assim as rotas de leitura
+# identificam o usuário só verificando a assinatura, sem consultar o banco.
+TOKEN_PROFILE_CLAIMS = ['name', 'email', 'phone', 'address', 'role', 'createdAt']
+
+# Cache dos registros de usuário usado por get_current_user (rotas que escrevem no banco).
+# É invalidado explicitamente quando um usuário é excluído.
+USER_CACHE = TTLCache(ttl_seconds=float(os.getenv('USER_CACHE_TTL', '60')), max_entries=4096)
+
+# Usuários excluídos neste worker: tokens deles deixam de valer também no caminho rápido.
+# O conjunto é por worker; por isso as rotas admin e o canal 'admin' do stream SSE não usam o caminho
+# rápido (get_token_user) e conferem o papel no registro do usuário (load_user), que os outros workers releem depois de
+# no máximo USER_CACHE_TTL segundos, em vez de confiar na claim 'role' durante os 7 dias do token.
+REVOKED_USER_IDS = set()
+
+def request_memo(name: str) -> dict:
+    """
+    Dicionário guardado em flask.g, que vale só até o fim da requisição. Idempotência, limite de taxa
+    e a própria rota identificam o usuário: o token é verificado e o usuário lido uma vez por requisição.
+    """
+    return g.setdefault(name, {})
+
+def generate_token(user_id: int, user_data: dict | None = None) -> str:
+    """
+    Gera um token JWT para o user_id fornecido.
+    Se user_data for informado, o papel e os dados do perfil vão junto como claims do token.
+    """
+    payload = {
+        'user_id': user_id,
+        'exp': datetime.now(timezone.utc) + timedelta(days=7) # Token expira em 7 dias
+    }
+    if user_data:
+        for claim in TOKEN_PROFILE_CLAIMS:
+            payload[claim] = user_data.get(claim)
+    return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
+
+def decode_token(token: str) -> dict | None:
+    """Verifica um token JWT e retorna o payload completo se válido, None caso contrário."""
+    decoded_tokens = request_memo('decoded_tokens')
+    if token not in decoded_tokens:
+        try:
+            decoded_tokens[token] = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+            decoded_tokens[token] = None
+    payload = decoded_tokens[token]
+    if payload is None or payload.get('user_id') in REVOKED_USER_IDS:
+        return None
+    return payload
+
+def verify_token(token: str) -> int | None:
+    """Verifica um token JWT e retorna o user_id se válido, None caso contrário."""
+    payload = decode_token(token)
+    return payload['user_id'] if payload else None
+
+def get_request_token(request_obj) -> str | None:
+    """Extrai o token do cabeçalho 'Authorization: Bearer <token>'."""
+    auth_header = request_obj.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return auth_header.split(' ')[1]
+
+def invalidate_user(user_id: int, revoke: bool = False):
+    """Remove o usuário do cache. Com revoke=True, os tokens dele também deixam de ser aceitos neste worker."""
+    USER_CACHE.delete(user_id)
+    request_memo('current_users').pop(user_id, None)
+    if revoke:
+        REVOKED_USER_IDS.add(user_id)
+
+def get_token_user(request_obj) -> dict | None:
+    """
+    Caminho rápido para rotas somente leitura do próprio cliente: devolve o usuário a partir das claims
+    já verificadas do token, sem nenhuma consulta ao banco. Tokens antigos (sem claims de perfil) caem em
+    get_current_user. Não serve para autorizar rotas admin (ver REVOKED_USER_IDS).
+    """
+    token = get_request_token(request_obj)
+    if not token:
+        return None
+
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    if 'role' not in payload:
+        return get_current_user(request_obj)
+
+    user_data = {claim: payload.get(claim) for claim in TOKEN_PROFILE_CLAIMS}
+    user_data['id'] = payload['user_id']
+    return user_data
+
+def load_user(user_id: int) -> dict | None:
+    """
+    Registro atual do usuário (sem hash de senha), do USER_CACHE ou do banco; None se ele não existir mais.
+    Não usa o memo da requisição: serve também para reconferir o usuário de um stream já aberto.
+    """
+    # AQUI: Se for o master user, ele ainda pode não ter um ID no DB
+    # mas o acesso é permitido se o token for gerado para ele (ex: em dev local)
+    # Para produção, o master user DEVE ser criado via flask db upgrade/shell
+    if MASTER_USER['id'] is not None and user_id == MASTER_USER['id']:
+        master_user_data = MASTER_USER.copy()
+        master_user_data['createdAt'] = master_user_data['createdAt'].isoformat()
+        master_user_data.pop('password_hash', None)
+        return master_user_data
+
+    cached_user = USER_CACHE.get(user_id)
+    if cached_user is not None:
+        return dict(cached_user)
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    user_data = user.to_dict(include_password_hash=False)
+    USER_CACHE.set(user_id, user_data)
+    return dict(user_data)
+
+def get_current_user(request_obj) -> dict | None:
+    """
+    Obtém o usuário atual a partir do token de autenticação no cabeçalho da requisição.
+    Retorna um dicionário com os dados do usuário (sem hash de senha).
+    O registro vem de load_user (USER_CACHE ou banco) e fica em flask.g até o fim da requisição.
+    """
+    token = get_request_token(request_obj)
+    if not token:
+        return None
+
+    user_id = verify_token(token)
+    if user_id is None:
+        return None
+
+    request_users = request_memo('current_users')
+    if user_id not in request_users:
+        user_data = load_user(user_id)
+        if user_data is None:
+            return None
+        request_users[user_id] = user_data
+    return dict(request_users[user_id])
+
+
+# --- Inicialização do Banco de Dados e Usuário Master ---
+def initialize_database():
+    """
+    Garante que o usuário master padrão esteja presente no DB.
+    As tabelas são criadas/atualizadas via migrações do Flask-Migrate (flask db upgrade), não mais por db.create_all().
+    Deve ser chamada dentro de um app context (with app.app_context()).
+    """
+    try:
+        logger.info("Verificando e criando usuário master...")
+        
+        master_user_in_db = User.query.filter_by(email=MASTER_USER['email']).first()
+        
+        if not master_user_in_db:
+            logger.info("Usuário master não encontrado. Criando...")
+            new_master = User(
+                name=MASTER_USER['name'],
+                email=MASTER_USER['email'],
+                phone=MASTER_USER['phone'],
+                address=MASTER_USER['address'],
+                password_hash=get_master_password_hash(),
+                role='master',
+                created_at=MASTER_USER['createdAt']
+            )
+            db.session.add(new_master)
+            bump_store_stats(users=1)
+            db.session.commit()
+            MASTER_USER['id'] = new_master.id
+            logger.info("Usuário master criado com sucesso! ID: %s", MASTER_USER['id'])
+        else:
+            MASTER_USER['id'] = master_user_in_db.id
+            logger.info("Usuário master já existe. ID: %s", MASTER_USER['id'])
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erro ao inicializar o banco de dados (usuário master): %s", e)
+        raise
+
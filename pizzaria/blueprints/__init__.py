@@ -0,0 +1,7 @@
+from .admin import admin_bp
+from .auth import auth_bp
+from .orders import orders_bp
+from .pages import pages_bp
+
+# Ordem de registro em create_app(). As URLs ficam iguais às da versão monolítica (sem url_prefix).
+BLUEPRINTS = (auth_bp, orders_bp, admin_bp, pages_bp)
@@ -0,0 +1,483 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import func
+
+from ..analytics import parse_analytics_range, parse_utc_offset, sales_analytics
+from ..auth import get_current_user, invalidate_user, is_master_user
+from ..conditional import make_etag, not_modified, table_version, with_validators
+from ..events import publish_order_event
+from ..extensions import db
+from ..jobs import enqueue_jobs
+from ..lifecycle import OrderConflict, can_transition, transition_error, transition_order, transition_orders
+from ..logs import logger
+from ..models import User, Order, OrderHistory, StoreStats, ORDER_STATUSES
+from ..order_items import delete_order_items
+from ..pagination import keyset_query, ndjson_stream_response, paginated_response, wants_ndjson
+from ..response_cache import cached_response, invalidate_response_cache, store_response
+from ..search import apply_search_filters, parse_search_filters
+from ..stats import STORE_STATS_ID, bump_store_stats, rebuild_store_stats, status_count_deltas
+
+admin_bp = Blueprint('admin', __name__)
+
+# Limite de itens por chamada de PUT /api/admin/orders/batch
+MAX_BATCH_STATUS_UPDATES = 200
+
+@admin_bp.route('/api/admin/orders', methods=['GET'])
+def api_admin_orders():
+    """
+    Rota para o administrador visualizar os pedidos ativos, paginados por cursor.
+    Query string: 'limit' (padrão 100, máx. 500), 'cursor' (valor de 'next_cursor' da página anterior)
+    e 'format=ndjson' para receber todos os pedidos em streaming.
+    """
+    logger.debug("Rota /api/admin/orders (GET) chamada")
+
+    try:
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        cursor = request.args.get('cursor')
+        query = keyset_query(Order.query, Order.created_at, Order.id, cursor)
+
+        if wants_ndjson(request):
+            return ndjson_stream_response(query, Order)
+
+        cached = cached_response('admin-orders')
+        if cached:
+            return cached
+
+        etag = make_etag('admin-orders', cursor, request.args.get('limit'), table_version(Order, timestamp_column=Order.updated_at))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        return store_response('admin-orders', with_validators(paginated_response(query, Order, 'created_at', cursor, request.args.get('limit')), etag), etag)
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Erro ao buscar pedidos para admin: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/orders/search', methods=['GET'])
+def api_admin_search_orders():
+    """
+    Rota para o administrador buscar pedidos ativos por status, período, prefixo do nome/telefone,
+    usuário e sabor (filtros em pizzaria/search.py), paginada por cursor como /api/admin/orders.
+    Ex.: /api/admin/orders/search?status=pendente,preparando&name=ana&pizza=Calabresa
+    """
+    logger.debug("Rota /api/admin/orders/search (GET) chamada")
+
+    try:
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        filters = parse_search_filters(request.args)
+        cursor = request.args.get('cursor')
+        query = keyset_query(apply_search_filters(Order.query, Order, Order.created_at, filters), Order.created_at, Order.id, cursor)
+
+        etag = make_etag('admin-orders-search', sorted(request.args.items()), table_version(Order, timestamp_column=Order.updated_at))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        return with_validators(paginated_response(query, Order, 'created_at', cursor, request.args.get('limit')), etag)
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Erro ao buscar pedidos para admin: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/orders/<int:order_id>', methods=['PUT'])
+def api_update_order_status(order_id: int):
+    """
+    Rota para o administrador atualizar o status de um pedido.
+    Corpo: {"status": "preparando", "expected_status": "pendente", "version": 3}. 'expected_status' e
+    'version' são os que o admin está vendo (vêm no JSON do pedido); com eles a mudança é um único UPDATE
+    condicional, e se o pedido já tiver mudado a resposta é 409 com o estado atual (pizzaria/lifecycle.py).
+    Sem eles, vale o estado atual do banco. Transições fora de ORDER_TRANSITIONS também dão 409.
+    Se o status for 'entregue', a passagem para o histórico é agendada na fila de tarefas (pizzaria/jobs.py)
+    e a resposta sai assim que o novo status é gravado.
+    """
+    logger.debug("Rota /api/admin/orders/%s (PUT) chamada", order_id)
+
+    try:
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        data = request.get_json()
+        if not data or 'status' not in data:
+            return jsonify({'success': False, 'error': 'Status é obrigatório no corpo da requisição'}), 400
+
+        new_status = data['status'].strip()
+        expected_status = data.get('expected_status')
+        expected_version = data.get('version')
+        if new_status not in ORDER_STATUSES or (expected_status is not None and expected_status not in ORDER_STATUSES):
+            return jsonify({'success': False, 'error': f'Status inválido. Status permitidos: {", ".join(ORDER_STATUSES)}'}), 400
+        if expected_version is not None and (not isinstance(expected_version, int) or isinstance(expected_version, bool)):
+            return jsonify({'success': False, 'error': "O campo 'version' deve ser um número inteiro"}), 400
+
+        transition = transition_order(order_id, new_status, expected_status, expected_version)
+        if transition is None:
+            return jsonify({'success': False, 'error': f'Pedido com ID {order_id} não encontrado'}), 404
+
+        order_to_update, old_status = transition
+        bump_store_stats(**status_count_deltas({old_status: -1, new_status: 1}))
+        if new_status == 'entregue':
+            # A passagem para o histórico (e o consolidado de concluídos) fica com o worker da fila.
+            # 'entregue' é final: só uma requisição consegue fazer essa transição.
+            enqueue_jobs('move_to_history', [{'order_id': order_id}])
+        updated_order_data = order_to_update.to_dict() # Antes do commit: depois dele o pedido e os itens seriam relidos
+        db.session.commit()
+        invalidate_response_cache()
+        logger.debug("Pedido %s atualizado no DB: %s → %s", order_id, old_status, new_status)
+
+        publish_order_event('order_status', updated_order_data)
+
+        return jsonify({
+            'success': True,
+            'message': f'Status do pedido {order_id} atualizado para "{new_status}"',
+            'order': updated_order_data
+        })
+
+    except OrderConflict as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e), 'current': e.current}), 409
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erro ao atualizar pedido %s: %s", order_id, e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/orders/batch', methods=['PUT'])
+def api_batch_update_order_status():
+    """
+    Rota para o administrador atualizar o status de vários pedidos de uma vez (ex.: cozinha no horário de pico).
+    Corpo: {"updates": [{"order_id": 1, "status": "preparando", "version": 3}, ...]} ('version' é opcional).
+    Lê status e versão dos pedidos com um único IN, valida as transições e grava tudo numa só transação
+    (um UPDATE condicional por tipo de transição e as tarefas que movem os entregues para o histórico).
+    Pedidos alterados por outra requisição no meio do caminho voltam como falha; o resultado vem por item.
+    """
+    logger.debug("Rota /api/admin/orders/batch (PUT) chamada")
+
+    try:
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        data = request.get_json()
+        updates = data.get('updates') if isinstance(data, dict) else None
+        if not isinstance(updates, list) or not updates:
+            return jsonify({'success': False, 'error': "Envie uma lista 'updates' com order_id e status"}), 400
+        if len(updates) > MAX_BATCH_STATUS_UPDATES:
+            return jsonify({'success': False, 'error': f'No máximo {MAX_BATCH_STATUS_UPDATES} pedidos por chamada'}), 400
+
+        results = [None] * len(updates)
+        requested = {} # order_id -> (posição no lote, novo status, versão esperada ou None)
+        for position, item in enumerate(updates):
+            order_id = item.get('order_id') if isinstance(item, dict) else None
+            new_status = item.get('status', '').strip() if isinstance(item, dict) and isinstance(item.get('status'), str) else None
+            version = item.get('version') if isinstance(item, dict) else None
+            if not isinstance(order_id, int):
+                results[position] = {'order_id': order_id, 'success': False, 'error': 'order_id inválido'}
+            elif new_status not in ORDER_STATUSES:
+                results[position] = {'order_id': order_id, 'success': False, 'error': f'Status inválido. Status permitidos: {", ".join(ORDER_STATUSES)}'}
+            elif version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+                results[position] = {'order_id': order_id, 'success': False, 'error': "O campo 'version' deve ser um número inteiro"}
+            elif order_id in requested:
+                results[position] = {'order_id': order_id, 'success': False, 'error': 'Pedido repetido no lote'}
+            else:
+                requested[order_id] = (position, new_status, version)
+
+        # Só status e versão são lidos aqui; os itens vêm na releitura dos pedidos alterados, depois do commit
+        current = {row.id: row for row in db.session.execute(
+            db.select(Order.id, Order.status, Order.version).where(Order.id.in_(requested.keys()))
+        )} if requested else {}
+
+        changes = []
+        for order_id, (position, new_status, version) in requested.items():
+            order = current.get(order_id)
+            if order is None:
+                results[position] = {'order_id': order_id, 'success': False, 'error': f'Pedido com ID {order_id} não encontrado'}
+            elif version is not None and version != order.version:
+                results[position] = {'order_id': order_id, 'success': False, 'conflict': True,
+                                     'error': f"O pedido {order_id} foi alterado por outra requisição (agora está '{order.status}', versão {order.version})"}
+            elif not can_transition(order.status, new_status):
+                results[position] = {'order_id': order_id, 'success': False, 'conflict': True, 'error': transition_error(order.status, new_status)}
+            else:
+                changes.append((order_id, order.status, order.version, new_status))
+
+        updated_ids = transition_orders(changes)
+        status_deltas = {}
+        delivered_ids = []
+        for order_id, old_status, _, new_status in changes:
+            if order_id not in updated_ids:
+                position = requested[order_id][0]
+                results[position] = {'order_id': order_id, 'success': False, 'conflict': True,
+                                     'error': f'O pedido {order_id} foi alterado por outra requisição'}
+                continue
+            status_deltas[old_status] = status_deltas.get(old_status, 0) - 1
+            status_deltas[new_status] = status_deltas.get(new_status, 0) + 1
+            if new_status == 'entregue':
+                delivered_ids.append(order_id)
+
+        enqueue_jobs('move_to_history', [{'order_id': order_id} for order_id in delivered_ids])
+        bump_store_stats(**status_count_deltas(status_deltas))
+        db.session.commit()
+        invalidate_response_cache()
+
+        changed_orders = {}
+        if updated_ids:
+            changed_orders.update({order.id: order.to_dict() for order in Order.query.filter(Order.id.in_(updated_ids))})
+
+        for order_id, order_data in changed_orders.items():
+            position, new_status, _ = requested[order_id]
+            results[position] = {'order_id': order_id, 'success': True, 'status': new_status, 'order': order_data}
+            publish_order_event('order_status', order_data)
+
+        updated_count = len(changed_orders)
+        logger.debug("Lote de status aplicado: %s de %s pedidos atualizados", updated_count, len(updates))
+        return jsonify({
+            'success': True,
+            'updated': updated_count,
+            'failed': len(updates) - updated_count,
+            'results': results
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erro ao atualizar pedidos em lote: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/stats', methods=['GET'])
+def api_admin_stats():
+    """Rota para o administrador visualizar estatísticas gerais da pizzaria."""
+    logger.debug("Rota /api/admin/stats (GET) chamada")
+
+    try:
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        cached = cached_response('admin-stats')
+        if cached:
+            return cached
+
+        # Leitura única por chave primária do consolidado. Se a linha ainda não existir
+        # (banco novo ou migração recém-aplicada), ela é reconstruída a partir das tabelas.
+        stats = db.session.get(StoreStats, STORE_STATS_ID)
+        if stats is None:
+            logger.info("store_stats inexistente. Reconstruindo a partir das tabelas...")
+            stats = rebuild_store_stats()
+
+        return store_response('admin-stats', jsonify({'success': True, 'stats': stats.to_dict()}))
+
+    except Exception as e:
+        logger.error("Erro ao buscar estatísticas: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+
+@admin_bp.route('/api/admin/analytics', methods=['GET'])
+def api_admin_analytics():
+    """
+    Rota para o administrador visualizar o relatório de vendas do histórico (receita, pedidos por dia e
+    por hora do dia, ticket médio, pizzas vendidas e tempo de entrega), lido do consolidado por hora.
+    Query string: 'from' e 'to' (AAAA-MM-DD ou data e hora ISO; padrão: últimos 30 dias) e 'utc_offset'
+    (fuso em horas dos agrupamentos por dia/hora). Ex.: /api/admin/analytics?from=2026-09-01&to=2026-09-30&utc_offset=-3
+    """
+    logger.debug("Rota /api/admin/analytics (GET) chamada")
+
+    try:
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        utc_offset = parse_utc_offset(request.args.get('utc_offset'))
+        start, end = parse_analytics_range(request.args, utc_offset)
+
+        cached = cached_response('admin-analytics')
+        if cached:
+            return cached
+
+        return store_response('admin-analytics', jsonify({'success': True, 'analytics': sales_analytics(start, end, utc_offset)}))
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Erro ao gerar relatório de vendas: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/orders/<int:order_id>', methods=['DELETE'])
+def api_admin_delete_order(order_id: int):
+   
+    logger.debug("Rota /api/admin/orders/%s (DELETE) chamada", order_id)
+
+    try:
+        # Esta linha e as seguintes dentro do try devem ter 8 espaços (ou 2 tabs)
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            # As linhas dentro do if devem ter 12 espaços (ou 3 tabs)
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        order_to_delete = db.session.get(Order, order_id, options=[db.lazyload(Order.items)]) # Itens não são lidos: saem com um DELETE
+        if not order_to_delete:
+            return jsonify({'success': False, 'error': f'Pedido com ID {order_id} não encontrado.'}), 404
+
+        if order_to_delete.status == 'entregue':
+            return jsonify({'success': False, 'error': f'Pedido com ID {order_id} já foi entregue e vai para o histórico. Não pode ser deletado de pedidos ativos.'}), 400
+
+        deleted_order_user_id = order_to_delete.user_id
+        # Condicional como as mudanças de status: se o pedido mudou desde a leitura (ex.: foi entregue), não apaga
+        deleted = db.session.execute(db.delete(Order).where(
+            Order.id == order_id, Order.status == order_to_delete.status, Order.version == order_to_delete.version
+        ).execution_options(synchronize_session=False))
+        if deleted.rowcount == 0:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': f'O pedido {order_id} foi alterado por outra requisição. Recarregue e tente de novo.'}), 409
+        delete_order_items([order_id])
+        bump_store_stats(
+            active_orders=-1,
+            pending_revenue=-order_to_delete.total,
+            **status_count_deltas({order_to_delete.status: -1})
+        )
+        db.session.commit()
+        invalidate_response_cache()
+
+        logger.debug("Pedido %s deletado com sucesso.", order_id)
+        publish_order_event('order_deleted', {'id': order_id, 'userId': deleted_order_user_id})
+        return jsonify({'success': True, 'message': f'Pedido com ID {order_id} deletado com sucesso.'}), 200
+
+    except Exception as e:
+        # As linhas dentro do except devem ter 8 espaços (ou 2 tabs)
+        db.session.rollback()
+        logger.error("Erro ao deletar pedido %s: %s", order_id, e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/users/<int:user_id>', methods=['DELETE'])
+def api_admin_delete_user(user_id: int):
+    """
+    Deleta um usuário do banco de dados.
+    Apenas usuários master (administradores) podem realizar esta operação.
+    Um usuário master não pode deletar a si próprio.
+    """
+    logger.debug("Rota /api/admin/users/%s (DELETE) chamada", user_id)
+
+    try:
+        # 1. Autenticação e Autorização: Verificar se o usuário é master
+        user_data = get_current_user(request)
+        # Se não há user_data (token inválido/ausente) OU o usuário não é master
+        if not user_data or not is_master_user(user_data):
+            logger.debug("Tentativa de deletar usuário por não-administrador ou usuário não autenticado.")
+            return jsonify({"success": False, "error": "Acesso negado: Somente administradores podem deletar usuários."}), 403
+
+        # 2. Impedir auto-exclusão do usuário master
+        # Verifica se o ID do usuário na URL é o mesmo ID do usuário logado E se o usuário logado é master
+        if user_id == user_data['id'] and is_master_user(user_data):
+            logger.debug("Tentativa de auto-exclusão do usuário master (ID: %s).", user_id)
+            return jsonify({"success": False, "error": "Não é possível deletar seu próprio usuário master."}), 400
+
+        # 3. Encontrar o usuário a ser deletado (só o nome, para a mensagem de sucesso)
+        username_deleted = db.session.scalar(db.select(User.name).where(User.id == user_id))
+        if username_deleted is None:
+            logger.debug("Tentativa de deletar usuário não encontrado (ID: %s).", user_id)
+            return jsonify({"success": False, "error": "Usuário não encontrado."}), 404
+
+        # 4. Processar a exclusão
+        # Os pedidos ativos do usuário saem com um DELETE em lote (o cascade do ORM carregaria cada pedido
+        # e os itens antes de apagá-los). Para OrderHistory, com 'ondelete='SET NULL'' na ForeignKey,
+        # o user_id será NULL, mantendo o histórico.
+
+        # Os pedidos ativos removidos em cascata também saem do consolidado de estatísticas
+        user_orders = db.session.query(Order.status, func.count(Order.id), func.sum(Order.total)) \
+            .filter(Order.user_id == user_id).group_by(Order.status).all()
+        bump_store_stats(
+            users=-1,
+            active_orders=-sum(count for _, count, _ in user_orders),
+            pending_revenue=-sum(total for _, _, total in user_orders),
+            **status_count_deltas({status: -count for status, count, _ in user_orders})
+        )
+
+        # Os itens dos pedidos ativos não têm chave estrangeira (ver OrderItem) e saem explicitamente
+        delete_order_items(db.select(Order.id).where(Order.user_id == user_id).scalar_subquery())
+        db.session.execute(db.delete(Order).where(Order.user_id == user_id))
+        db.session.execute(db.delete(User).where(User.id == user_id)) # Realiza a exclusão do usuário
+        db.session.commit() # Confirma a transação no banco de dados
+        invalidate_response_cache()
+        invalidate_user(user_id, revoke=True) # Tira o usuário do cache e invalida os tokens dele neste worker
+
+        logger.debug("O usuário '%s' (ID: %s) foi excluído com sucesso.", username_deleted, user_id)
+        return jsonify({"success": True, "message": f"O usuário '{username_deleted}' (ID: {user_id}) foi excluído."}), 200
+
+    except Exception as e:
+        # Em caso de qualquer erro inesperado, reverte a transação para evitar dados inconsistentes
+        db.session.rollback()
+        logger.error("Erro ao deletar usuário %s: %s", user_id, e)
+        return jsonify({"success": False, "error": f"O usuário não foi excluído. Erro interno do servidor: {str(e)}."}), 500
+
+@admin_bp.route('/api/admin/history', methods=['GET'])
+def api_admin_history():
+    """
+    Rota para o administrador visualizar o histórico de pedidos, paginado por cursor.
+    Aceita os mesmos parâmetros de /api/admin/orders ('limit', 'cursor' e 'format=ndjson').
+    """
+    logger.debug("Rota /api/admin/history (GET) chamada")
+
+    try:
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        cursor = request.args.get('cursor')
+        query = keyset_query(OrderHistory.query, OrderHistory.completed_at, OrderHistory.id, cursor)
+
+        if wants_ndjson(request):
+            return ndjson_stream_response(query, OrderHistory)
+
+        cached = cached_response('admin-history')
+        if cached:
+            return cached
+
+        etag = make_etag('admin-history', cursor, request.args.get('limit'), table_version(OrderHistory))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        return store_response('admin-history', with_validators(paginated_response(query, OrderHistory, 'completed_at', cursor, request.args.get('limit')), etag), etag)
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Erro ao buscar histórico para admin: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/api/admin/history/search', methods=['GET'])
+def api_admin_search_history():
+    """
+    Rota para o administrador buscar no histórico com os mesmos filtros de /api/admin/orders/search;
+    o período se refere à data de conclusão (completed_at).
+    """
+    logger.debug("Rota /api/admin/history/search (GET) chamada")
+
+    try:
+        user = get_current_user(request)
+        if not user or not is_master_user(user):
+            return jsonify({'success': False, 'error': 'Acesso negado. Apenas para administradores.'}), 403
+
+        filters = parse_search_filters(request.args)
+        cursor = request.args.get('cursor')
+        query = keyset_query(apply_search_filters(OrderHistory.query, OrderHistory, OrderHistory.completed_at, filters),
+                             OrderHistory.completed_at, OrderHistory.id, cursor)
+
+        etag = make_etag('admin-history-search', sorted(request.args.items()), table_version(OrderHistory))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        return with_validators(paginated_response(query, OrderHistory, 'completed_at', cursor, request.args.get('limit')), etag)
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Erro ao buscar histórico para admin: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,187 @@
+from datetime import datetime, timezone # Importa timezone para melhor manejo de datas UTC
+
+from flask import Blueprint, jsonify, request
+
+from .. import passwords
+from ..auth import MASTER_USER, generate_token, get_current_user, get_master_password_hash
+from ..extensions import db
+from ..logs import logger
+from ..models import User, Order, OrderHistory
+from ..passwords import PasswordHashBusy, hash_password, verify_password
+from ..ratelimit import rate_limited
+from ..response_cache import invalidate_response_cache
+from ..stats import bump_store_stats
+
+auth_bp = Blueprint('auth', __name__)
+
+@auth_bp.route('/api/test', methods=['GET'])
+def api_test():
+    """Rota de teste para verificar a conectividade da API e do DB."""
+    logger.debug("Rota /api/test chamada")
+    try:
+        total_users = User.query.count()
+        total_active_orders = Order.query.count()
+        total_history_orders = OrderHistory.query.count()
+
+        return jsonify({
+            'success': True,
+            'message': 'API funcionando e conectada ao banco de dados!',
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'users': total_users,
+            'orders': total_active_orders,
+            'history_orders': total_history_orders,
+            'password_hashing': passwords.PASSWORD_HASHER.metrics()
+        })
+    except Exception as e:
+        logger.error("Erro ao acessar o DB na rota /api/test: %s", e)
+        return jsonify({'success': False, 'error': f'Erro ao conectar ao banco de dados: {e}'}), 500
+
+@auth_bp.route('/api/register', methods=['POST'])
+def api_register():
+    """Rota para registrar um novo usuário."""
+    logger.debug("Rota /api/register chamada")
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'error': 'Nenhum dado recebido'}), 400
+
+        required_fields = ['name', 'email', 'phone', 'address', 'password']
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({'success': False, 'error': f'Campo {field} é obrigatório'}), 400
+
+        email = data['email'].lower().strip()
+        existing_user = User.query.filter_by(email=email).first()
+        if existing_user:
+            return jsonify({'success': False, 'error': 'Email já cadastrado'}), 400
+
+        new_user = User(
+            name=data['name'].strip(),
+            email=email,
+            phone=data['phone'].strip(),
+            address=data['address'].strip(),
+            created_at=datetime.now(timezone.utc)
+        )
+        new_user.password_hash = passwords.PASSWORD_HASHER.run(hash_password, data['password'])
+        db.session.add(new_user)
+        bump_store_stats(users=1)
+        db.session.flush()
+        new_user_id = new_user.id # Lido antes do commit, que expira o objeto (ler depois faria outra consulta)
+        db.session.commit()
+        invalidate_response_cache() # Contagem de usuários em /api/admin/stats
+        logger.debug("Usuário criado e salvo no DB: %s com ID: %s", email, new_user_id)
+        return jsonify({
+            'success': True,
+            'message': 'Usuário cadastrado com sucesso',
+            'user_id': new_user_id
+        }), 201
+
+    except PasswordHashBusy as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erro no cadastro de usuário: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@auth_bp.route('/api/login', methods=['POST'])
+def api_login():
+    """Rota para autenticação de usuário e emissão de token JWT."""
+    logger.debug("Rota /api/login chamada")
+
+    try:
+        limited = rate_limited(('login-ip', request.remote_addr))
+        if limited:
+            return limited
+
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'error': 'Nenhum dado recebido'}), 400
+
+        email = data.get('email', '').lower().strip()
+        password = data.get('password', '')
+
+        if not email or not password:
+            return jsonify({'success': False, 'error': 'Email e senha obrigatórios'}), 400
+
+        # Antes do bcrypt: tentativas em excesso numa conta não chegam a ocupar o pool de hash
+        limited = rate_limited(('login-email', email))
+        if limited:
+            return limited
+
+        logger.debug("Tentativa de login para: %s", email)
+
+        # Verifica se é o usuário master primeiro
+        user = None
+        if email == MASTER_USER['email']:
+            # No ambiente de deploy (Render), o usuário master deve existir no DB.
+            # Se não existir, pode ter havido um problema na migração inicial.
+            if MASTER_USER['id'] is None:
+                user = User.query.filter_by(email=MASTER_USER['email']).first() # Reaproveitado abaixo se a senha não for a padrão
+                if user:
+                    MASTER_USER['id'] = user.id
+                else:
+                    # Este caso deve ser raro se 'flask db upgrade' foi rodado no Render Shell
+                    logger.warning("O usuário master não existe no DB. Por favor, execute 'flask db upgrade' no shell do Render uma única vez.")
+                    return jsonify({'success': False, 'error': 'Erro na inicialização do usuário master. Tente novamente após aplicar as migrações.'}), 500
+            
+            master_password_ok, _ = passwords.PASSWORD_HASHER.run(verify_password, password, get_master_password_hash())
+            if master_password_ok:
+                user_data = {k: v for k, v in MASTER_USER.items() if k not in ['password_hash']}
+                user_data['createdAt'] = user_data['createdAt'].isoformat()
+                token = generate_token(MASTER_USER['id'], user_data)
+                logger.debug("Login master realizado: %s", email)
+                return jsonify({
+                    'success': True,
+                    'token': token,
+                    'user': user_data
+                })
+
+        if user is None:
+            user = User.query.filter_by(email=email).first()
+
+        # Email desconhecido também passa por um bcrypt (contra um hash fixo), para não responder mais rápido
+        password_hash = user.password_hash if user else passwords.get_dummy_password_hash()
+        is_valid, needs_rehash = passwords.PASSWORD_HASHER.run(verify_password, password, password_hash)
+        if user is None or not is_valid:
+            logger.debug("Email ou senha incorretos para: %s", email)
+            return jsonify({'success': False, 'error': 'Email ou senha incorretos'}), 401
+
+        # Migração transparente: hash SHA-256 legado (ou de custo antigo) é refeito com o custo atual
+        if needs_rehash:
+            user.password_hash = passwords.PASSWORD_HASHER.run(hash_password, password)
+            db.session.commit()
+            logger.info("Hash de senha atualizado para: %s", email)
+
+        user_data = user.to_dict(include_password_hash=False)
+        token = generate_token(user.id, user_data)
+
+        logger.debug("Login realizado com sucesso: %s", email)
+        return jsonify({
+            'success': True,
+            'token': token,
+            'user': user_data
+        })
+
+    except PasswordHashBusy as e:
+        return jsonify({'success': False, 'error': str(e)}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erro no login: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@auth_bp.route('/api/verify-token', methods=['POST'])
+def api_verify_token():
+    """Rota para verificar a validade de um token JWT."""
+    logger.debug("Rota /api/verify-token chamada")
+
+    try:
+        user = get_current_user(request)
+        if user:
+            return jsonify({'success': True, 'user': user})
+        else:
+            return jsonify({'success': False, 'error': 'Token inválido ou expirado'}), 401
+
+    except Exception as e:
+        logger.error("Erro na verificação de token: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,221 @@
+import json
+import time
+from datetime import datetime, timezone # Importa timezone para melhor manejo de datas UTC
+from decimal import Decimal
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..auth import get_current_user, get_request_token, get_token_user, is_master_user, load_user, verify_token
+from ..catalog import CATALOG, PIZZAS_CACHE_CONTROL
+from ..conditional import make_etag, not_modified, table_version, with_validators
+from ..events import SSE_AUTH_RECHECK_SECONDS, SSE_KEEPALIVE_SECONDS, get_order_events, publish_order_event
+from ..extensions import db
+from ..idempotency import idempotent
+from ..logs import logger
+from ..models import Order, OrderHistory
+from ..order_items import insert_order_items, order_item_rows
+from ..ratelimit import rate_limited
+from ..response_cache import invalidate_response_cache
+from ..serialization import select_json_rows
+from ..stats import bump_store_stats, status_count_deltas
+
+orders_bp = Blueprint('orders', __name__)
+
+@orders_bp.route('/api/orders', methods=['POST'])
+@idempotent('orders')
+def api_create_order():
+    """
+    Rota para criar um novo pedido de pizza.
+    Com o cabeçalho Idempotency-Key, repetições da mesma requisição devolvem o pedido já criado.
+    """
+    logger.debug("Rota /api/orders (POST) chamada")
+
+    try:
+        limited = rate_limited(('orders-ip', request.remote_addr))
+        if limited:
+            return limited
+
+        # get_current_user já traz (do cache ou do banco) os dados necessários do cliente
+        user = get_current_user(request)
+        if not user:
+            return jsonify({'success': False, 'error': 'Não autenticado'}), 401
+
+        limited = rate_limited(('orders-user', user['id']))
+        if limited:
+            return limited
+
+        data = request.get_json()
+
+        if not data or not data.get('items'):
+            return jsonify({'success': False, 'error': 'Selecione pelo menos uma pizza'}), 400
+
+        catalog = CATALOG.get()
+        total = Decimal('0.00')
+        pizzas = []
+        for item_name_raw in data['items']:
+            item_name = item_name_raw.strip()
+            pizza = catalog.find_by_name(item_name)
+            if pizza is None:
+                return jsonify({'success': False, 'error': f'Item de pizza inválido: {item_name}'}), 400
+            total += pizza['price']
+            pizzas.append(pizza)
+
+        if total == 0:
+            return jsonify({'success': False, 'error': 'Nenhuma pizza válida selecionada'}), 400
+
+        new_order = Order(
+            user_id=user['id'],
+            customer_name=user['name'],
+            customer_phone=user['phone'],
+            customer_address=user['address'],
+            total=total,
+            status='pendente',
+            created_at=datetime.now(timezone.utc),
+            updated_at=datetime.now(timezone.utc)
+        )
+
+        db.session.add(new_order)
+        db.session.flush() # Gera o id do pedido para os itens
+        # Itens em um INSERT em lote; o relacionamento já recebe as linhas gravadas (sem reler o pedido)
+        set_committed_value(new_order, 'items', insert_order_items(order_item_rows(new_order.id, pizzas)))
+        bump_store_stats(active_orders=1, pending_revenue=total, **status_count_deltas({'pendente': 1}))
+        order_data = new_order.to_dict()
+        db.session.commit()
+        invalidate_response_cache()
+        logger.debug("Pedido criado e salvo no DB: ID %s para usuário %s", order_data['id'], user['email']) # new_order.id releria o pedido
+        publish_order_event('order_created', order_data)
+        return jsonify({'success': True, 'order': order_data}), 201
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erro ao criar pedido: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@orders_bp.route('/api/my-orders', methods=['GET'])
+def api_my_orders():
+    """Rota para o usuário visualizar seus pedidos ativos."""
+    logger.debug("Rota /api/my-orders (GET) chamada")
+
+    try:
+        user_data = get_token_user(request)
+        if not user_data:
+            return jsonify({'success': False, 'error': 'Não autenticado'}), 401
+
+        version = table_version(Order, Order.user_id == user_data['id'], timestamp_column=Order.updated_at)
+        etag = make_etag('my-orders', user_data['id'], version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        user_orders_json = select_json_rows(Order.query.filter_by(user_id=user_data['id']).order_by(Order.created_at.desc()), Order)
+
+        return with_validators(jsonify({'success': True, 'orders': user_orders_json}), etag)
+
+    except Exception as e:
+        logger.error("Erro ao buscar pedidos do usuário: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@orders_bp.route('/api/my-history', methods=['GET'])
+def api_my_history():
+    """Rota para o usuário visualizar seu histórico de pedidos concluídos."""
+    logger.debug("Rota /api/my-history (GET) chamada")
+
+    try:
+        user_data = get_token_user(request)
+        if not user_data:
+            return jsonify({'success': False, 'error': 'Não autenticado'}), 401
+
+        version = table_version(OrderHistory, OrderHistory.user_id == user_data['id'])
+        etag = make_etag('my-history', user_data['id'], version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        user_history_json = select_json_rows(OrderHistory.query.filter_by(user_id=user_data['id']).order_by(OrderHistory.completed_at.desc()), OrderHistory)
+
+        return with_validators(jsonify({'success': True, 'orders': user_history_json}), etag)
+
+    except Exception as e:
+        logger.error("Erro ao buscar histórico do usuário: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def stream_channels(token: str) -> list[str] | None:
+    """
+    Canais do stream para o token: 'admin' só se o registro atual do usuário for master (não a claim
+    'role' do token, que continua valendo por 7 dias depois de o usuário ser excluído ou rebaixado).
+    None se o token for inválido ou o usuário não existir mais.
+    """
+    user_id = verify_token(token)
+    user = load_user(user_id) if user_id is not None else None
+    if user is None:
+        return None
+    return ['admin'] if is_master_user(user) else [f'user:{user_id}']
+
+@orders_bp.route('/api/orders/stream', methods=['GET'])
+def api_orders_stream():
+    """
+    Stream (Server-Sent Events) das mudanças de pedidos.
+    O cliente recebe só os pedidos dele; o admin recebe todos. Como o EventSource do navegador não
+    envia cabeçalhos, o token também é aceito na query string (?token=...).
+    A cada SSE_AUTH_RECHECK_SECONDS o token e o usuário são reconferidos; se os canais mudarem (token
+    expirado, usuário excluído ou rebaixado), o stream é fechado e o navegador reconecta com as permissões novas.
+    Cada conexão aberta ocupa uma thread: use workers gthread/gevent na Gunicorn.
+    """
+    logger.debug("Rota /api/orders/stream (GET) chamada")
+
+    token = get_request_token(request) or request.args.get('token')
+    channels = stream_channels(token) if token else None
+    if channels is None:
+        return jsonify({'success': False, 'error': 'Não autenticado'}), 401
+
+    app = current_app._get_current_object()
+    subscription = get_order_events().subscribe(channels)
+
+    def still_allowed() -> bool:
+        # O generator roda depois do fim da requisição: contexto próprio (e sessão do banco devolvida ao sair)
+        with app.app_context():
+            return stream_channels(token) == channels
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            recheck_at = time.monotonic() + SSE_AUTH_RECHECK_SECONDS
+            while True:
+                if time.monotonic() >= recheck_at:
+                    if not still_allowed():
+                        logger.info("Stream de pedidos encerrado: permissões mudaram (canais %s)", channels)
+                        return
+                    recheck_at = time.monotonic() + SSE_AUTH_RECHECK_SECONDS
+                event = subscription.get(timeout=min(SSE_KEEPALIVE_SECONDS, max(recheck_at - time.monotonic(), 0.1)))
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                data = json.dumps(event['order'], ensure_ascii=False)
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@orders_bp.route('/api/pizzas', methods=['GET'])
+def api_pizzas():
+    """Rota para retornar a lista de pizzas e seus preços."""
+    logger.debug("Rota /api/pizzas (GET) chamada")
+
+    try:
+        # Corpo e ETag vêm prontos do catálogo: nada é montado nem serializado por requisição
+        catalog = CATALOG.get()
+        cached = not_modified(request, catalog.version, PIZZAS_CACHE_CONTROL)
+        if cached:
+            return cached
+
+        response = Response(catalog.response_body, mimetype='application/json')
+        return with_validators(response, catalog.version, PIZZAS_CACHE_CONTROL)
+
+    except Exception as e:
+        logger.error("Erro ao buscar pizzas: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
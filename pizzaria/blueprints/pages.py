@@ -0,0 +1,72 @@
+from flask import Blueprint, jsonify, redirect, render_template, request, url_for
+
+from ..extensions import db
+from ..logs import logger
+
+pages_bp = Blueprint('pages', __name__)
+
+@pages_bp.route('/admin.html')
+def admin_page():
+    """Serve a página HTML do painel administrativo."""
+    logger.debug("Servindo admin.html")
+    try:
+        return render_template('admin.html')
+    except Exception:
+        return "admin.html não encontrado no diretório 'templates'", 404
+
+@pages_bp.route('/admin')
+def admin_redirect():
+    """Redireciona de /admin para /admin.html."""
+    logger.debug("Redirecionando /admin para /admin.html")
+    return redirect(url_for('pages.admin_page'))
+
+@pages_bp.route('/')
+def index():
+    """Serve a página HTML principal da aplicação."""
+    logger.debug("Servindo index.html")
+    try:
+        return render_template('index.html')
+    except Exception:
+        return "index.html não encontrado no diretório 'templates'", 404
+
+@pages_bp.route('/debug.html')
+def debug_page():
+    """Serve a página HTML de debug."""
+    logger.debug("Servindo debug.html")
+    try:
+        return render_template('debug.html')
+    except Exception:
+        return "debug.html não encontrado no diretório 'templates'", 404
+
+@pages_bp.route('/test.html')
+def test_page():
+    """Serve a página HTML de teste."""
+    logger.debug("Servindo test.html")
+    try:
+        return render_template('test.html')
+    except Exception:
+        return "test.html não encontrado no diretório 'templates'", 404
+
+@pages_bp.route('/test-simple.html')
+def test_simple():
+    """Serve uma página HTML de teste simplificada."""
+    logger.debug("Servindo test-simple.html")
+    try:
+        return render_template('test-simple.html')
+    except Exception:
+        return "test-simple.html não encontrado no diretório 'templates'", 404
+
+# --- TRATAMENTO DE ERROS GLOBAIS ---
+
+@pages_bp.app_errorhandler(404)
+def not_found(error):
+    """Manipulador de erro para rotas não encontradas (404 Not Found)."""
+    logger.error("Rota não encontrada: %s", request.path)
+    return jsonify({'success': False, 'error': 'Rota não encontrada. Verifique o URL. :('}), 404
+
+@pages_bp.app_errorhandler(500)
+def internal_error(error):
+    """Manipulador de erro para erros internos do servidor (500 Internal Server Error)."""
+    db.session.rollback() # Garante que transações pendentes sejam desfeitas em caso de erro 500
+    logger.error("Erro interno do servidor: %s", error)
+    return jsonify({'success': False, 'error': 'Erro interno do servidor. Tente novamente mais tarde.'}), 500
@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# --- Cache em memória com expiração (TTL) ---
+class TTLCache:
+    """
+    Cache LRU em memória, com tempo de expiração por entrada e seguro para uso entre threads.
+    Cada worker da Gunicorn tem a sua própria instância (o cache não é compartilhado entre processos).
+    """
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0 # Entradas removidas pelo limite de tamanho (LRU), não por expiração
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+# --- Backends do cache de respostas ---
+# Interface mínima (get/set/delete/clear + contadores com incr/counter) que um Redis implementa de
+# forma nativa. Os valores são dicionários serializáveis em JSON.
+class MemoryCacheBackend:
+    """Backend em memória (padrão): LRU com TTL, por processo."""
+    name = 'memory'
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self._entries = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self._counters = {} # Fora do LRU: um contador nunca pode ser descartado
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        return self._entries.get(key)
+
+    def set(self, key: str, value: dict):
+        self._entries.set(key, value)
+
+    def delete(self, key: str):
+        self._entries.delete(key)
+
+    def clear(self):
+        self._entries.clear()
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def info(self) -> dict:
+        return {'entries': len(self._entries), 'evictions': self._entries.evictions}
+
+class RedisCacheBackend:
+    """
+    Backend compartilhado entre workers, sobre um cliente com a API do redis-py (get/set com ex/
+    delete/incr/scan_iter). A expiração e o despejo ficam com o Redis (configure maxmemory-policy).
+    """
+    name = 'redis'
+
+    def __init__(self, client, ttl_seconds: float, prefix: str = 'pizzaria:cache:'):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key: str):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict):
+        self.client.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=max(int(self.ttl_seconds), 1))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + 'counter:' + key))
+
+    def counter(self, key: str) -> int:
+        return int(self.client.get(self.prefix + 'counter:' + key) or 0)
+
+    def info(self) -> dict:
+        return {}
+
+class ResponseCache:
+    """
+    Cache de respostas de leitura, chaveado por endpoint + parâmetros + geração.
+    invalidate() só incrementa a geração: as entradas antigas deixam de ser encontradas e saem
+    do cache pelo LRU/TTL, sem precisar varrer chaves.
+    A chave é calculada uma vez, antes de montar a resposta, e a mesma chave é usada para gravá-la:
+    se houver uma invalidação no meio, o corpo (já velho) fica na geração anterior, onde ninguém o procura.
+    """
+    GENERATION_KEY = 'generation'
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.invalidations = 0
+
+    def key(self, endpoint: str, params) -> str:
+        """Chave do endpoint com esses parâmetros na geração atual."""
+        generation = self.backend.counter(self.GENERATION_KEY)
+        return f'{endpoint}:{generation}:{json.dumps(sorted(params), separators=(",", ":"))}'
+
+    def get(self, endpoint: str, key: str) -> dict | None:
+        value = self.backend.get(key)
+        with self._lock:
+            counts = self.hits if value is not None else self.misses
+            counts[endpoint] = counts.get(endpoint, 0) + 1
+        return value
+
+    def set(self, key: str, value: dict):
+        """Grava sob uma chave obtida antes de montar a resposta (não relê a geração)."""
+        self.backend.set(key, value)
+
+    def invalidate(self):
+        self.backend.incr(self.GENERATION_KEY)
+        with self._lock:
+            self.invalidations += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return dict(self.backend.info(), backend=self.backend.name, hits=dict(self.hits),
+                        misses=dict(self.misses), invalidations=self.invalidations)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+
+from .logs import logger
+
+# --- Dados das pizzas (catálogo padrão, usado quando PIZZA_CATALOG_FILE não está definido) ---
+PIZZA_PRICES = {
+    'margherita': 25.00,
+    'pepperoni': 30.00,
+    'calabresa': 23.00,
+    'quatro-queijos': 32.00,
+    'Especial-Del-Gatito': 35.00,
+    'Hawaiana': 30.00
+}
+
+PIZZA_NAMES = {
+    'margherita': 'Margherita',
+    'pepperoni': 'Pepperoni',
+    'calabresa': 'Calabresa',
+    'quatro-queijos': 'Quatro Queijos',
+    'Especial-Del-Gatito': 'Especial Del Gatito',
+    'Hawaiana': 'Hawaiana'
+}
+
+# --- Catálogo de Pizzas (índices pré-calculados e recarga a quente) ---
+# O catálogo padrão vem de PIZZA_NAMES/PIZZA_PRICES. Se PIZZA_CATALOG_FILE apontar para um JSON
+# no formato [{"id": ..., "name": ..., "price": "25.00"}, ...], ele é usado no lugar, e cada worker
+# recarrega o arquivo sozinho quando ele muda (verificação no máximo a cada CATALOG_RELOAD_SECONDS).
+PIZZA_CATALOG_FILE = os.getenv('PIZZA_CATALOG_FILE')
+CATALOG_RELOAD_SECONDS = float(os.getenv('CATALOG_RELOAD_SECONDS', '5'))
+
+# O navegador pode reaproveitar o catálogo por alguns minutos (e depois revalida pelo ETag)
+PIZZAS_CACHE_CONTROL = 'public, max-age=300'
+
+class PizzaCatalog:
+    """
+    Catálogo imutável: índice nome de exibição -> pizza, índice id -> preço (Decimal exato)
+    e o corpo JSON de /api/pizzas já serializado.
+    """
+
+    def __init__(self, pizzas: list[dict]):
+        self.pizzas = tuple(
+            {'id': pizza['id'], 'name': pizza['name'], 'price': Decimal(str(pizza['price'])).quantize(Decimal('0.01'))}
+            for pizza in pizzas
+        )
+        self.by_name = {pizza['name']: pizza for pizza in self.pizzas}
+        self.prices = {pizza['id']: pizza['price'] for pizza in self.pizzas}
+
+        public_pizzas = [{'id': pizza['id'], 'name': pizza['name'], 'price': float(pizza['price'])} for pizza in self.pizzas]
+        self.response_body = json.dumps({'success': True, 'pizzas': public_pizzas}, ensure_ascii=False).encode('utf-8')
+        self.version = hashlib.sha1(self.response_body).hexdigest()
+
+    def find_by_name(self, name: str) -> dict | None:
+        return self.by_name.get(name)
+
+    @classmethod
+    def from_defaults(cls):
+        return cls([{'id': key, 'name': name, 'price': PIZZA_PRICES[key]} for key, name in PIZZA_NAMES.items()])
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, encoding='utf-8') as catalog_file:
+            return cls(json.load(catalog_file))
+
+class CatalogLoader:
+    """Guarda o catálogo atual do worker e o recarrega quando o arquivo de origem muda."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._catalog = None
+
+    def get(self) -> PizzaCatalog:
+        if self._catalog is None or (self.path and time.monotonic() - self._checked_at >= CATALOG_RELOAD_SECONDS):
+            self._reload_if_changed()
+        return self._catalog
+
+    def _reload_if_changed(self):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if not self.path:
+                if self._catalog is None:
+                    self._catalog = PizzaCatalog.from_defaults()
+                return
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime != self._mtime:
+                    self._catalog = PizzaCatalog.from_file(self.path)
+                    self._mtime = mtime
+                    logger.info("Catálogo de pizzas carregado de %s (versão %s)", self.path, self._catalog.version[:8])
+            except (OSError, ValueError, KeyError, TypeError, ArithmeticError) as e:
+                # Arquivo ausente ou inválido (JSON quebrado, campo faltando, estrutura errada, preço que não é
+                # número: decimal.InvalidOperation é um ArithmeticError): mantém o catálogo anterior (ou o padrão)
+                logger.error("Falha ao carregar o catálogo de %s: %s", self.path, e)
+                if self._catalog is None:
+                    self._catalog = PizzaCatalog.from_defaults()
+
+CATALOG = CatalogLoader(PIZZA_CATALOG_FILE)
+
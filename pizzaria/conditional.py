@@ -0,0 +1,44 @@
+import hashlib
+import json
+
+from flask import Response
+from sqlalchemy import func
+
+from .extensions import db
+
+# --- Respostas Condicionais (ETag / If-None-Match) ---
+# As rotas de leitura calculam um validador barato (contagem + maiores id/timestamp, numa única
+# consulta agregada que usa os índices) antes de buscar e serializar as linhas. Se o navegador
+# enviar o mesmo ETag em If-None-Match, a resposta é 304 sem corpo.
+PRIVATE_REVALIDATE = 'private, no-cache'
+
+def make_etag(*parts) -> str:
+    """Gera um ETag a partir das partes que identificam a versão da resposta."""
+    raw = json.dumps(parts, default=str, separators=(',', ':'))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def table_version(model, *criteria, timestamp_column=None) -> tuple:
+    """
+    Versão de um conjunto de linhas sem carregá-las: (count, max(id), max(timestamp)).
+    Qualquer inserção, exclusão ou atualização de timestamp muda a tupla.
+    """
+    columns = [func.count(model.id), func.max(model.id)]
+    if timestamp_column is not None:
+        columns.append(func.max(timestamp_column))
+    return tuple(db.session.query(*columns).filter(*criteria).one())
+
+def not_modified(request_obj, etag: str, cache_control: str = PRIVATE_REVALIDATE):
+    """Retorna uma resposta 304 se o cliente já tiver essa versão; caso contrário, None."""
+    if request_obj.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
+    return None
+
+def with_validators(response, etag: str, cache_control: str = PRIVATE_REVALIDATE):
+    """Anexa o ETag e o Cache-Control a uma resposta 200."""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
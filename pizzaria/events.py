@@ -0,0 +1,153 @@
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import text
+
+from .extensions import db
+from .logs import logger
+
+# --- Eventos de Pedidos (pub/sub para o stream SSE) ---
+# Cada mudança em um pedido é publicada nos canais 'admin' (painel) e 'user:<id>' (cliente dono).
+# O broker em memória só alcança clientes conectados no mesmo processo; com vários workers da
+# Gunicorn use ORDER_EVENTS_BACKEND=postgres, que distribui os eventos via LISTEN/NOTIFY.
+ORDER_EVENTS_CHANNEL = 'order_events'
+SSE_KEEPALIVE_SECONDS = 15
+# Streams abertos reconferem token e usuário a cada SSE_AUTH_RECHECK_SECONDS (ver api_orders_stream)
+SSE_AUTH_RECHECK_SECONDS = float(os.getenv('SSE_AUTH_RECHECK_SECONDS', '60'))
+
+class OrderEventSubscription:
+    """Fila de eventos de um cliente conectado ao stream."""
+
+    def __init__(self, broker, channels: list[str], max_pending: int = 100):
+        self.broker = broker
+        self.channels = channels
+        self.queue = queue.Queue(maxsize=max_pending)
+
+    def get(self, timeout: float) -> dict | None:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class InMemoryOrderEventBroker:
+    """Pub/sub em memória, por processo."""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels: list[str]) -> OrderEventSubscription:
+        subscription = OrderEventSubscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: OrderEventSubscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return len({subscription for subscribers in self._subscribers.values() for subscription in subscribers})
+
+    def publish(self, channels: list[str], event: dict):
+        self.deliver(channels, event)
+
+    def deliver(self, channels: list[str], event: dict):
+        """Entrega o evento aos assinantes locais. Clientes lentos com a fila cheia perdem o evento."""
+        with self._lock:
+            targets = {subscription for channel in channels for subscription in self._subscribers.get(channel, ())}
+        for subscription in targets:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                logger.warning("Fila de eventos cheia, evento descartado para %s", subscription.channels)
+
+class PostgresOrderEventBroker(InMemoryOrderEventBroker):
+    """
+    Pub/sub entre workers usando LISTEN/NOTIFY do PostgreSQL.
+    publish() envia NOTIFY; uma thread por worker escuta o canal e entrega aos assinantes locais.
+    """
+
+    def __init__(self, database_url: str):
+        super().__init__()
+        self.database_url = database_url
+        self._listener = None
+
+    def publish(self, channels: list[str], event: dict):
+        payload = json.dumps({'channels': channels, 'event': event}, ensure_ascii=False)
+        with db.engine.connect() as conn:
+            conn.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': ORDER_EVENTS_CHANNEL, 'payload': payload})
+            conn.commit()
+
+    def subscribe(self, channels: list[str]) -> OrderEventSubscription:
+        self._ensure_listener()
+        return super().subscribe(channels)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='order-events-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+        while True:
+            try:
+                conn = psycopg2.connect(self.database_url)
+                conn.autocommit = True
+                conn.cursor().execute(f'LISTEN {ORDER_EVENTS_CHANNEL}')
+                while True:
+                    if select.select([conn], [], [], SSE_KEEPALIVE_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        message = json.loads(conn.notifies.pop(0).payload)
+                        self.deliver(message['channels'], message['event'])
+            except Exception as e:
+                logger.error("Conexão LISTEN de eventos de pedidos caiu, reconectando: %s", e)
+                time.sleep(1)
+
+def create_order_event_broker(database_url: str):
+    backend = os.getenv('ORDER_EVENTS_BACKEND', 'memory')
+    if backend == 'postgres':
+        return PostgresOrderEventBroker(database_url)
+    return InMemoryOrderEventBroker()
+
+def init_order_events(app):
+    """Cria o broker do app (um por processo/worker) em app.extensions['order_events']."""
+    app.extensions['order_events'] = create_order_event_broker(app.config['SQLALCHEMY_DATABASE_URI'])
+
+def get_order_events():
+    """Broker de eventos do app corrente."""
+    return current_app.extensions['order_events']
+
+def order_events_cross_process() -> bool:
+    """Indica se os eventos publicados neste processo chegam aos streams abertos em outros processos."""
+    return isinstance(get_order_events(), PostgresOrderEventBroker)
+
+def publish_order_event(event_type: str, order: dict):
+    """Publica a mudança de um pedido para o painel admin e para o cliente dono do pedido."""
+    channels = ['admin']
+    if order.get('userId') is not None:
+        channels.append(f"user:{order['userId']}")
+    try:
+        get_order_events().publish(channels, {'type': event_type, 'order': order})
+    except Exception as e:
+        # O pedido já foi gravado; uma falha na notificação não deve virar erro para quem chamou
+        logger.error("Falha ao publicar evento %s: %s", event_type, e)
+
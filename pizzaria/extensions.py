@@ -0,0 +1,9 @@
+from flask_cors import CORS
+from flask_migrate import Migrate # IMPORTANTE: Adicionado para gerenciar migrações de banco de dados
+from flask_sqlalchemy import SQLAlchemy
+
+# As extensões são criadas sem app e ligadas a ele em create_app() (init_app), para que os
+# modelos e blueprints possam importá-las sem depender de uma instância global do Flask.
+db = SQLAlchemy()
+migrate = Migrate()
+cors = CORS()
@@ -0,0 +1,216 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import date, datetime, timezone
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .config import BASE_DIR
+from .extensions import db
+from .logs import logger
+from .models import OrderHistory, OrderHistoryKey, HistoryMonthSummary
+from .order_items import delete_order_items
+from .response_cache import invalidate_response_cache
+
+# --- Particionamento e Arquivamento do Histórico ---
+# No PostgreSQL, order_history é particionada por mês de completed_at (order_history_yAAAAmMM),
+# com uma partição DEFAULT para o que cair fora das partições criadas. 'flask history-partitions'
+# cria as partições dos próximos meses (rode uma vez por mês, ex.: cron). No SQLite a tabela é
+# única e o arquivamento apaga o intervalo do mês usando o índice em completed_at.
+#
+# 'flask archive-history' exporta os meses antigos para arquivos NDJSON comprimidos (gzip, um
+# pedido por linha, no mesmo formato da API), grava o resumo do mês em order_history_monthly e só
+# então remove as linhas (DETACH + DROP da partição no PostgreSQL, DELETE no SQLite).
+HISTORY_PARTITIONS_AHEAD = int(os.getenv('HISTORY_PARTITIONS_AHEAD', '3'))
+HISTORY_ARCHIVE_DIR = os.getenv('HISTORY_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
+HISTORY_RETENTION_MONTHS = int(os.getenv('HISTORY_RETENTION_MONTHS', '12'))
+ARCHIVE_BATCH_SIZE = 1000
+
+def claim_history_keys(order_ids) -> set[int]:
+    """
+    Reserva em order_history_keys os pedidos que vão entrar no histórico, na transação corrente, e
+    devolve os que foram reservados agora. Os que faltarem já estão (ou estiveram, antes de arquivados)
+    no histórico e não podem ser gravados de novo. Duas transações com o mesmo pedido: a segunda
+    espera a primeira na chave primária e não o recebe.
+    """
+    order_ids = sorted(set(order_ids)) # Ordem fixa: transações concorrentes travam as chaves na mesma sequência
+    if not order_ids:
+        return set()
+    insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    return set(db.session.scalars(
+        insert(OrderHistoryKey)
+        .values([{'original_order_id': order_id} for order_id in order_ids])
+        .on_conflict_do_nothing(index_elements=[OrderHistoryKey.original_order_id])
+        .returning(OrderHistoryKey.original_order_id)
+    ))
+
+def month_start(value: datetime | date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f'order_history_y{month.year:04d}m{month.month:02d}'
+
+def uses_partitions() -> bool:
+    """Indica se order_history é uma tabela particionada (só no PostgreSQL, após a migração)."""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return db.session.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'order_history'::regclass)"
+    )).scalar()
+
+def partition_exists(month: date) -> bool:
+    return db.session.execute(text('SELECT to_regclass(:name) IS NOT NULL'), {'name': partition_name(month)}).scalar()
+
+def ensure_history_partitions(months_ahead: int = HISTORY_PARTITIONS_AHEAD) -> list[str]:
+    """Cria as partições do mês atual e dos próximos meses que ainda não existem. Retorna as criadas."""
+    if not uses_partitions():
+        return []
+    created = []
+    current = month_start(datetime.now(timezone.utc))
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if partition_exists(month):
+            continue
+        # Falha se a partição DEFAULT já tiver linhas deste mês; nesse caso os dados ficam onde estão
+        db.session.execute(text(
+            f"CREATE TABLE {partition_name(month)} PARTITION OF order_history "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        created.append(partition_name(month))
+    db.session.commit()
+    return created
+
+def history_months_before(cutoff: date) -> list[date]:
+    """Meses (primeiro dia) que ainda têm linhas em order_history antes do corte."""
+    cutoff_at = datetime(cutoff.year, cutoff.month, 1)
+    oldest = db.session.query(func.min(OrderHistory.completed_at)).filter(OrderHistory.completed_at < cutoff_at).scalar()
+    if oldest is None:
+        return []
+    months = []
+    month = month_start(oldest)
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+def export_month(month: date, directory: str) -> dict | None:
+    """
+    Grava as linhas do mês em <directory>/order_history-AAAA-MM-<data>.ndjson.gz (lendo em lotes).
+    Retorna caminho, contagem, receita e sha256 do arquivo, ou None se o mês estiver vazio.
+    """
+    next_month = add_months(month, 1)
+    start, end = datetime(month.year, month.month, 1), datetime(next_month.year, next_month.month, 1)
+    query = (OrderHistory.query
+             .filter(OrderHistory.completed_at >= start, OrderHistory.completed_at < end)
+             .order_by(OrderHistory.completed_at, OrderHistory.id))
+
+    os.makedirs(directory, exist_ok=True)
+    archived_at = datetime.now(timezone.utc)
+    path = os.path.join(directory, f'order_history-{month:%Y-%m}-{archived_at:%Y%m%d%H%M%S}.ndjson.gz')
+    temp_path = path + '.tmp'
+    count, revenue = 0, 0
+    with gzip.open(temp_path, 'wt', encoding='utf-8') as archive_file:
+        for row in query.yield_per(ARCHIVE_BATCH_SIZE):
+            archive_file.write(json.dumps(row.to_dict(), ensure_ascii=False) + '\n')
+            count += 1
+            revenue += row.total
+    if count == 0:
+        os.remove(temp_path)
+        return None
+    digest = hashlib.sha256()
+    with open(temp_path, 'rb') as archive_file:
+        os.fsync(archive_file.fileno())
+        for chunk in iter(lambda: archive_file.read(1 << 20), b''):
+            digest.update(chunk)
+    os.replace(temp_path, path)
+    return {'path': path, 'orders': count, 'revenue': revenue, 'sha256': digest.hexdigest(), 'start': start, 'end': end}
+
+def archive_history_month(month: date, directory: str = HISTORY_ARCHIVE_DIR) -> dict | None:
+    """
+    Arquiva um mês: exporta o arquivo, soma o resumo em order_history_monthly e remove as linhas,
+    na mesma transação do resumo (se algo falhar, as linhas continuam no banco e o arquivo é só uma cópia).
+    """
+    exported = export_month(month, directory)
+    if exported is None:
+        return None
+
+    try:
+        summary = db.session.get(HistoryMonthSummary, month)
+        if summary is None:
+            summary = HistoryMonthSummary(month=month, orders=0, revenue=0)
+            db.session.add(summary)
+        summary.orders += exported['orders']
+        summary.revenue += exported['revenue']
+        summary.archive_path = exported['path']
+        summary.archived_at = datetime.now(timezone.utc)
+
+        # Itens dos pedidos do mês (order_items guarda o original_order_id do histórico)
+        delete_order_items(db.select(OrderHistory.original_order_id).where(
+            OrderHistory.completed_at >= exported['start'], OrderHistory.completed_at < exported['end']).scalar_subquery())
+        if uses_partitions() and partition_exists(month):
+            db.session.execute(text(f'ALTER TABLE order_history DETACH PARTITION {partition_name(month)}'))
+            db.session.execute(text(f'DROP TABLE {partition_name(month)}'))
+        # Linhas do mês que estejam na partição DEFAULT (ou a tabela inteira, no SQLite)
+        deleted = db.session.execute(
+            db.delete(OrderHistory)
+            .where(OrderHistory.completed_at >= exported['start'], OrderHistory.completed_at < exported['end'])
+        ).rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    invalidate_response_cache()
+    logger.info("Histórico de %s arquivado em %s (%s pedidos, %s removidos da tabela)", month, exported['path'], exported['orders'], deleted)
+    return {'month': month.strftime('%Y-%m'), 'orders': exported['orders'], 'revenue': float(exported['revenue']),
+            'path': exported['path'], 'sha256': exported['sha256']}
+
+def archive_history(before: date, directory: str = HISTORY_ARCHIVE_DIR) -> list[dict]:
+    """Arquiva todos os meses com linhas anteriores a 'before' (primeiro dia de um mês)."""
+    results = []
+    for month in history_months_before(before):
+        result = archive_history_month(month, directory)
+        if result:
+            results.append(result)
+    return results
+
+@click.command('history-partitions')
+@click.option('--months-ahead', default=HISTORY_PARTITIONS_AHEAD, show_default=True, help='Meses futuros com partição criada.')
+@with_appcontext
+def history_partitions_command(months_ahead):
+    """Cria as partições mensais de order_history que faltam (PostgreSQL)."""
+    if not uses_partitions():
+        print("[INFO] order_history não é particionada neste banco; nada a fazer.")
+        return
+    created = ensure_history_partitions(months_ahead)
+    print(f"[INFO] Partições criadas: {', '.join(created) if created else 'nenhuma'}")
+
+@click.command('archive-history')
+@click.option('--before', 'before_raw', help='Arquiva os meses anteriores a AAAA-MM (padrão: mantém HISTORY_RETENTION_MONTHS meses).')
+@click.option('--dir', 'directory', default=HISTORY_ARCHIVE_DIR, show_default=True, help='Diretório dos arquivos .ndjson.gz.')
+@with_appcontext
+def archive_history_command(before_raw, directory):
+    """Exporta meses antigos do histórico para NDJSON comprimido e os remove da tabela."""
+    if before_raw:
+        try:
+            before = month_start(datetime.strptime(before_raw, '%Y-%m'))
+        except ValueError:
+            raise click.BadParameter('use o formato AAAA-MM', param_hint='--before')
+    else:
+        before = add_months(month_start(datetime.now(timezone.utc)), -HISTORY_RETENTION_MONTHS)
+
+    ensure_history_partitions()
+    results = archive_history(before, directory)
+    if not results:
+        print(f"[INFO] Nenhum pedido no histórico antes de {before:%Y-%m}.")
+    for result in results:
+        print(f"[INFO] {result['month']}: {result['orders']} pedidos, receita {result['revenue']:.2f} -> {result['path']}")
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, jsonify, make_response, request
+
+from .auth import get_token_user
+from .logs import logger
+
+# --- Chaves de Idempotência (cabeçalho Idempotency-Key) ---
+# Clientes que repetem POST /api/orders após um timeout mandam o mesmo Idempotency-Key. A primeira
+# requisição com a chave é processada e a resposta fica guardada por IDEMPOTENCY_TTL segundos;
+# as repetições recebem a mesma resposta (com 'Idempotent-Replayed: true'), sem recalcular nem
+# inserir de novo. Uma repetição que chega enquanto a primeira ainda está em andamento espera por
+# ela (até IDEMPOTENCY_WAIT_SECONDS; depois, 409 + Retry-After).
+#
+# As chaves são por usuário e por rota. Reusar a chave com outro corpo é erro (422). Respostas 5xx
+# e 429 não são guardadas: a repetição processa o pedido de novo.
+#
+# IDEMPOTENCY_BACKEND:
+#   memory (padrão) - por worker; repetições que caem em outro worker não são deduplicadas.
+#   redis           - compartilhado via REDIS_URL (requer 'pip install redis').
+#   off             - ignora o cabeçalho.
+IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND', 'memory')
+IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL', '86400'))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', '10'))
+# Uma requisição em andamento há mais que isso é considerada perdida (worker reiniciado no meio)
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv('IDEMPOTENCY_LOCK_SECONDS', '30'))
+IDEMPOTENCY_SWEEP_SECONDS = 60
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# --- Backends ---
+# Interface:
+#   begin(key, fingerprint) -> ('new', None) | ('in_flight', None) | ('done', entrada)
+#   wait(key, timeout)      -> entrada concluída ou None
+#   complete(key, entrada)  /  abandon(key)
+# A entrada é um dicionário serializável: fingerprint, status, body e mimetype.
+class MemoryIdempotencyStore:
+    """Registros em memória, por processo, com varredura periódica dos expirados."""
+    name = 'memory'
+
+    def __init__(self, ttl_seconds: float = IDEMPOTENCY_TTL, lock_seconds: float = IDEMPOTENCY_LOCK_SECONDS,
+                 sweep_seconds: float = IDEMPOTENCY_SWEEP_SECONDS, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.sweep_seconds = sweep_seconds
+        self.clock = clock
+        self._records = {} # chave -> {'expires_at', 'entry' (None em andamento), 'done' (threading.Event)}
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + sweep_seconds
+
+    def begin(self, key: str, fingerprint: str):
+        now = self.clock()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            record = self._records.get(key)
+            if record is not None and record['expires_at'] > now:
+                return ('done', record['entry']) if record['entry'] is not None else ('in_flight', None)
+            self._records[key] = {'expires_at': now + self.lock_seconds, 'entry': None, 'done': threading.Event()}
+            return 'new', None
+
+    def wait(self, key: str, timeout: float):
+        with self._lock:
+            record = self._records.get(key)
+        if record is None:
+            return None
+        record['done'].wait(timeout)
+        return record['entry']
+
+    def complete(self, key: str, entry: dict):
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                return
+            record['entry'] = entry
+            record['expires_at'] = self.clock() + self.ttl_seconds
+        record['done'].set()
+
+    def abandon(self, key: str):
+        with self._lock:
+            record = self._records.pop(key, None)
+        if record is not None:
+            record['done'].set() # Quem esperava recebe None e tenta de novo
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(self.clock())
+
+    def _sweep(self, now: float) -> int:
+        expired = [key for key, record in self._records.items() if record['expires_at'] <= now]
+        for key in expired:
+            self._records.pop(key)['done'].set()
+        self._next_sweep = now + self.sweep_seconds
+        return len(expired)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
+
+class RedisIdempotencyStore:
+    """Registros compartilhados num Redis (cliente com a API do redis-py). A expiração é do próprio Redis."""
+    name = 'redis'
+    IN_FLIGHT = b'in_flight'
+    POLL_SECONDS = 0.05
+
+    def __init__(self, client, ttl_seconds: float = IDEMPOTENCY_TTL, lock_seconds: float = IDEMPOTENCY_LOCK_SECONDS,
+                 prefix: str = 'pizzaria:idempotency:'):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.prefix = prefix
+
+    def begin(self, key: str, fingerprint: str):
+        if self.client.set(self.prefix + key, self.IN_FLIGHT, nx=True, ex=max(int(self.lock_seconds), 1)):
+            return 'new', None
+        raw = self.client.get(self.prefix + key)
+        if raw is None: # Expirou entre o SET e o GET
+            return self.begin(key, fingerprint)
+        return ('in_flight', None) if raw == self.IN_FLIGHT else ('done', json.loads(raw))
+
+    def wait(self, key: str, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            raw = self.client.get(self.prefix + key)
+            if raw is None:
+                return None
+            if raw != self.IN_FLIGHT:
+                return json.loads(raw)
+            time.sleep(self.POLL_SECONDS)
+        return None
+
+    def complete(self, key: str, entry: dict):
+        self.client.set(self.prefix + key, json.dumps(entry, ensure_ascii=False), ex=max(int(self.ttl_seconds), 1))
+
+    def abandon(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def sweep(self) -> int:
+        return 0
+
+def create_idempotency_store():
+    if IDEMPOTENCY_BACKEND == 'off':
+        return None
+    if IDEMPOTENCY_BACKEND == 'redis':
+        try:
+            import redis
+            return RedisIdempotencyStore(redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0')))
+        except ImportError:
+            logger.warning("Pacote redis não instalado: usando as chaves de idempotência em memória.")
+    return MemoryIdempotencyStore()
+
+_metrics_lock = threading.Lock()
+
+def init_idempotency(app):
+    """Cria o armazenamento de chaves de idempotência do app em app.extensions['idempotency']."""
+    app.extensions['idempotency'] = create_idempotency_store()
+    app.extensions['idempotency_metrics'] = {'replayed': 0, 'waited': 0, 'conflicts': 0}
+
+def get_idempotency_store():
+    return current_app.extensions.get('idempotency')
+
+def get_idempotency_metrics():
+    return current_app.extensions.get('idempotency_metrics')
+
+def count(name: str):
+    with _metrics_lock:
+        current_app.extensions['idempotency_metrics'][name] += 1
+
+def replay_response(entry: dict) -> Response:
+    response = Response(entry['body'], status=entry['status'], mimetype=entry['mimetype'])
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotent(scope: str):
+    """
+    Decorador de rotas POST: com Idempotency-Key, processa a requisição uma única vez por
+    (scope, usuário, chave) e repete a resposta guardada nas tentativas seguintes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            idempotency_key = request.headers.get('Idempotency-Key')
+            store = get_idempotency_store()
+            if not idempotency_key or store is None:
+                return view(*args, **kwargs)
+            if len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+                return jsonify({'success': False, 'error': f'Idempotency-Key deve ter no máximo {MAX_IDEMPOTENCY_KEY_LENGTH} caracteres'}), 400
+
+            user = get_token_user(request)
+            if not user: # A própria rota responde 401
+                return view(*args, **kwargs)
+
+            key = f"{scope}:{user['id']}:{idempotency_key}"
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            try:
+                state, entry = store.begin(key, fingerprint)
+                if state == 'in_flight':
+                    count('waited')
+                    entry = store.wait(key, IDEMPOTENCY_WAIT_SECONDS)
+                    if entry is None:
+                        count('conflicts')
+                        return jsonify({'success': False, 'error': 'Uma requisição com esta Idempotency-Key ainda está em andamento'}), 409, {'Retry-After': '1'}
+            except Exception as e:
+                # Armazenamento fora do ar: processa sem deduplicar em vez de recusar o pedido
+                logger.error("Falha no armazenamento de idempotência: %s", e)
+                return view(*args, **kwargs)
+
+            if entry is not None:
+                if entry['fingerprint'] != fingerprint:
+                    count('conflicts')
+                    return jsonify({'success': False, 'error': 'Idempotency-Key já usada com outro corpo de requisição'}), 422
+                count('replayed')
+                return replay_response(entry)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                store.abandon(key)
+                raise
+            try:
+                if response.status_code >= 500 or response.status_code == 429:
+                    store.abandon(key)
+                else:
+                    store.complete(key, {'fingerprint': fingerprint, 'status': response.status_code,
+                                         'body': response.get_data(as_text=True), 'mimetype': response.mimetype})
+            except Exception as e:
+                # O pedido já foi gravado; a falha só impede a repetição da resposta
+                logger.error("Falha ao gravar a resposta idempotente: %s", e)
+            return response
+        return wrapper
+    return decorator
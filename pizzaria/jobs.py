@@ -0,0 +1,265 @@
+import os
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .analytics import record_sales
+from .events import order_events_cross_process, publish_order_event
+from .extensions import db
+from .history import claim_history_keys
+from .logs import logger
+from .models import Job, Order, OrderHistory
+from .response_cache import invalidate_response_cache
+from .stats import bump_store_stats
+
+# --- Fila de Tarefas (write-behind) ---
+# Trabalho que não precisa acontecer dentro da requisição (mover pedidos entregues para o histórico,
+# o consolidado de pedidos concluídos, notificações) vira uma linha em 'jobs', gravada na mesma
+# transação da escrita que a gerou: se o commit acontece, a tarefa existe. O worker ('flask run-jobs',
+# processo 'worker' do Procfile) pega as tarefas pendentes em lotes de JOB_BATCH_SIZE, agrupa por
+# tipo e chama o handler do tipo uma vez por lote, numa transação que também apaga as tarefas.
+#
+# Se o lote falhar, as tarefas são repetidas uma a uma (uma tarefa com defeito não trava as outras).
+# Cada falha reagenda a tarefa com espera exponencial (JOB_RETRY_BASE_SECONDS × 2^(tentativas-1));
+# depois de JOB_MAX_ATTEMPTS tentativas ela fica com status 'dead' (dead-letter) até alguém rodar
+# 'flask retry-dead-jobs'. Tarefas 'running' há mais de JOB_LOCK_SECONDS (worker morto no meio)
+# voltam para a fila. No PostgreSQL vários workers podem rodar juntos (FOR UPDATE SKIP LOCKED).
+JOB_BATCH_SIZE = int(os.getenv('JOB_BATCH_SIZE', '100'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+JOB_RETRY_BASE_SECONDS = float(os.getenv('JOB_RETRY_BASE_SECONDS', '5'))
+JOB_LOCK_SECONDS = float(os.getenv('JOB_LOCK_SECONDS', '300'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '1'))
+MAX_JOB_ERROR_LENGTH = 2000
+
+# Tipo da tarefa -> função que recebe a lista de payloads do lote. O handler escreve na sessão
+# corrente sem fazer commit; quem chama grava tudo junto com a remoção das tarefas.
+JOB_HANDLERS = {}
+
+def job_handler(kind: str):
+    """Registra a função como handler das tarefas do tipo 'kind'."""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+def enqueue_jobs(kind: str, payloads: list[dict]):
+    """Adiciona as tarefas à transação corrente. Quem chama é responsável pelo commit, junto com a escrita."""
+    if not payloads:
+        return
+    now = datetime.now(timezone.utc)
+    db.session.execute(db.insert(Job), [
+        {'kind': kind, 'payload': payload, 'status': 'pending', 'attempts': 0, 'run_at': now, 'created_at': now}
+        for payload in payloads
+    ])
+
+def claim_jobs(batch_size: int = JOB_BATCH_SIZE) -> list[Job]:
+    """
+    Marca como 'running' até batch_size tarefas vencidas (pendentes ou presas por um worker morto) e
+    devolve essas tarefas. Presas que já esgotaram as tentativas vão direto para 'dead'.
+    """
+    now = datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=JOB_LOCK_SECONDS)
+    db.session.execute(
+        db.update(Job)
+        .where(Job.status == 'running', Job.locked_at < stale_before, Job.attempts >= JOB_MAX_ATTEMPTS)
+        .values(status='dead', locked_at=None, last_error='Worker interrompido durante a última tentativa')
+    )
+    query = (db.select(Job.id)
+             .where(or_(and_(Job.status == 'pending', Job.run_at <= now),
+                        and_(Job.status == 'running', Job.locked_at < stale_before)))
+             .order_by(Job.run_at, Job.id)
+             .limit(batch_size))
+    if db.engine.dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+    job_ids = db.session.scalars(query).all()
+    if job_ids:
+        db.session.execute(
+            db.update(Job).where(Job.id.in_(job_ids))
+            .values(status='running', locked_at=now, attempts=Job.attempts + 1)
+        )
+    db.session.commit()
+    if not job_ids:
+        return []
+    return Job.query.filter(Job.id.in_(job_ids)).order_by(Job.id).all()
+
+def fail_jobs(job_ids: list[int], error: Exception):
+    """Reagenda as tarefas com espera exponencial, ou as manda para 'dead' se esgotaram as tentativas."""
+    now = datetime.now(timezone.utc)
+    message = f'{type(error).__name__}: {error}'[:MAX_JOB_ERROR_LENGTH]
+    for job in Job.query.filter(Job.id.in_(job_ids)):
+        job.locked_at = None
+        job.last_error = message
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            job.status = 'dead'
+            logger.error("Tarefa %s (%s) foi para a dead-letter após %s tentativas: %s", job.id, job.kind, job.attempts, message)
+        else:
+            job.status = 'pending'
+            job.run_at = now + timedelta(seconds=JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+            logger.warning("Tarefa %s (%s) falhou (tentativa %s), nova tentativa em %s: %s", job.id, job.kind, job.attempts, job.run_at, message)
+    db.session.commit()
+
+def run_job_batch(kind: str, jobs: list[tuple[int, dict]]) -> int:
+    """Executa um lote de tarefas do mesmo tipo, dado como [(id, payload)]. Retorna quantas foram concluídas."""
+    job_ids = [job_id for job_id, _ in jobs]
+    try:
+        handler = JOB_HANDLERS.get(kind)
+        if handler is None:
+            raise LookupError(f'Tipo de tarefa desconhecido: {kind}')
+        handler([payload for _, payload in jobs])
+        db.session.execute(db.delete(Job).where(Job.id.in_(job_ids)))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if len(jobs) > 1:
+            logger.warning("Lote de %s tarefas %s falhou (%s); repetindo uma a uma", len(jobs), kind, e)
+            return sum(run_job_batch(kind, [job]) for job in jobs)
+        fail_jobs(job_ids, e)
+        return 0
+    invalidate_response_cache()
+    return len(jobs)
+
+def run_pending_jobs(batch_size: int = JOB_BATCH_SIZE) -> int:
+    """Pega um lote de tarefas vencidas e executa, agrupadas por tipo. Retorna quantas foram pegas."""
+    jobs = claim_jobs(batch_size)
+    jobs_by_kind = {}
+    for job in jobs:
+        jobs_by_kind.setdefault(job.kind, []).append((job.id, job.payload))
+    for kind, kind_jobs in jobs_by_kind.items():
+        started_at = time.perf_counter()
+        done = run_job_batch(kind, kind_jobs)
+        logger.info("Tarefas %s: %s de %s concluídas em %.1f ms", kind, done, len(kind_jobs), (time.perf_counter() - started_at) * 1000)
+    return len(jobs)
+
+def job_queue_stats() -> dict:
+    """
+    Tamanho da fila por status e atraso (lag): há quantos segundos a tarefa pendente vencida mais
+    antiga espera o worker. Um lag que só cresce indica worker parado ou lento demais.
+    """
+    now = datetime.now(timezone.utc)
+    stats = {'pending': 0, 'running': 0, 'dead': 0, 'lag_seconds': 0.0}
+    for status, count in db.session.query(Job.status, func.count(Job.id)).group_by(Job.status):
+        stats[status] = count
+    oldest_due = db.session.query(func.min(Job.run_at)).filter(Job.status == 'pending', Job.run_at <= now).scalar()
+    if oldest_due is not None:
+        stats['lag_seconds'] = max((now.replace(tzinfo=None) - oldest_due.replace(tzinfo=None)).total_seconds(), 0.0)
+    return stats
+
+def retry_dead_jobs(kind: str | None = None) -> int:
+    """Devolve as tarefas da dead-letter para a fila, com as tentativas zeradas. Retorna quantas."""
+    query = db.update(Job).where(Job.status == 'dead')
+    if kind:
+        query = query.where(Job.kind == kind)
+    retried = db.session.execute(query.values(status='pending', attempts=0, run_at=datetime.now(timezone.utc))).rowcount
+    db.session.commit()
+    return retried
+
+# --- Handlers ---
+@job_handler('move_to_history')
+def move_orders_to_history(payloads: list[dict]):
+    """
+    Move os pedidos entregues para o histórico (INSERT em lote + DELETE em lote) e atualiza o consolidado
+    de pedidos concluídos e o de vendas (pizzaria/analytics.py). Pedidos que já saíram de 'entregue' ou não existem mais são ignorados.
+    Os itens ficam onde estão em order_items: o histórico os encontra pelo original_order_id.
+    Cada pedido entra no histórico uma vez só (claim_history_keys).
+    """
+    order_ids = {payload['order_id'] for payload in payloads}
+    orders = Order.query.filter(Order.id.in_(order_ids), Order.status == 'entregue').with_for_update().all()
+    claimed = claim_history_keys(order.id for order in orders)
+    if len(claimed) < len(orders):
+        # Não deveria acontecer (a entrega apaga o pedido na mesma transação): fica em orders para conferência
+        logger.warning("Pedidos já registrados no histórico, ignorados: %s", sorted(order.id for order in orders if order.id not in claimed))
+        orders = [order for order in orders if order.id in claimed]
+    if not orders:
+        return
+
+    now = datetime.now(timezone.utc)
+    history_rows = [{
+        'original_order_id': order.id,
+        'user_id': order.user_id,
+        'customer_name': order.customer_name,
+        'customer_phone': order.customer_phone,
+        'customer_address': order.customer_address,
+        'total': order.total,
+        'status': 'entregue',
+        'created_at': order.created_at,
+        'completed_at': order.updated_at or now # Quando o admin marcou como entregue
+    } for order in orders]
+    revenue = sum(order.total for order in orders)
+    items_by_order = {order.id: order.items for order in orders} # Já carregados junto com os pedidos
+
+    history_entries = db.session.scalars(db.insert(OrderHistory).returning(OrderHistory), history_rows).all()
+    for entry in history_entries:
+        set_committed_value(entry, 'items', items_by_order[entry.original_order_id])
+    db.session.execute(db.delete(Order).where(Order.id.in_([row['original_order_id'] for row in history_rows])))
+    bump_store_stats(active_orders=-len(history_rows), completed_orders=len(history_rows),
+                     pending_revenue=-revenue, total_revenue=revenue)
+    record_sales([dict(row, items=items_by_order[row['original_order_id']]) for row in history_rows])
+    # A notificação vai como outra tarefa: só sai depois que a mudança estiver gravada
+    enqueue_jobs('order_event', [{'type': 'order_status', 'order': entry.to_dict()} for entry in history_entries])
+
+@job_handler('order_event')
+def publish_order_events(payloads: list[dict]):
+    """Publica no stream SSE os eventos gerados por outras tarefas (ex.: pedido movido para o histórico)."""
+    for payload in payloads:
+        publish_order_event(payload['type'], payload['order'])
+
+class JobWorker:
+    """Laço do worker: processa lotes enquanto houver tarefas e espera JOB_POLL_SECONDS quando a fila esvazia."""
+
+    def __init__(self, batch_size: int = JOB_BATCH_SIZE, poll_seconds: float = JOB_POLL_SECONDS):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.stopping = False
+
+    def stop(self, *_):
+        self.stopping = True # Termina o lote atual antes de sair
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info("Worker de tarefas iniciado (lote de %s, espera de %ss)", self.batch_size, self.poll_seconds)
+        while not self.stopping:
+            try:
+                claimed = run_pending_jobs(self.batch_size)
+            except Exception as e:
+                # Banco fora do ar: tenta de novo depois da espera
+                db.session.rollback()
+                logger.error("Falha ao processar a fila de tarefas: %s", e)
+                claimed = 0
+            db.session.remove()
+            if not claimed:
+                time.sleep(self.poll_seconds)
+        logger.info("Worker de tarefas encerrado.")
+
+@click.command('run-jobs')
+@click.option('--batch-size', default=JOB_BATCH_SIZE, show_default=True, help='Tarefas pegas por vez.')
+@click.option('--once', is_flag=True, help='Processa o que estiver vencido e sai (ex.: cron ou testes).')
+@with_appcontext
+def run_jobs_command(batch_size, once):
+    """Worker da fila de tarefas (move pedidos entregues para o histórico, notificações)."""
+    if not order_events_cross_process():
+        # O broker em memória só entrega aos streams deste processo, e o worker não atende nenhum
+        logger.warning("ORDER_EVENTS_BACKEND não é 'postgres': os eventos publicados pelo worker (pedido movido "
+                       "para o histórico) não chegam aos clientes SSE dos workers web.")
+    if not once:
+        JobWorker(batch_size).run()
+        return
+    total = 0
+    while True:
+        claimed = run_pending_jobs(batch_size)
+        if not claimed:
+            break
+        total += claimed
+    print(f"[INFO] {total} tarefas processadas. Fila: {job_queue_stats()}")
+
+@click.command('retry-dead-jobs')
+@click.option('--kind', help='Só as tarefas deste tipo (ex.: move_to_history).')
+@with_appcontext
+def retry_dead_jobs_command(kind):
+    """Devolve para a fila as tarefas que esgotaram as tentativas (dead-letter)."""
+    print(f"[INFO] {retry_dead_jobs(kind)} tarefas devolvidas para a fila.")
@@ -0,0 +1,324 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from .analytics import rebuild_sales_rollup
+from .catalog import CATALOG
+from .config import BASE_DIR
+from .extensions import db
+from .history import claim_history_keys
+from .logs import logger
+from .models import User, Order, OrderHistory, OrderItem
+from .order_items import legacy_item_rows
+from .stats import rebuild_store_stats
+
+# --- Importação/Exportação dos Arquivos Legados (data/*.json) ---
+# Antes do banco, os dados ficavam em data/users.json, data/orders.json e data/history.json:
+# arrays JSON com ids próprios, itens como lista de nomes e 'updatedAt' no lugar de 'completedAt'.
+# 'flask import-legacy' lê os arquivos em streaming (sem carregar o array inteiro), converte para
+# o formato das tabelas e insere em lotes (executemany). Rodar de novo não duplica nada:
+#   - usuários são identificados pelo email;
+#   - pedidos ativos mantêm o id legado como Order.id;
+#   - pedidos do histórico usam o id legado como original_order_id.
+# Os itens vão para order_items com o id do pedido. 'flask export-legacy' faz o caminho inverso,
+# também em streaming.
+LEGACY_DATA_DIR = os.path.join(BASE_DIR, 'data')
+LEGACY_CHUNK_SIZE = 5000
+READ_BUFFER_SIZE = 1 << 16
+
+def iter_json_array(path: str, buffer_size: int = READ_BUFFER_SIZE):
+    """Lê um arquivo com um array JSON e devolve um elemento por vez, lendo o arquivo aos poucos."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as json_file:
+        buffer = ''
+        position = 0
+        started = False
+        eof = False
+        while True:
+            # Pula espaços e separadores até o próximo valor
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if position < len(buffer) or eof:
+                    break
+                buffer, position = json_file.read(buffer_size), 0
+                eof = not buffer
+            if position >= len(buffer):
+                if started:
+                    raise ValueError(f'{path}: array JSON não foi fechado')
+                return
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError(f'{path}: o arquivo deve conter um array JSON')
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Elemento incompleto no buffer: lê mais e tenta de novo
+                chunk = json_file.read(buffer_size)
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield value
+            position = end
+
+def iter_chunks(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+class ImportReport:
+    """Contadores de uma etapa da importação (lidos, inseridos, já existentes, com erro) e vazão."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.read = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.errors = 0
+        self.started_at = time.perf_counter()
+        self.seconds = 0.0
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started_at
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            'read': self.read, 'inserted': self.inserted, 'skipped': self.skipped, 'errors': self.errors,
+            'seconds': round(self.seconds, 2),
+            'rows_per_sec': round(self.read / self.seconds, 1) if self.seconds else 0.0
+        }
+
+def import_users(path: str, chunk_size: int) -> tuple[ImportReport, dict[int, int]]:
+    """Importa usuários novos (pelo email) e devolve o mapa id legado -> id no banco."""
+    report = ImportReport('users')
+    user_ids = {}
+    for chunk in iter_chunks(iter_json_array(path), chunk_size):
+        report.read += len(chunk)
+        by_email = {}
+        for legacy in chunk:
+            email = (legacy.get('email') or '').lower().strip()
+            if not email or not legacy.get('password'):
+                report.errors += 1
+                continue
+            by_email[email] = legacy
+
+        existing = {email for (email,) in db.session.query(User.email).filter(User.email.in_(by_email))}
+        rows = [
+            {'name': legacy.get('name') or email, 'email': email, 'phone': legacy.get('phone'),
+             'address': legacy.get('address'), 'password_hash': legacy['password'], # SHA-256 legado: refeito no primeiro login
+             'role': 'customer', 'created_at': parse_timestamp(legacy.get('createdAt'))}
+            for email, legacy in by_email.items() if email not in existing
+        ]
+        if rows:
+            db.session.execute(db.insert(User), rows)
+        report.inserted += len(rows)
+        report.skipped += len(by_email) - len(rows)
+
+        for user_id, email in db.session.query(User.id, User.email).filter(User.email.in_(by_email)):
+            user_ids[by_email[email]['id']] = user_id
+        db.session.commit()
+    return report.finish(), user_ids
+
+def import_orders(path: str, chunk_size: int, user_ids: dict[int, int]) -> ImportReport:
+    """Importa pedidos ativos mantendo o id legado como Order.id (ids já existentes são pulados)."""
+    report = ImportReport('orders')
+    catalog = CATALOG.get()
+    for chunk in iter_chunks(iter_json_array(path), chunk_size):
+        report.read += len(chunk)
+        existing = {order_id for (order_id,) in db.session.query(Order.id).filter(Order.id.in_([legacy['id'] for legacy in chunk]))}
+        rows, item_rows = [], []
+        for legacy in chunk:
+            if legacy['id'] in existing:
+                report.skipped += 1
+                continue
+            user_id = user_ids.get(legacy.get('userId'))
+            if user_id is None: # Pedido ativo precisa de dono
+                report.errors += 1
+                continue
+            rows.append({
+                'id': legacy['id'], 'user_id': user_id, 'customer_name': legacy.get('customerName') or '',
+                'customer_phone': legacy.get('customerPhone'), 'customer_address': legacy.get('customerAddress'),
+                'total': legacy['total'],
+                'status': legacy.get('status') or 'pendente', 'created_at': parse_timestamp(legacy.get('createdAt')),
+                'updated_at': parse_timestamp(legacy.get('updatedAt') or legacy.get('createdAt'))
+            })
+            item_rows.extend(legacy_item_rows(legacy['id'], legacy.get('items'), catalog))
+        if rows:
+            db.session.execute(db.insert(Order), rows)
+            if item_rows:
+                db.session.execute(db.insert(OrderItem), item_rows)
+            db.session.commit()
+        report.inserted += len(rows)
+    return report.finish()
+
+def import_history(path: str, chunk_size: int, user_ids: dict[int, int]) -> ImportReport:
+    """Importa o histórico; o id legado vira original_order_id (já existentes, mesmo arquivados, são pulados)."""
+    report = ImportReport('history')
+    catalog = CATALOG.get()
+    for chunk in iter_chunks(iter_json_array(path), chunk_size):
+        report.read += len(chunk)
+        legacy_ids = [legacy.get('originalOrderId', legacy['id']) for legacy in chunk]
+        claimed = claim_history_keys(legacy_ids)
+        rows, item_rows = [], []
+        for legacy_id, legacy in zip(legacy_ids, chunk):
+            if legacy_id not in claimed:
+                report.skipped += 1
+                continue
+            claimed.discard(legacy_id) # Repetido no mesmo arquivo
+            created_at = parse_timestamp(legacy.get('createdAt'))
+            rows.append({
+                'original_order_id': legacy_id, 'user_id': user_ids.get(legacy.get('userId')),
+                'customer_name': legacy.get('customerName') or '', 'customer_phone': legacy.get('customerPhone'),
+                'customer_address': legacy.get('customerAddress'), 'total': legacy['total'], 'status': legacy.get('status') or 'entregue', 'created_at': created_at,
+                'completed_at': parse_timestamp(legacy.get('completedAt') or legacy.get('updatedAt')) or created_at
+            })
+            item_rows.extend(legacy_item_rows(legacy_id, legacy.get('items'), catalog))
+        if rows:
+            db.session.execute(db.insert(OrderHistory), rows)
+            if item_rows:
+                db.session.execute(db.insert(OrderItem), item_rows)
+            db.session.commit()
+        report.inserted += len(rows)
+    return report.finish()
+
+# Maior id de pedido já usado, ativo ou no histórico (order_history_keys inclui os meses arquivados)
+HIGHEST_ORDER_ID_SQL = {
+    'postgresql': "greatest((SELECT coalesce(max(id), 0) FROM orders), (SELECT coalesce(max(original_order_id), 0) FROM order_history_keys), 1)",
+    'sqlite': "max((SELECT coalesce(max(id), 0) FROM orders), (SELECT coalesce(max(original_order_id), 0) FROM order_history_keys))",
+}
+
+def sync_order_id_sequence():
+    """
+    Avança a sequência de orders.id (no SQLite, a linha de sqlite_sequence criada pelo AUTOINCREMENT)
+    para depois dos ids legados importados e dos ids originais do histórico, para que pedidos novos não
+    colidam com eles ao serem entregues nem herdem os itens deles em order_items.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        db.session.execute(text(f"SELECT setval(pg_get_serial_sequence('orders', 'id'), {HIGHEST_ORDER_ID_SQL[dialect]})"))
+    elif dialect == 'sqlite':
+        db.session.execute(text(f"UPDATE sqlite_sequence SET seq = max(seq, {HIGHEST_ORDER_ID_SQL[dialect]}) WHERE name = 'orders'"))
+        db.session.execute(text(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT 'orders', {HIGHEST_ORDER_ID_SQL[dialect]} "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'orders')"
+        ))
+    else:
+        return
+    db.session.commit()
+
+def import_legacy(directory: str = LEGACY_DATA_DIR, chunk_size: int = LEGACY_CHUNK_SIZE) -> dict:
+    """Importa users.json, orders.json e history.json (os que existirem no diretório)."""
+    reports = {}
+    user_ids = {}
+    users_path = os.path.join(directory, 'users.json')
+    if os.path.exists(users_path):
+        reports['users'], user_ids = import_users(users_path, chunk_size)
+    else:
+        logger.warning("%s não encontrado: pedidos ativos não terão dono e serão recusados.", users_path)
+
+    orders_path = os.path.join(directory, 'orders.json')
+    if os.path.exists(orders_path):
+        reports['orders'] = import_orders(orders_path, chunk_size, user_ids)
+    history_path = os.path.join(directory, 'history.json')
+    if os.path.exists(history_path):
+        reports['history'] = import_history(history_path, chunk_size, user_ids)
+
+    sync_order_id_sequence()
+    rebuild_store_stats()
+    rebuild_sales_rollup()
+    return {name: report.to_dict() for name, report in reports.items()}
+
+def write_json_array(path: str, rows) -> int:
+    """Grava os objetos como um array JSON, um por vez (sem montar a lista em memória)."""
+    count = 0
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as json_file:
+        json_file.write('[')
+        for row in rows:
+            json_file.write(',\n  ' if count else '\n  ')
+            json_file.write(json.dumps(row, ensure_ascii=False))
+            count += 1
+        json_file.write('\n]\n' if count else ']\n')
+    os.replace(temp_path, path)
+    return count
+
+def item_names(items: list) -> list:
+    return [item.name for item in items for _ in range(item.quantity)]
+
+def export_legacy(directory: str, chunk_size: int = LEGACY_CHUNK_SIZE) -> dict:
+    """Exporta usuários, pedidos e histórico no formato dos arquivos legados, lendo o banco em lotes."""
+    os.makedirs(directory, exist_ok=True)
+    reports = {}
+
+    def timed(name: str, rows):
+        started_at = time.perf_counter()
+        count = write_json_array(os.path.join(directory, f'{name}.json'), rows)
+        seconds = time.perf_counter() - started_at
+        reports[name] = {'written': count, 'seconds': round(seconds, 2), 'rows_per_sec': round(count / seconds, 1) if seconds else 0.0}
+
+    timed('users', (
+        {'id': user.id, 'name': user.name, 'email': user.email, 'phone': user.phone, 'address': user.address,
+         'password': user.password_hash, 'createdAt': user.created_at.isoformat() if user.created_at else None}
+        for user in User.query.filter(User.role != 'master').order_by(User.id).yield_per(chunk_size)
+    ))
+    timed('orders', (
+        {'id': order.id, 'userId': order.user_id, 'customerName': order.customer_name, 'customerPhone': order.customer_phone,
+         'customerAddress': order.customer_address, 'items': item_names(order.items), 'total': float(order.total),
+         'status': order.status, 'createdAt': order.created_at.isoformat() if order.created_at else None,
+         'updatedAt': order.updated_at.isoformat() if order.updated_at else None}
+        for order in Order.query.order_by(Order.id).yield_per(chunk_size)
+    ))
+    timed('history', (
+        {'id': entry.original_order_id, 'userId': entry.user_id, 'customerName': entry.customer_name,
+         'customerPhone': entry.customer_phone, 'customerAddress': entry.customer_address, 'items': item_names(entry.items),
+         'total': float(entry.total), 'status': entry.status,
+         'createdAt': entry.created_at.isoformat() if entry.created_at else None,
+         'updatedAt': entry.completed_at.isoformat() if entry.completed_at else None}
+        for entry in OrderHistory.query.order_by(OrderHistory.original_order_id).yield_per(chunk_size)
+    ))
+    return reports
+
+def print_reports(reports: dict):
+    for name, report in reports.items():
+        details = '  '.join(f'{key}={value}' for key, value in report.items())
+        print(f"[INFO] {name:8s} {details}")
+
+@click.command('import-legacy')
+@click.option('--dir', 'directory', default=LEGACY_DATA_DIR, show_default=True, help='Diretório com users.json, orders.json e history.json.')
+@click.option('--chunk-size', default=LEGACY_CHUNK_SIZE, show_default=True, help='Linhas por lote de INSERT.')
+@with_appcontext
+def import_legacy_command(directory, chunk_size):
+    """Importa os arquivos JSON legados para o banco (idempotente)."""
+    reports = import_legacy(directory, chunk_size)
+    if not reports:
+        print(f"[AVISO] Nenhum arquivo legado encontrado em {directory}.")
+    print_reports(reports)
+    logger.info("Importação legada concluída: %s", reports)
+
+@click.command('export-legacy')
+@click.option('--dir', 'directory', required=True, help='Diretório de saída (os arquivos existentes são substituídos).')
+@click.option('--chunk-size', default=LEGACY_CHUNK_SIZE, show_default=True, help='Linhas lidas do banco por lote.')
+@with_appcontext
+def export_legacy_command(directory, chunk_size):
+    """Exporta o banco no formato dos arquivos JSON legados."""
+    print_reports(export_legacy(directory, chunk_size))
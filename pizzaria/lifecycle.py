@@ -0,0 +1,95 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from .extensions import db
+from .models import Order, ORDER_TRANSITIONS
+
+# --- Ciclo de Vida dos Pedidos ---
+# As mudanças de status seguem ORDER_TRANSITIONS e são gravadas com um UPDATE condicional
+# (WHERE id = ? AND status = ? AND version = ?), sem travar a linha antes. Se outra requisição mudou o
+# pedido no meio do caminho, nenhuma linha é afetada e a rota responde 409, em vez de sobrescrever a
+# mudança dela (ou agendar a passagem para o histórico duas vezes). 'version' vai no JSON do pedido:
+# o cliente a devolve junto com o status que está vendo.
+
+class OrderConflict(Exception):
+    """Mudança de status recusada: transição não permitida ou pedido alterado por outra requisição."""
+
+    def __init__(self, message: str, current: dict | None = None):
+        super().__init__(message)
+        self.current = current # {'id', 'status', 'version'} do pedido no banco, quando conhecidos
+
+def can_transition(old_status: str, new_status: str) -> bool:
+    """Indica se ORDER_TRANSITIONS permite ir de old_status para new_status."""
+    return new_status in ORDER_TRANSITIONS.get(old_status, ())
+
+def transition_error(old_status: str, new_status: str) -> str:
+    """Mensagem de erro com as transições permitidas a partir de old_status."""
+    allowed = ORDER_TRANSITIONS.get(old_status, ())
+    return (f'Transição não permitida: {old_status} → {new_status}. '
+            f'A partir de {old_status}: {", ".join(allowed) if allowed else "nenhuma (status final)"}')
+
+def current_order_state(order_id: int) -> dict | None:
+    """Status e versão atuais do pedido (None se ele não existir), sem montar o objeto do ORM."""
+    row = db.session.execute(db.select(Order.status, Order.version).where(Order.id == order_id)).first()
+    return {'id': order_id, 'status': row.status, 'version': row.version} if row else None
+
+def transition_order(order_id: int, new_status: str, expected_status: str | None = None,
+                     expected_version: int | None = None) -> tuple[Order, str] | None:
+    """
+    Muda o status de um pedido na transação corrente e devolve (pedido atualizado, status anterior),
+    ou None se o pedido não existir. Com status e versão esperados (os que o cliente está vendo), é um
+    único UPDATE ... RETURNING; sem eles, o estado atual é lido antes e a condição do UPDATE continua
+    protegendo contra mudanças feitas entre a leitura e a escrita.
+    Lança OrderConflict se a transição não for permitida ou se o pedido tiver mudado.
+    """
+    if expected_status is None or expected_version is None:
+        current = current_order_state(order_id)
+        if current is None:
+            return None
+        if expected_status is None:
+            expected_status = current['status']
+        if expected_version is None:
+            expected_version = current['version']
+
+    if not can_transition(expected_status, new_status):
+        raise OrderConflict(transition_error(expected_status, new_status))
+
+    order = db.session.scalars(
+        db.update(Order)
+        .where(Order.id == order_id, Order.status == expected_status, Order.version == expected_version)
+        .values(status=new_status, version=Order.version + 1, updated_at=datetime.now(timezone.utc))
+        .returning(Order)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if order is not None:
+        return order, expected_status
+
+    current = current_order_state(order_id) # Só no caminho de erro: diferencia 404 de 409
+    if current is None:
+        return None
+    raise OrderConflict(
+        f"O pedido {order_id} foi alterado por outra requisição (agora está '{current['status']}', versão {current['version']})",
+        current
+    )
+
+def transition_orders(changes: list[tuple[int, str, int, str]]) -> set[int]:
+    """
+    Versão em lote: changes traz (order_id, status esperado, versão esperada, novo status), já validados
+    com can_transition. Faz um UPDATE condicional por par (status esperado, novo status) e devolve os ids
+    que mudaram; os que faltarem foram alterados por outra requisição.
+    """
+    groups = defaultdict(list)
+    for order_id, expected_status, expected_version, new_status in changes:
+        groups[(expected_status, new_status)].append((order_id, expected_version))
+
+    now = datetime.now(timezone.utc)
+    updated = set()
+    for (expected_status, new_status), keys in sorted(groups.items()): # Ordem fixa: transações concorrentes travam as linhas na mesma ordem
+        updated.update(db.session.scalars(
+            db.update(Order)
+            .where(db.tuple_(Order.id, Order.version).in_(sorted(keys)), Order.status == expected_status)
+            .values(status=new_status, version=Order.version + 1, updated_at=now)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        ))
+    return updated
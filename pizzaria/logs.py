@@ -0,0 +1,26 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# --- Configuração de Logs ---
+# O nível vem de LOG_LEVEL (padrão INFO). Mensagens abaixo do nível são descartadas antes de
+# qualquer formatação (por isso os logs usam argumentos '%s', e não f-strings). As mensagens
+# emitidas vão para uma fila e são escritas no stdout por uma thread separada, fora da requisição.
+logger = logging.getLogger('pizzaria')
+
+def configure_logging():
+    if logger.handlers: # create_app() pode ser chamada mais de uma vez no mesmo processo
+        return
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    logger.propagate = False
@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+
+from flask import Blueprint, Response, g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import passwords
+from .auth import get_request_token
+from .events import get_order_events
+from .extensions import db
+from .idempotency import MemoryIdempotencyStore, get_idempotency_metrics, get_idempotency_store
+from .jobs import job_queue_stats
+from .logs import logger
+from .ratelimit import get_admission_control, get_rate_limiter
+from .response_cache import get_response_cache
+
+# --- Métricas e Instrumentação (formato Prometheus em /metrics) ---
+# Cada requisição registra latência, número e tempo de consultas SQL e tamanho da resposta,
+# agrupados pela regra da rota (ex.: /api/admin/orders/<int:order_id>). As métricas são por
+# processo: com vários workers da Gunicorn, cada um expõe os próprios números.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') # Se definido, /metrics exige 'Authorization: Bearer <token>'
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{format_labels(self.label_names, labels)} {value}')
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {} # labels -> [contagem por bucket..., soma, total]
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.series.items()):
+            for i, upper_bound in enumerate(self.buckets):
+                bucket_labels = format_labels(self.label_names + ('le',), labels + (str(upper_bound),))
+                lines.append(f'{self.name}_bucket{bucket_labels} {series[i]}')
+            lines.append(f'{self.name}_bucket{format_labels(self.label_names + ("le",), labels + ("+Inf",))} {series[-1]}')
+            lines.append(f'{self.name}_sum{format_labels(self.label_names, labels)} {series[-2]}')
+            lines.append(f'{self.name}_count{format_labels(self.label_names, labels)} {series[-1]}')
+        return lines
+
+def format_labels(names: tuple, values: tuple) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class RequestMetrics:
+    """Conjunto de métricas HTTP/DB do processo, protegido por lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        labels = ('route', 'method')
+        self.requests = Counter('pizzaria_http_requests_total', 'Requisições HTTP atendidas.', labels + ('status',))
+        self.latency = Histogram('pizzaria_http_request_duration_seconds', 'Latência das requisições HTTP.', labels, LATENCY_BUCKETS)
+        self.db_queries = Histogram('pizzaria_http_request_db_queries', 'Consultas SQL por requisição.', labels, DB_QUERY_BUCKETS)
+        self.db_time = Histogram('pizzaria_http_request_db_seconds', 'Tempo gasto no banco por requisição.', labels, LATENCY_BUCKETS)
+        self.response_size = Histogram('pizzaria_http_response_size_bytes', 'Tamanho do corpo das respostas.', labels, SIZE_BUCKETS)
+
+    def record(self, route: str, method: str, status: int, seconds: float, queries: int, db_seconds: float, size: int | None):
+        labels = (route, method)
+        with self._lock:
+            self.requests.inc(labels + (str(status),))
+            self.latency.observe(labels, seconds)
+            self.db_queries.observe(labels, queries)
+            self.db_time.observe(labels, db_seconds)
+            if size is not None:
+                self.response_size.observe(labels, size)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.db_queries, self.db_time, self.response_size):
+                lines.extend(metric.render())
+            return lines
+
+REQUEST_METRICS = RequestMetrics()
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# O início de cada consulta fica no contexto de execução dela (e não na conexão do pool): some junto
+# com o contexto mesmo quando a consulta falha. Consultas com erro também contam (handle_error).
+def record_query(context):
+    started_at = getattr(context, '_query_started_at', None)
+    if started_at is not None and has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_seconds += time.perf_counter() - started_at
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started_at = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_query(context)
+
+@event.listens_for(Engine, 'handle_error')
+def handle_query_error(exception_context):
+    record_query(exception_context.execution_context)
+
+def start_request_timer():
+    g.request_started_at = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+
+def record_request_metrics(response):
+    started_at = g.get('request_started_at')
+    if started_at is not None:
+        route = request.url_rule.rule if request.url_rule else 'sem-rota'
+        size = None if response.is_streamed else response.calculate_content_length()
+        REQUEST_METRICS.record(route, request.method, response.status_code, time.perf_counter() - started_at,
+                               g.db_queries, g.db_seconds, size)
+    return response
+
+def init_metrics(app):
+    """
+    Instrumenta todas as requisições do app e registra a rota /metrics. Deve ser chamada antes de
+    init_rate_limiting: o cronômetro precisa começar antes do controle de admissão, senão as recusas
+    com 503 (que encerram a requisição no before_request) não são contadas.
+    """
+    app.before_request(start_request_timer)
+    app.after_request(record_request_metrics)
+    app.register_blueprint(metrics_bp)
+
+def gauge_lines(name: str, help_text: str, value: float) -> list[str]:
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}']
+
+def counter_lines(name: str, help_text: str, value: float) -> list[str]:
+    """Contador que só cresce (desde o início do worker): tipo counter e sufixo _total, para rate()/increase()."""
+    name += '_total'
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {value}']
+
+def response_cache_lines() -> list[str]:
+    """Acertos/faltas do cache de respostas por endpoint, invalidações e tamanho (backend em memória)."""
+    cache = get_response_cache()
+    if cache is None:
+        return []
+    cache_metrics = cache.metrics()
+    lines = []
+    for name, help_text in (('hits', 'Respostas servidas pelo cache.'), ('misses', 'Consultas ao cache sem entrada válida.')):
+        metric_name = f'pizzaria_response_cache_{name}_total'
+        lines += [f'# HELP {metric_name} {help_text}', f'# TYPE {metric_name} counter']
+        lines += [f'{metric_name}{format_labels(("endpoint",), (endpoint,))} {count}' for endpoint, count in sorted(cache_metrics[name].items())]
+    lines += counter_lines('pizzaria_response_cache_invalidations', 'Invalidações do cache de respostas neste worker.', cache_metrics['invalidations'])
+    if 'entries' in cache_metrics:
+        lines += gauge_lines('pizzaria_response_cache_entries', 'Entradas no cache de respostas.', cache_metrics['entries'])
+        lines += counter_lines('pizzaria_response_cache_evictions', 'Entradas descartadas pelo limite do LRU.', cache_metrics['evictions'])
+    return lines
+
+def admission_lines() -> list[str]:
+    """Recusas do limite de taxa (429) por limite e estado do controle de admissão (503)."""
+    rejected = dict(get_rate_limiter().rejected)
+    name = 'pizzaria_rate_limit_rejected_total'
+    lines = [f'# HELP {name} Requisições recusadas pelo limite de taxa.', f'# TYPE {name} counter']
+    lines += [f'{name}{format_labels(("limit",), (limit,))} {count}' for limit, count in sorted(rejected.items())]
+    admission = get_admission_control()
+    if admission is not None:
+        lines += gauge_lines('pizzaria_admission_in_flight', 'Requisições /api em andamento neste worker.', admission.in_flight)
+        lines += gauge_lines('pizzaria_admission_max_concurrent', 'Limite de requisições simultâneas do worker.', admission.max_concurrent)
+        lines += counter_lines('pizzaria_admission_rejected', 'Requisições recusadas com 503 por excesso de concorrência.', admission.rejected)
+    return lines
+
+def idempotency_lines() -> list[str]:
+    """Repetições servidas, esperas e recusas das chaves de idempotência; registros guardados (memória)."""
+    idempotency_metrics = get_idempotency_metrics()
+    if idempotency_metrics is None:
+        return []
+    lines = counter_lines('pizzaria_idempotency_replayed', 'Respostas repetidas a partir de uma Idempotency-Key.', idempotency_metrics['replayed'])
+    lines += counter_lines('pizzaria_idempotency_waited', 'Repetições que esperaram a requisição original em andamento.', idempotency_metrics['waited'])
+    lines += counter_lines('pizzaria_idempotency_conflicts', 'Idempotency-Key recusadas (409/422).', idempotency_metrics['conflicts'])
+    store = get_idempotency_store()
+    if isinstance(store, MemoryIdempotencyStore):
+        lines += gauge_lines('pizzaria_idempotency_keys', 'Chaves de idempotência guardadas neste worker.', len(store))
+    return lines
+
+def job_queue_lines() -> list[str]:
+    """Tamanho e atraso da fila de tarefas (lidos do banco: valem para todos os workers)."""
+    try:
+        queue_stats = job_queue_stats()
+    except Exception as e:
+        # Tabela ainda não migrada ou banco fora do ar: /metrics continua respondendo
+        db.session.rollback()
+        logger.warning("Métricas da fila de tarefas indisponíveis: %s", e)
+        return []
+    name = 'pizzaria_jobs'
+    lines = [f'# HELP {name} Tarefas na fila por status.', f'# TYPE {name} gauge']
+    lines += [f'{name}{format_labels(("status",), (status,))} {queue_stats[status]}' for status in ('pending', 'running', 'dead')]
+    lines += gauge_lines('pizzaria_jobs_lag_seconds', 'Espera da tarefa pendente vencida mais antiga.', round(queue_stats['lag_seconds'], 3))
+    return lines
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Expõe as métricas do processo no formato texto do Prometheus."""
+    if METRICS_TOKEN and get_request_token(request) != METRICS_TOKEN:
+        return jsonify({'success': False, 'error': 'Não autorizado'}), 401
+
+    lines = REQUEST_METRICS.render()
+    lines += gauge_lines('pizzaria_sse_connections', 'Conexões abertas no stream de pedidos.', get_order_events().connection_count())
+    password_metrics = passwords.PASSWORD_HASHER.metrics()
+    lines += counter_lines('pizzaria_password_hash_completed', 'Operações de hash de senha concluídas.', password_metrics['completed'])
+    lines += counter_lines('pizzaria_password_hash_rejected', 'Operações de hash recusadas por fila cheia.', password_metrics['rejected'])
+    lines += gauge_lines('pizzaria_password_hash_queue_avg_ms', 'Tempo médio de espera na fila de hash.', password_metrics['avg_queue_ms'])
+    lines += gauge_lines('pizzaria_password_hash_queue_max_ms', 'Maior tempo de espera na fila de hash.', password_metrics['max_queue_ms'])
+    lines += response_cache_lines()
+    lines += admission_lines()
+    lines += idempotency_lines()
+    lines += job_queue_lines()
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
@@ -0,0 +1,366 @@
+from datetime import datetime, timezone # Importa timezone para melhor manejo de datas UTC
+
+from .extensions import db
+from .passwords import hash_password, verify_password
+
+# --- Definição dos Modelos do Banco de Dados ---
+
+class User(db.Model):
+    __tablename__ = 'users'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    phone = db.Column(db.String(20), nullable=True)
+    address = db.Column(db.String(200), nullable=True)
+    password_hash = db.Column(db.String(200), nullable=False) # Armazena o hash da senha
+    role = db.Column(db.String(20), default='customer', nullable=False) # 'customer' ou 'admin'
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # Relacionamento com Order
+    # lazy='raise': nenhuma rota percorre esses relacionamentos; um acesso acidental (uma consulta por linha)
+    # vira erro em vez de N+1. Quem precisar deles pede a carga explicitamente (ex.: options(selectinload(...))).
+    orders = db.relationship('Order', backref=db.backref('user', lazy='raise'), lazy='raise', cascade="all, delete-orphan")
+    history_orders = db.relationship( # Relacionamento para OrderHistory
+        'OrderHistory',
+        backref=db.backref('user_ref', lazy='raise'),
+        primaryjoin=lambda: User.id == OrderHistory.user_id,
+        lazy='raise',
+        viewonly=True
+    )
+
+    def __repr__(self):
+        return f'<User {self.email}>'
+
+    def set_password(self, password):
+        """Gera o hash da senha e armazena."""
+        self.password_hash = hash_password(password)
+
+    def check_password(self, password):
+        """
+        Verifica se a senha fornecida corresponde ao hash armazenado.
+        Se o hash for antigo (SHA-256) ou tiver custo diferente do configurado, ele é refeito com a
+        senha correta; quem chama deve fazer o commit para persistir o novo hash.
+        """
+        is_valid, needs_rehash = verify_password(password, self.password_hash)
+        if is_valid and needs_rehash:
+            self.password_hash = hash_password(password)
+        return is_valid
+
+    def to_dict(self, include_password_hash=False):
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'phone': self.phone,
+            'address': self.address,
+            'role': self.role,
+            'createdAt': self.created_at.isoformat() if self.created_at else None
+        }
+        if include_password_hash:
+            data['password_hash'] = self.password_hash
+        return data
+
+class Order(db.Model):
+    __tablename__ = 'orders'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    customer_name = db.Column(db.String(255), nullable=False)
+    customer_phone = db.Column(db.String(50))
+    customer_address = db.Column(db.Text)
+    total = db.Column(db.Numeric(10, 2), nullable=False)
+    status = db.Column(db.String(50), default='pendente', nullable=False) # 'pendente', 'preparando', 'saiu-entrega', 'entregue'
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False) # Sobe a cada mudança de status (pizzaria/lifecycle.py)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Itens do pedido (tabela order_items), carregados em uma consulta só para todos os pedidos lidos
+    items = db.relationship('OrderItem', primaryjoin=lambda: db.foreign(OrderItem.order_id) == Order.id,
+                            order_by=lambda: OrderItem.id, lazy='selectin', viewonly=True)
+
+    # Índices dos caminhos mais usados: "meus pedidos" (user_id + created_at DESC), a listagem do
+    # admin (created_at DESC) e a busca por status + período (pizzaria/search.py). Os dois últimos
+    # só existem no PostgreSQL (migração a6c3e8b1d507): trigram para o prefixo do nome e
+    # text_pattern_ops para o prefixo do telefone.
+    # sqlite_autoincrement: sem ele o SQLite reaproveita o maior id depois que o pedido sai da tabela, e o
+    # pedido novo herdaria os itens (order_items) e o original_order_id do histórico do antigo. No
+    # PostgreSQL a sequência já não volta atrás.
+    __table_args__ = (
+        db.Index('ix_orders_user_id_created_at', user_id, created_at.desc()),
+        db.Index('ix_orders_created_at', created_at.desc()),
+        db.Index('ix_orders_status_created_at', status, created_at.desc()),
+        db.Index('ix_orders_customer_name_trgm', customer_name, postgresql_using='gin',
+                 postgresql_ops={'customer_name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_orders_customer_phone_pattern', customer_phone,
+                 postgresql_ops={'customer_phone': 'text_pattern_ops'}).ddl_if(dialect='postgresql'),
+        {'sqlite_autoincrement': True},
+    )
+
+    def __repr__(self):
+        return f'<Order {self.id}>'
+
+    # Chave no JSON da API -> coluna (mesma ordem de to_dict); usado por pizzaria.serialization, que
+    # acrescenta 'items' com uma consulta por página (ITEMS_KEY é a chave que liga o pedido aos itens)
+    JSON_FIELDS = (
+        ('id', 'id'), ('userId', 'user_id'), ('customerName', 'customer_name'), ('customerPhone', 'customer_phone'),
+        ('customerAddress', 'customer_address'), ('total', 'total'), ('status', 'status'), ('version', 'version'),
+        ('createdAt', 'created_at'), ('updatedAt', 'updated_at')
+    )
+    ITEMS_KEY = 'id'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'userId': self.user_id,
+            'customerName': self.customer_name,
+            'customerPhone': self.customer_phone,
+            'customerAddress': self.customer_address,
+            'items': items_to_json(self.items),
+            'total': float(self.total),
+            'status': self.status,
+            'version': self.version,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class OrderHistory(db.Model):
+    __tablename__ = 'order_history'
+    id = db.Column(db.Integer, primary_key=True)
+    original_order_id = db.Column(db.Integer, nullable=False) # ID do pedido original (único via order_history_keys)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True) # Permite NULL se user for deletado
+
+    customer_name = db.Column(db.String(255), nullable=False)
+    customer_phone = db.Column(db.String(50))
+    customer_address = db.Column(db.Text)
+    total = db.Column(db.Numeric(10, 2), nullable=False)
+    status = db.Column(db.String(50), nullable=False) # Deve ser 'entregue' para esta tabela
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc)) # Data de criação do pedido original
+    completed_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)) # Data em que o pedido foi concluído e movido para o histórico
+
+    # No PostgreSQL a tabela é particionada por mês de completed_at (migração 7b3e1d9c5a20, ver
+    # pizzaria/history.py); lá a chave primária é (id, completed_at) e a unicidade vira
+    # (original_order_id, completed_at), que não impede o mesmo pedido em dois instantes. O ORM
+    # identifica as linhas só pelo id (a sequência não repete), e quem garante um pedido por
+    # original_order_id é order_history_keys (OrderHistoryKey), nos dois bancos. No SQLite fica
+    # uma tabela única, e o índice em completed_at faz o papel das partições no arquivamento.
+    # Os itens continuam em order_items com o id do pedido original: a passagem para o histórico não os copia
+    items = db.relationship('OrderItem', primaryjoin=lambda: db.foreign(OrderItem.order_id) == OrderHistory.original_order_id,
+                            order_by=lambda: OrderItem.id, lazy='selectin', viewonly=True)
+
+    # Índices do histórico: por usuário (user_id + completed_at DESC), a listagem geral do admin e,
+    # só no PostgreSQL, os mesmos índices de busca de Order (nome e telefone).
+    __table_args__ = (
+        db.UniqueConstraint(original_order_id).ddl_if(dialect='sqlite'),
+        db.UniqueConstraint(original_order_id, completed_at).ddl_if(dialect='postgresql'),
+        db.Index('ix_order_history_user_id_completed_at', user_id, completed_at.desc()),
+        db.Index('ix_order_history_completed_at', completed_at),
+        db.Index('ix_order_history_customer_name_trgm', customer_name, postgresql_using='gin',
+                 postgresql_ops={'customer_name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_order_history_customer_phone_pattern', customer_phone,
+                 postgresql_ops={'customer_phone': 'text_pattern_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+    def __repr__(self):
+        return f'<OrderHistory {self.id}>'
+
+    JSON_FIELDS = (
+        ('id', 'id'), ('originalOrderId', 'original_order_id'), ('userId', 'user_id'), ('customerName', 'customer_name'),
+        ('customerPhone', 'customer_phone'), ('customerAddress', 'customer_address'), ('total', 'total'),
+        ('status', 'status'), ('createdAt', 'created_at'), ('completedAt', 'completed_at')
+    )
+    ITEMS_KEY = 'original_order_id'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'originalOrderId': self.original_order_id,
+            'userId': self.user_id,
+            'customerName': self.customer_name,
+            'customerPhone': self.customer_phone,
+            'customerAddress': self.customer_address,
+            'items': items_to_json(self.items),
+            'total': float(self.total),
+            'status': self.status,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'completedAt': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+class OrderHistoryKey(db.Model):
+    """
+    Um registro por pedido que já passou para o histórico. Com order_history particionada, a
+    unicidade de original_order_id não cabe numa constraint da própria tabela; a chave primária aqui
+    é global. Quem grava no histórico reserva a chave antes (claim_history_keys, pizzaria/history.py).
+    As chaves ficam depois do 'flask archive-history', para um pedido arquivado não voltar.
+    """
+    __tablename__ = 'order_history_keys'
+    original_order_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    def __repr__(self):
+        return f'<OrderHistoryKey {self.original_order_id}>'
+
+class OrderItem(db.Model):
+    """
+    Pizza de um pedido (uma linha por sabor, com a quantidade). order_id é o id do pedido em orders e,
+    depois da entrega, o original_order_id em order_history; por isso não há chave estrangeira.
+    Nome e preço são os do catálogo no momento do pedido.
+    """
+    __tablename__ = 'order_items'
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, nullable=False)
+    pizza_id = db.Column(db.String(50), nullable=True) # Id no catálogo (None para sabores legados fora do catálogo)
+    name = db.Column(db.String(100), nullable=False)
+    unit_price = db.Column(db.Numeric(10, 2), nullable=True) # None em itens legados sem preço conhecido
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+
+    # Itens por pedido (carga das páginas) e pedidos por sabor (busca ?pizza= e relatório de vendas)
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', order_id),
+        db.Index('ix_order_items_name_order_id', name, order_id),
+    )
+
+    def __repr__(self):
+        return f'<OrderItem {self.order_id} {self.name} x{self.quantity}>'
+
+def items_to_json(items) -> list[dict]:
+    """Itens no formato da API ({'name', 'price'} por pizza: a quantidade vira repetições)."""
+    return [{'name': item.name, 'price': float(item.unit_price) if item.unit_price is not None else None}
+            for item in items for _ in range(item.quantity)]
+
+class StoreStats(db.Model):
+    """
+    Consolidado das estatísticas da pizzaria (linha única, id = 1).
+    É atualizado na mesma transação de cada escrita (cadastro, pedido, mudança de status, exclusões),
+    de modo que /api/admin/stats vira uma leitura por chave primária em vez de vários agregados.
+    """
+    __tablename__ = 'store_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    users = db.Column(db.Integer, nullable=False, default=0)
+    active_orders = db.Column(db.Integer, nullable=False, default=0)
+    completed_orders = db.Column(db.Integer, nullable=False, default=0)
+    pending_orders = db.Column(db.Integer, nullable=False, default=0) # status 'pendente'
+    preparing_orders = db.Column(db.Integer, nullable=False, default=0) # status 'preparando'
+    out_for_delivery_orders = db.Column(db.Integer, nullable=False, default=0) # status 'saiu-entrega'
+    total_revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    pending_revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<StoreStats {self.id}>'
+
+    def to_dict(self):
+        status_breakdown = {}
+        for status, column in STATUS_COUNT_COLUMNS.items():
+            count = getattr(self, column)
+            if count:
+                status_breakdown[status] = count
+        return {
+            'users': self.users,
+            'active_orders': self.active_orders,
+            'completed_orders': self.completed_orders,
+            'status_breakdown': status_breakdown,
+            'total_revenue': float(self.total_revenue),
+            'pending_revenue': float(self.pending_revenue)
+        }
+
+class HistoryMonthSummary(db.Model):
+    """
+    Resumo de um mês do histórico já arquivado (flask archive-history): as linhas saem de
+    order_history para um arquivo NDJSON comprimido e ficam aqui só a contagem e a receita,
+    para que as estatísticas continuem corretas sem ler o arquivo.
+    """
+    __tablename__ = 'order_history_monthly'
+    month = db.Column(db.Date, primary_key=True) # Primeiro dia do mês (UTC)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    archive_path = db.Column(db.String(500), nullable=True) # Último arquivo gerado para o mês
+    archived_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<HistoryMonthSummary {self.month}>'
+
+    def to_dict(self):
+        return {
+            'month': self.month.strftime('%Y-%m'),
+            'orders': self.orders,
+            'revenue': float(self.revenue),
+            'archivePath': self.archive_path,
+            'archivedAt': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+class SalesRollup(db.Model):
+    """
+    Vendas do histórico agregadas por hora de conclusão (pizzaria/analytics.py), para que
+    /api/admin/analytics some linhas por hora em vez de varrer order_history.
+    dimension: 'orders' (key ''), 'pizza' (key = sabor) ou 'delivery' (key = início da faixa, em minutos,
+    do tempo entre a criação e a entrega do pedido).
+    """
+    __tablename__ = 'sales_rollup'
+    dimension = db.Column(db.String(20), primary_key=True) # Primeiro na chave: as consultas filtram por dimensão + intervalo de horas
+    hour = db.Column(db.DateTime, primary_key=True) # Início da hora (UTC)
+    key = db.Column(db.String(100), primary_key=True, default='')
+    quantity = db.Column(db.Integer, nullable=False, default=0) # Pedidos ('orders'/'delivery') ou pizzas ('pizza')
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0) # 'orders' e 'pizza'
+    delivery_seconds = db.Column(db.Float, nullable=False, default=0) # Soma dos tempos de entrega ('delivery')
+
+    # No SQLite a tabela fica ordenada pela chave primária (WITHOUT ROWID): a leitura de um intervalo
+    # de horas percorre só a árvore da chave, sem ir à tabela linha a linha
+    __table_args__ = {'sqlite_with_rowid': False}
+
+    def __repr__(self):
+        return f'<SalesRollup {self.hour} {self.dimension}:{self.key}>'
+
+class Job(db.Model):
+    """
+    Tarefa da fila de write-behind (pizzaria/jobs.py), gravada na mesma transação da escrita que a gerou.
+    O worker ('flask run-jobs') apaga a linha ao concluir; as que esgotam as tentativas ficam com status 'dead'.
+    """
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False) # Nome do handler (ex.: 'move_to_history')
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending') # 'pending', 'running' ou 'dead'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc)) # Próxima tentativa
+    locked_at = db.Column(db.DateTime, nullable=True) # Quando o worker pegou a tarefa (status 'running')
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    # O worker busca por status + run_at (as pendentes mais antigas primeiro)
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', status, run_at),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'runAt': self.run_at.isoformat() if self.run_at else None,
+            'lastError': self.last_error,
+            'createdAt': self.created_at.isoformat() if self.created_at else None
+        }
+
+# Coluna de StoreStats que conta os pedidos ativos em cada status
+STATUS_COUNT_COLUMNS = {
+    'pendente': 'pending_orders',
+    'preparando': 'preparing_orders',
+    'saiu-entrega': 'out_for_delivery_orders'
+}
+
+# Status possíveis de um pedido, na ordem do fluxo. 'entregue' agenda a passagem do pedido para o
+# histórico (tarefa 'move_to_history' da fila em pizzaria/jobs.py).
+ORDER_STATUSES = ['pendente', 'preparando', 'saiu-entrega', 'entregue']
+
+# Transições permitidas (status atual -> novos status): para a frente, podendo pular etapas (ex.: retirada
+# no balcão), e um passo para trás para desfazer um clique errado. 'entregue' é final: o pedido vai para o
+# histórico. As mudanças são gravadas por pizzaria/lifecycle.py.
+ORDER_TRANSITIONS = {
+    'pendente': ('preparando', 'saiu-entrega', 'entregue'),
+    'preparando': ('pendente', 'saiu-entrega', 'entregue'),
+    'saiu-entrega': ('preparando', 'entregue'),
+    'entregue': (),
+}
@@ -0,0 +1,75 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from .extensions import db
+from .models import OrderItem, items_to_json
+
+# --- Itens dos Pedidos (tabela order_items) ---
+# Cada pedido tem uma linha por sabor, com a quantidade. order_id é o id do pedido e continua valendo
+# depois da entrega (é o original_order_id do histórico), então a passagem para o histórico não mexe
+# nos itens. Pedidos lidos pelo ORM trazem os itens pelo relacionamento 'items' (uma consulta por
+# carga); as listagens, que leem só colunas, usam attach_items (uma consulta por página).
+
+def order_item_rows(order_id: int, pizzas: list[dict]) -> list[dict]:
+    """Agrupa as pizzas do catálogo (uma por unidade, na ordem escolhida) em linhas de order_items."""
+    rows = {}
+    for pizza in pizzas:
+        row = rows.get(pizza['id'])
+        if row:
+            row['quantity'] += 1
+        else:
+            rows[pizza['id']] = {'order_id': order_id, 'pizza_id': pizza['id'], 'name': pizza['name'],
+                                 'unit_price': pizza['price'], 'quantity': 1}
+    return list(rows.values())
+
+def legacy_item_rows(order_id: int, items: list | None, catalog) -> list[dict]:
+    """
+    Converte itens no formato antigo (lista de nomes ou de {'name', 'price'}) em linhas de order_items.
+    Sem preço, vale o do catálogo atual (None se a pizza não existir mais).
+    """
+    rows = {}
+    for item in items or []:
+        name, price = (item.get('name'), item.get('price')) if isinstance(item, dict) else (item, None)
+        if not name:
+            continue
+        pizza = catalog.find_by_name(name)
+        if price is None and pizza:
+            price = pizza['price']
+        price = Decimal(str(price)) if price is not None else None
+        row = rows.get((name, price))
+        if row:
+            row['quantity'] += 1
+        else:
+            rows[(name, price)] = {'order_id': order_id, 'pizza_id': pizza['id'] if pizza else None,
+                                   'name': name, 'unit_price': price, 'quantity': 1}
+    return list(rows.values())
+
+def insert_order_items(rows: list[dict]) -> list[OrderItem]:
+    """INSERT em lote na transação corrente; devolve os itens gravados (na ordem das linhas)."""
+    if not rows:
+        return []
+    # Um INSERT só; os ids crescem na ordem das linhas. (sort_by_parameter_order faria o SQLite gravar uma linha por comando.)
+    items = db.session.scalars(db.insert(OrderItem).returning(OrderItem), rows).all()
+    return sorted(items, key=lambda item: item.id)
+
+def delete_order_items(order_ids):
+    """Remove os itens dos pedidos (lista de ids ou subconsulta) na transação corrente."""
+    db.session.execute(db.delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+
+def load_items(order_ids: list[int]) -> dict[int, list[dict]]:
+    """Itens no formato da API de vários pedidos, com uma consulta só: {order_id: [{'name', 'price'}, ...]}."""
+    items = defaultdict(list)
+    if not order_ids:
+        return items
+    rows = db.session.query(OrderItem.order_id, OrderItem.name, OrderItem.unit_price, OrderItem.quantity) \
+        .filter(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.order_id, OrderItem.id)
+    for row in rows:
+        items[row.order_id].extend(items_to_json([row]))
+    return items
+
+def attach_items(model, orders: list[dict]):
+    """Preenche 'items' nos dicionários de pedidos (Order ou OrderHistory) montados a partir de JSON_FIELDS."""
+    key = next(key for key, attr in model.JSON_FIELDS if attr == model.ITEMS_KEY)
+    items = load_items([order[key] for order in orders])
+    for order in orders:
+        order['items'] = items.get(order[key], [])
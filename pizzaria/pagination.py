@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import Response, jsonify, stream_with_context
+
+from .extensions import db
+from .serialization import dumps, json_columns, rows_to_dicts
+
+# --- Funções de Paginação (cursor / keyset) ---
+# As listagens administrativas são paginadas por "keyset": em vez de OFFSET, o cursor guarda
+# a chave de ordenação (timestamp, id) da última linha entregue, e a próxima página começa
+# logo depois dela. Assim o custo de cada página é constante, não importa o tamanho da tabela.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+def encode_cursor(timestamp: datetime | None, row_id: int) -> str:
+    """Gera um cursor opaco (base64 url-safe) a partir da chave de ordenação (timestamp, id)."""
+    raw = json.dumps([timestamp.isoformat() if timestamp else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    """Decodifica um cursor gerado por encode_cursor. Lança ValueError se o cursor for inválido."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp_raw, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        timestamp = datetime.fromisoformat(timestamp_raw) if timestamp_raw else None
+        return timestamp, int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise ValueError('Cursor inválido')
+
+def parse_page_size(raw_limit: str | None) -> int:
+    """Converte o parâmetro 'limit' da query string, limitado a MAX_PAGE_SIZE."""
+    if raw_limit is None:
+        return DEFAULT_PAGE_SIZE
+    limit = int(raw_limit)
+    if limit < 1:
+        raise ValueError("O parâmetro 'limit' deve ser maior que zero")
+    return min(limit, MAX_PAGE_SIZE)
+
+def keyset_query(query, timestamp_column, id_column, cursor: str | None):
+    """
+    Aplica a ordenação (timestamp DESC, id DESC) e, se houver cursor, o filtro que começa
+    logo após a última linha da página anterior.
+    """
+    query = query.order_by(timestamp_column.desc().nulls_last(), id_column.desc())
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor)
+        if last_timestamp is None:
+            query = query.filter(timestamp_column.is_(None), id_column < last_id)
+        else:
+            query = query.filter(db.or_(
+                timestamp_column < last_timestamp,
+                db.and_(timestamp_column == last_timestamp, id_column < last_id),
+                timestamp_column.is_(None)
+            ))
+    return query
+
+def paginated_response(query, model, timestamp_attr: str, cursor: str | None, raw_limit: str | None):
+    """
+    Busca uma página (limit + 1 linhas para saber se existe próxima) e monta a resposta JSON
+    com 'orders' e 'next_cursor' (None quando for a última página).
+    Só as colunas de model.JSON_FIELDS são lidas, como tuplas.
+    """
+    limit = parse_page_size(raw_limit)
+    rows = query.with_entities(*json_columns(model)).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_attr), last.id)
+
+    return jsonify({
+        'success': True,
+        'orders': rows_to_dicts(model, rows),
+        'next_cursor': next_cursor
+    })
+
+def wants_ndjson(request_obj) -> bool:
+    """Indica se o cliente pediu a resposta em streaming NDJSON (?format=ndjson ou Accept)."""
+    if request_obj.args.get('format') == 'ndjson':
+        return True
+    return request_obj.accept_mimetypes.best == 'application/x-ndjson'
+
+def ndjson_stream_response(query, model):
+    """
+    Transmite todas as linhas da consulta em NDJSON (um objeto JSON por linha), lendo o banco
+    em lotes com yield_per para que a memória do worker fique constante (os itens de cada lote
+    vêm em uma consulta).
+    """
+    def generate():
+        statement = query.with_entities(*json_columns(model)).statement
+        result = db.session.execute(statement, execution_options={'yield_per': STREAM_BATCH_SIZE})
+        for rows in result.partitions():
+            for order in rows_to_dicts(model, rows):
+                yield dumps(order) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
@@ -0,0 +1,121 @@
+import functools
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+# --- Hash de Senhas (bcrypt) ---
+# Custo do bcrypt (2^rounds iterações). Cada +1 dobra o tempo de hash/verificação.
+PASSWORD_HASH_ROUNDS = int(os.getenv('PASSWORD_HASH_ROUNDS', '12'))
+
+# O bcrypt é pesado de CPU, então roda num pool de threads limitado (ele libera o GIL).
+# PASSWORD_HASH_MAX_PENDING limita quantas operações podem estar executando ou na fila;
+# acima disso o login responde 503 em vez de acumular requisições presas no worker.
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+
+class PasswordHashBusy(Exception):
+    """Lançada quando o pool de hash de senhas está com a fila cheia."""
+
+def is_legacy_password_hash(password_hash: str) -> bool:
+    """Hashes antigos são SHA-256 sem sal: 64 caracteres hexadecimais."""
+    return len(password_hash) == 64 and all(char in '0123456789abcdef' for char in password_hash)
+
+def hash_password(password: str, rounds: int | None = None) -> str:
+    """Gera um hash bcrypt (com sal) para a senha fornecida."""
+    salt = bcrypt.gensalt(rounds=rounds or PASSWORD_HASH_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('ascii')
+
+@functools.cache
+def get_dummy_password_hash() -> str:
+    """
+    Hash bcrypt (no custo atual) de uma senha aleatória, calculado na primeira chamada. O login o verifica
+    quando o email não existe: a resposta leva o mesmo tempo com ou sem conta e não revela os emails cadastrados.
+    """
+    return hash_password(os.urandom(16).hex())
+
+def verify_password(password: str, password_hash: str) -> tuple[bool, bool]:
+    """
+    Verifica a senha contra o hash armazenado (bcrypt ou SHA-256 legado).
+    Retorna (senha_valida, precisa_refazer_hash).
+    """
+    if is_legacy_password_hash(password_hash):
+        legacy_hash = hashlib.sha256(password.encode('utf-8')).hexdigest()
+        return hmac.compare_digest(legacy_hash, password_hash), True
+
+    try:
+        is_valid = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('ascii'))
+    except ValueError:
+        return False, False
+    current_rounds = int(password_hash.split('$')[2])
+    return is_valid, current_rounds != PASSWORD_HASH_ROUNDS
+
+class PasswordHasher:
+    """Executa operações de hash de senha no pool limitado e guarda métricas de fila e execução."""
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.completed = 0
+        self.rejected = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    def use_executor(self, executor):
+        """
+        Troca o executor do pool. No modo gevent as threads de threading viram greenlets (monkey
+        patch) e o bcrypt travaria o loop; ali se usa o ThreadPoolExecutor do gevent, de threads reais.
+        """
+        previous, self._executor = self._executor, executor
+        previous.shutdown(wait=False)
+
+    def run(self, func, *args):
+        """Executa func(*args) no pool e espera o resultado. Lança PasswordHashBusy se a fila estiver cheia."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashBusy('Muitas operações de senha em andamento. Tente novamente em instantes.')
+        try:
+            submitted_at = time.perf_counter()
+            result, started_at, finished_at = self._executor.submit(self._timed, func, *args).result()
+        finally:
+            self._slots.release()
+        # As métricas são gravadas aqui, na thread da requisição: no modo gevent o executor roda em
+        # threads nativas, que não devem usar os locks do gevent.
+        queue_seconds = started_at - submitted_at
+        with self._lock:
+            self.completed += 1
+            self.queue_seconds_total += queue_seconds
+            self.queue_seconds_max = max(self.queue_seconds_max, queue_seconds)
+            self.run_seconds_total += finished_at - started_at
+        return result
+
+    @staticmethod
+    def _timed(func, *args):
+        started_at = time.perf_counter()
+        result = func(*args)
+        return result, started_at, time.perf_counter()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'rounds': PASSWORD_HASH_ROUNDS,
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_queue_ms': round(self.queue_seconds_total / self.completed * 1000, 2) if self.completed else 0.0,
+                'max_queue_ms': round(self.queue_seconds_max * 1000, 2),
+                'avg_run_ms': round(self.run_seconds_total / self.completed * 1000, 2) if self.completed else 0.0
+            }
+
+PASSWORD_HASHER = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
@@ -0,0 +1,233 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, request
+
+from .logs import logger
+
+# --- Limite de Taxa e Controle de Admissão ---
+# Limite por cliente (token bucket): cada chave (IP, usuário, email) tem um balde com 'capacity'
+# fichas que se repõe a capacity/period fichas por segundo. Sem ficha, a resposta é 429 com
+# Retry-After (segundos até a próxima ficha). Os limites vêm de RATE_LIMIT_<NOME>="fichas/segundos".
+#
+# RATE_LIMIT_BACKEND:
+#   memory (padrão) - baldes em cada worker (com N workers, o limite efetivo chega a N vezes o configurado).
+#   redis           - baldes compartilhados via REDIS_URL (requer 'pip install redis'), com a
+#                     atualização atômica feita por um script Lua.
+#   off             - desliga o limite por cliente.
+#
+# Controle de admissão: cada worker atende no máximo MAX_CONCURRENT_REQUESTS requisições /api/*
+# ao mesmo tempo (padrão: DB_POOL_SIZE + DB_MAX_OVERFLOW, o que o pool consegue servir). Quem
+# passar disso espera até ADMISSION_WAIT_SECONDS por uma vaga e depois recebe 503 + Retry-After,
+# em vez de ficar preso esperando conexão do pool (DB_POOL_TIMEOUT).
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+ADMISSION_WAIT_SECONDS = float(os.getenv('ADMISSION_WAIT_SECONDS', '0.25'))
+
+DEFAULT_RATE_LIMITS = {
+    'login-ip': '20/60',      # Tentativas de login por IP
+    'login-email': '5/60',    # Tentativas de login por email (força bruta numa conta)
+    'orders-ip': '60/60',     # Pedidos criados por IP
+    'orders-user': '10/60',   # Pedidos criados por usuário
+}
+
+# Rotas que não passam pelo controle de admissão: o stream SSE fica aberto por horas sem usar o banco
+ADMISSION_EXEMPT_ENDPOINTS = {'orders.api_orders_stream'}
+
+class RateLimit:
+    """Balde de 'capacity' fichas, repostas a capacity/period por segundo."""
+
+    def __init__(self, capacity: int, period: float):
+        if capacity < 1 or period <= 0:
+            raise ValueError('Limite inválido: use "fichas/segundos", ex.: 20/60')
+        self.capacity = capacity
+        self.period = period
+        self.refill_per_second = capacity / period
+
+    @classmethod
+    def parse(cls, raw: str) -> 'RateLimit':
+        capacity, period = raw.split('/')
+        return cls(int(capacity), float(period))
+
+def load_rate_limits() -> dict[str, RateLimit]:
+    limits = {}
+    for name, default in DEFAULT_RATE_LIMITS.items():
+        raw = os.getenv('RATE_LIMIT_' + name.upper().replace('-', '_'), default)
+        if raw.strip() in ('', '0', 'off'):
+            continue
+        limits[name] = RateLimit.parse(raw)
+    return limits
+
+# --- Backends ---
+# Interface: take(key, limit) -> segundos até a próxima ficha (0.0 se a ficha foi concedida).
+class MemoryRateLimitBackend:
+    """Baldes em memória, por processo. Também serve de substituto local do backend compartilhado."""
+    name = 'memory'
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict() # chave -> (fichas, instante da última atualização)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: RateLimit) -> float:
+        now = self.clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated_at) * limit.refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # Descartar o balde mais antigo equivale a devolvê-lo cheio: só relaxa o limite
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (1 - tokens) / limit.refill_per_second
+
+class RedisRateLimitBackend:
+    """Baldes compartilhados entre workers num Redis (cliente com a API do redis-py)."""
+    name = 'redis'
+
+    # Lê, repõe, consome e grava o balde numa única operação atômica no servidor
+    TAKE_SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local refill = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * refill)
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / refill
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, client, prefix: str = 'pizzaria:ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(self.TAKE_SCRIPT)
+
+    def take(self, key: str, limit: RateLimit) -> float:
+        return float(self._take(keys=[self.prefix + key], args=[limit.capacity, limit.refill_per_second, time.time()]))
+
+def create_rate_limit_backend():
+    if RATE_LIMIT_BACKEND == 'off':
+        return None
+    if RATE_LIMIT_BACKEND == 'redis':
+        try:
+            import redis
+            return RedisRateLimitBackend(redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0')))
+        except ImportError:
+            logger.warning("Pacote redis não instalado: usando o limite de taxa em memória.")
+    return MemoryRateLimitBackend()
+
+class RateLimiter:
+    """Aplica os limites nomeados sobre um backend e conta as recusas por limite."""
+
+    def __init__(self, backend, limits: dict[str, RateLimit]):
+        self.backend = backend
+        self.limits = limits
+        self.rejected = {}
+        self._lock = threading.Lock()
+
+    def check(self, name: str, key) -> float:
+        """Consome uma ficha de name:key. Retorna 0.0 ou os segundos até poder tentar de novo."""
+        limit = self.limits.get(name)
+        if self.backend is None or limit is None or key is None:
+            return 0.0
+        try:
+            retry_after = self.backend.take(f'{name}:{key}', limit)
+        except Exception as e:
+            # Backend compartilhado fora do ar: deixa passar em vez de derrubar o login
+            logger.error("Falha no limite de taxa (%s): %s", name, e)
+            return 0.0
+        if retry_after:
+            with self._lock:
+                self.rejected[name] = self.rejected.get(name, 0) + 1
+        return retry_after
+
+class AdmissionControl:
+    """Limita as requisições simultâneas do worker (semáforo com espera curta)."""
+
+    def __init__(self, max_concurrent: int, wait_seconds: float):
+        self.max_concurrent = max_concurrent
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def acquire(self) -> bool:
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+def default_max_concurrent(app) -> int:
+    """Padrão de MAX_CONCURRENT_REQUESTS: o tamanho máximo do pool (0 = sem limite, ex.: SQLite/PgBouncer)."""
+    engine_options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if 'pool_size' not in engine_options:
+        return 0
+    return engine_options['pool_size'] + engine_options.get('max_overflow', 0)
+
+def init_rate_limiting(app):
+    """Cria o limitador e o controle de admissão do app e registra os hooks das requisições."""
+    app.extensions['rate_limiter'] = RateLimiter(create_rate_limit_backend(), load_rate_limits())
+    max_concurrent = int(os.getenv('MAX_CONCURRENT_REQUESTS', default_max_concurrent(app)))
+    if max_concurrent > 0:
+        app.extensions['admission_control'] = AdmissionControl(max_concurrent, ADMISSION_WAIT_SECONDS)
+        app.before_request(admit_request)
+        app.teardown_request(release_request)
+
+def get_rate_limiter() -> RateLimiter:
+    return current_app.extensions['rate_limiter']
+
+def get_admission_control() -> AdmissionControl | None:
+    return current_app.extensions.get('admission_control')
+
+def retry_after_header(seconds: float) -> dict:
+    return {'Retry-After': str(max(1, math.ceil(seconds)))}
+
+def rate_limited(*checks):
+    """
+    Consome uma ficha de cada (nome do limite, chave). Se algum estourar, devolve a resposta 429
+    pronta para a rota retornar; caso contrário, None.
+    """
+    limiter = get_rate_limiter()
+    for name, key in checks:
+        retry_after = limiter.check(name, key)
+        if retry_after:
+            logger.info("Limite %s excedido para %s", name, key)
+            return jsonify({'success': False, 'error': 'Muitas tentativas. Aguarde e tente novamente.'}), 429, retry_after_header(retry_after)
+    return None
+
+def admit_request():
+    if not request.path.startswith('/api/') or request.endpoint in ADMISSION_EXEMPT_ENDPOINTS:
+        return None
+    if not get_admission_control().acquire():
+        logger.warning("Worker no limite de requisições simultâneas: %s %s recusada", request.method, request.path)
+        return jsonify({'success': False, 'error': 'Servidor ocupado. Tente novamente em instantes.'}), 503, retry_after_header(1)
+    g.admitted = True
+    return None
+
+def release_request(_exception=None):
+    if g.pop('admitted', False):
+        get_admission_control().release()
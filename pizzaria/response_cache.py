@@ -0,0 +1,88 @@
+import os
+
+from flask import Response, current_app, g, request
+
+from .cache import MemoryCacheBackend, RedisCacheBackend, ResponseCache
+from .conditional import not_modified, with_validators
+from .logs import logger
+
+# --- Cache de Respostas das Rotas Admin ---
+# As leituras do painel (pedidos, histórico, estatísticas, vendas) guardam o corpo JSON já serializado,
+# chaveado por endpoint + query string. As rotas de escrita chamam invalidate_response_cache(),
+# que só incrementa a geração do cache (as entradas antigas deixam de ser encontradas).
+#
+# RESPONSE_CACHE_BACKEND:
+#   memory (padrão) - LRU com TTL em cada worker. A invalidação só alcança o worker que fez a
+#                     escrita; nos demais a entrada vive no máximo RESPONSE_CACHE_TTL segundos.
+#   redis           - compartilhado entre workers via REDIS_URL (requer 'pip install redis');
+#                     a invalidação vale para todos, inclusive para os comandos 'flask ...'.
+#   off             - desliga o cache.
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '5'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+
+def create_response_cache() -> ResponseCache | None:
+    if RESPONSE_CACHE_BACKEND == 'off':
+        return None
+    if RESPONSE_CACHE_BACKEND == 'redis':
+        try:
+            import redis
+            return ResponseCache(RedisCacheBackend(redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0')), RESPONSE_CACHE_TTL))
+        except ImportError:
+            logger.warning("Pacote redis não instalado: usando o cache de respostas em memória.")
+    return ResponseCache(MemoryCacheBackend(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES))
+
+def init_response_cache(app):
+    """Cria o cache de respostas do app (um por processo/worker) em app.extensions['response_cache']."""
+    app.extensions['response_cache'] = create_response_cache()
+
+def get_response_cache() -> ResponseCache | None:
+    return current_app.extensions.get('response_cache')
+
+def invalidate_response_cache():
+    """Chamada pelas rotas de escrita depois do commit. Falhas do backend não viram erro da escrita."""
+    cache = get_response_cache()
+    if cache is None:
+        return
+    try:
+        cache.invalidate()
+    except Exception as e:
+        logger.error("Falha ao invalidar o cache de respostas: %s", e)
+
+def cached_response(endpoint: str):
+    """
+    Resposta guardada para o endpoint com a query string atual, ou None (miss).
+    Com ETag guardado, responde 304 se o cliente já tiver essa versão.
+    No miss, a chave (com a geração lida agora) fica em flask.g para store_response gravar sob ela.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    try:
+        key = cache.key(endpoint, request.args.items(multi=True))
+        entry = cache.get(endpoint, key)
+    except Exception as e:
+        logger.error("Falha ao ler o cache de respostas: %s", e)
+        return None
+    if entry is None:
+        g.setdefault('response_cache_keys', {})[endpoint] = key
+        return None
+    if entry['etag']:
+        return not_modified(request, entry['etag']) or with_validators(Response(entry['body'], mimetype=entry['mimetype']), entry['etag'])
+    return Response(entry['body'], mimetype=entry['mimetype'])
+
+def store_response(endpoint: str, response, etag: str | None = None):
+    """
+    Guarda uma resposta 200 no cache, sob a chave do miss em cached_response, e a devolve sem alterações.
+    Sem essa chave (cache fora do ar na leitura), não grava: reler a geração agora poderia guardar um
+    corpo montado antes de uma invalidação como se fosse atual.
+    """
+    cache = get_response_cache()
+    key = g.get('response_cache_keys', {}).pop(endpoint, None)
+    if cache is None or key is None or response.status_code != 200:
+        return response
+    try:
+        cache.set(key, {'body': response.get_data(as_text=True), 'mimetype': response.mimetype, 'etag': etag})
+    except Exception as e:
+        logger.error("Falha ao gravar no cache de respostas: %s", e)
+    return response
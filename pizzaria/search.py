@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+
+from .catalog import CATALOG
+from .extensions import db
+from .models import OrderItem, ORDER_STATUSES
+
+# --- Busca nas Listagens Admin (/api/admin/orders/search e /api/admin/history/search) ---
+# Filtros aceitos na query string (todos opcionais, combinados com E), além de 'limit' e 'cursor':
+#   status=pendente,preparando   from=AAAA-MM-DD   to=AAAA-MM-DD (inclui o dia; aceita data e hora ISO)
+#   name=<prefixo do cliente>    phone=<prefixo do telefone>    user_id=<id>    pizza=<sabor>
+# O intervalo de datas usa a coluna de ordenação da listagem (created_at nos pedidos, completed_at no
+# histórico), então os índices temporais servem tanto ao filtro quanto ao cursor.
+#
+# No PostgreSQL (migração a6c3e8b1d507): o prefixo do nome (ILIKE, sem diferenciar maiúsculas) usa um
+# índice trigram (pg_trgm) e o do telefone um B-tree text_pattern_ops; no SQLite o nome vira lower() LIKE,
+# sem índice. O sabor é um EXISTS em order_items pelo índice (name, order_id), nos dois bancos.
+
+def escape_like(value: str) -> str:
+    """Escapa os curingas do LIKE para que o valor digitado seja tratado como texto literal."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def parse_timestamp_filter(name: str, raw: str) -> tuple[datetime, bool]:
+    """
+    Converte 'from'/'to' em datetime UTC sem fuso (como as colunas guardam).
+    Retorna (valor, só_data); só_data indica que veio sem hora.
+    """
+    try:
+        value = datetime.fromisoformat(raw)
+    except ValueError:
+        raise ValueError(f"Parâmetro '{name}' inválido: use AAAA-MM-DD ou data e hora ISO 8601")
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value, len(raw) == 10
+
+def parse_search_filters(args) -> dict:
+    """Valida os filtros da query string. Lança ValueError (400) com a mensagem para o cliente."""
+    filters = {}
+
+    raw_status = args.get('status')
+    if raw_status:
+        statuses = [status.strip() for status in raw_status.split(',') if status.strip()]
+        invalid = [status for status in statuses if status not in ORDER_STATUSES]
+        if invalid:
+            raise ValueError(f'Status inválido: {", ".join(invalid)}. Status permitidos: {", ".join(ORDER_STATUSES)}')
+        filters['status'] = statuses
+
+    if args.get('from'):
+        filters['from'], _ = parse_timestamp_filter('from', args['from'])
+    if args.get('to'):
+        end, date_only = parse_timestamp_filter('to', args['to'])
+        # Só a data: vale o dia inteiro (até o início do dia seguinte, exclusivo)
+        filters['to'] = (end + timedelta(days=1), False) if date_only else (end, True)
+    if 'from' in filters and 'to' in filters and filters['from'] > filters['to'][0]:
+        raise ValueError("O parâmetro 'from' deve ser anterior a 'to'")
+
+    for name in ('name', 'phone'):
+        value = (args.get(name) or '').strip()
+        if value:
+            filters[name] = value
+
+    if args.get('user_id'):
+        try:
+            filters['user_id'] = int(args['user_id'])
+        except ValueError:
+            raise ValueError("O parâmetro 'user_id' deve ser um número")
+
+    pizza = (args.get('pizza') or '').strip()
+    if pizza:
+        # Nome canônico do catálogo; sabores que saíram do cardápio ainda podem estar no histórico
+        catalog = CATALOG.get()
+        known = catalog.find_by_name(pizza) or next(
+            (entry for name, entry in catalog.by_name.items() if name.lower() == pizza.lower()), None)
+        filters['pizza'] = known['name'] if known else pizza
+
+    return filters
+
+def items_contain_pizza(model, pizza_name: str):
+    """Condição 'o pedido tem ao menos um item com esse sabor' (Order ou OrderHistory)."""
+    return db.exists().where(OrderItem.order_id == getattr(model, model.ITEMS_KEY), OrderItem.name == pizza_name)
+
+def apply_search_filters(query, model, timestamp_column, filters: dict):
+    """Aplica os filtros de parse_search_filters a uma consulta de Order ou OrderHistory."""
+    if 'status' in filters:
+        query = query.filter(model.status.in_(filters['status']))
+    if 'from' in filters:
+        query = query.filter(timestamp_column >= filters['from'])
+    if 'to' in filters:
+        end, inclusive = filters['to']
+        query = query.filter(timestamp_column <= end if inclusive else timestamp_column < end)
+    if 'name' in filters:
+        query = query.filter(model.customer_name.ilike(escape_like(filters['name']) + '%', escape='\\'))
+    if 'phone' in filters:
+        query = query.filter(model.customer_phone.like(escape_like(filters['phone']) + '%', escape='\\'))
+    if 'user_id' in filters:
+        query = query.filter(model.user_id == filters['user_id'])
+    if 'pizza' in filters:
+        query = query.filter(items_contain_pizza(model, filters['pizza']))
+    return query
@@ -0,0 +1,73 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+from .order_items import attach_items
+
+try:
+    import orjson
+except ImportError: # Opcional: sem o orjson, o json da biblioteca padrão faz o mesmo trabalho (mais devagar)
+    orjson = None
+
+# --- Serialização JSON Rápida ---
+# As listagens selecionam só as colunas de JSON_FIELDS (tuplas, sem montar objetos do ORM) e
+# deixam datetime/Decimal crus para o codificador: o orjson converte datetime em C e o
+# json_default cobre o resto. Os itens vêm de order_items em uma consulta por lote de linhas
+# (pizzaria/order_items.py). O resultado tem os mesmos campos de to_dict().
+JSON_BACKEND = 'orjson' if orjson else 'json'
+
+def json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'Objeto do tipo {type(value).__name__} não é serializável em JSON')
+
+if orjson:
+    def dumps(obj, indent: bool = False) -> bytes:
+        options = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=json_default, option=options)
+
+    loads = orjson.loads
+else:
+    def dumps(obj, indent: bool = False) -> bytes:
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, indent=2, default=json_default).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=json_default).encode('utf-8')
+
+    loads = json.loads
+
+def json_columns(model) -> list:
+    """Colunas de model.JSON_FIELDS, para query.with_entities()."""
+    return [getattr(model, attr) for _, attr in model.JSON_FIELDS]
+
+def rows_to_dicts(model, rows) -> list[dict]:
+    """Converte as tuplas selecionadas com json_columns() em dicionários com as chaves da API, já com os itens."""
+    keys = [key for key, _ in model.JSON_FIELDS]
+    orders = [dict(zip(keys, row)) for row in rows]
+    attach_items(model, orders)
+    return orders
+
+def select_json_rows(query, model) -> list[dict]:
+    """Executa a consulta trazendo só as colunas do JSON da API (e os itens, em uma consulta à parte)."""
+    return rows_to_dicts(model, query.with_entities(*json_columns(model)))
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provider JSON do Flask (jsonify, request.get_json) sobre dumps/loads acima."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs: # Opções específicas do json da biblioteca padrão
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(dumps(obj, indent=indent), mimetype=self.mimetype)
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from .extensions import db
+from .models import User, Order, OrderHistory, HistoryMonthSummary, StoreStats, STATUS_COUNT_COLUMNS
+from .response_cache import invalidate_response_cache
+
+# --- Funções de Estatísticas (consolidado em StoreStats) ---
+STORE_STATS_ID = 1
+
+def bump_store_stats(**deltas):
+    """
+    Soma os deltas informados às colunas de StoreStats com um UPDATE atômico (coluna = coluna + delta),
+    na transação corrente. Quem chama é responsável pelo commit, junto com a escrita que gerou o delta.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    values = {column: getattr(StoreStats, column) + delta for column, delta in deltas.items()}
+    db.session.execute(db.update(StoreStats).where(StoreStats.id == STORE_STATS_ID).values(**values))
+
+def status_count_deltas(statuses: dict[str, int]) -> dict[str, int]:
+    """Converte {status: delta} em {coluna de StoreStats: delta}, ignorando status sem coluna."""
+    deltas = {}
+    for status, delta in statuses.items():
+        column = STATUS_COUNT_COLUMNS.get(status)
+        if column:
+            deltas[column] = deltas.get(column, 0) + delta
+    return deltas
+
+def compute_live_stats() -> dict:
+    """Calcula as estatísticas direto das tabelas (agregados completos). Usado na reconstrução e na verificação."""
+    status_counts = db.session.query(Order.status, func.count(Order.id)).group_by(Order.status).all()
+    total_revenue = db.session.query(func.sum(OrderHistory.total)).scalar() or 0
+    pending_revenue = db.session.query(func.sum(Order.total)).scalar()
+    # Meses arquivados (flask archive-history) entram pelo resumo mensal, não pelas linhas
+    archived_orders, archived_revenue = db.session.query(
+        func.coalesce(func.sum(HistoryMonthSummary.orders), 0),
+        func.coalesce(func.sum(HistoryMonthSummary.revenue), 0)
+    ).one()
+    total_revenue = Decimal(str(total_revenue)) + Decimal(str(archived_revenue))
+    return {
+        'users': User.query.count(),
+        'active_orders': Order.query.count(),
+        'completed_orders': OrderHistory.query.count() + int(archived_orders),
+        # Pedidos 'entregue' à espera do worker (pizzaria/jobs.py) contam como ativos, mas não têm coluna no breakdown
+        'status_breakdown': {status: count for status, count in status_counts if status in STATUS_COUNT_COLUMNS},
+        'total_revenue': float(total_revenue),
+        'pending_revenue': float(pending_revenue) if pending_revenue is not None else 0.0
+    }
+
+def rebuild_store_stats() -> StoreStats:
+    """Recalcula o consolidado do zero a partir das tabelas e grava em StoreStats (com commit)."""
+    live = compute_live_stats()
+    stats = db.session.get(StoreStats, STORE_STATS_ID) or StoreStats(id=STORE_STATS_ID)
+    stats.users = live['users']
+    stats.active_orders = live['active_orders']
+    stats.completed_orders = live['completed_orders']
+    for status, column in STATUS_COUNT_COLUMNS.items():
+        setattr(stats, column, live['status_breakdown'].get(status, 0))
+    stats.total_revenue = live['total_revenue']
+    stats.pending_revenue = live['pending_revenue']
+    db.session.add(stats)
+    db.session.commit()
+    invalidate_response_cache()
+    return stats
+
+def check_store_stats() -> dict:
+    """
+    Compara o consolidado com os agregados reais.
+    Retorna {campo: (valor consolidado, valor real)} apenas para os campos divergentes.
+    """
+    stats = db.session.get(StoreStats, STORE_STATS_ID)
+    live = compute_live_stats()
+    if stats is None:
+        return {'store_stats': (None, 'linha inexistente')}
+    stored = stats.to_dict()
+    return {key: (stored[key], value) for key, value in live.items() if stored[key] != value}
+
+@click.command('rebuild-stats')
+@with_appcontext
+def rebuild_stats_command():
+    """Recalcula a tabela store_stats a partir dos pedidos e do histórico."""
+    stats = rebuild_store_stats()
+    print(f"[INFO] Estatísticas reconstruídas: {stats.to_dict()}")
+
+@click.command('check-stats')
+@with_appcontext
+def check_stats_command():
+    """Verifica se store_stats está consistente com os agregados reais (sai com código 1 se não estiver)."""
+    differences = check_store_stats()
+    if not differences:
+        print("[INFO] store_stats consistente com os dados.")
+        return
+    for field, (stored, live) in differences.items():
+        print(f"[ERRO] {field}: consolidado={stored} real={live}")
+    raise SystemExit(1)
+
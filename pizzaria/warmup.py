@@ -0,0 +1,55 @@
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from .auth import MASTER_USER
+from .catalog import CATALOG
+from .extensions import db
+from .logs import logger
+from .models import User
+
+# --- Aquecimento do Worker (warm-up) ---
+# Chamado pela Gunicorn (post_worker_init, ver gunicorn.conf.py) antes do worker aceitar requisições,
+# ou manualmente com 'flask warm-up'. Abre as conexões do pool e carrega o catálogo de pizzas para
+# que a primeira requisição depois de um cold start não pague esse custo.
+DB_WARMUP_CONNECTIONS = int(os.getenv('DB_WARMUP_CONNECTIONS', '2'))
+
+def warm_up(app) -> dict:
+    timings = {}
+    started_at = time.perf_counter()
+    with app.app_context():
+        connections = []
+        try:
+            for _ in range(DB_WARMUP_CONNECTIONS):
+                conn = db.engine.connect()
+                conn.execute(text('SELECT 1'))
+                connections.append(conn)
+        finally:
+            for conn in connections:
+                conn.close() # Devolve ao pool já aberta
+        timings['db_ms'] = round((time.perf_counter() - started_at) * 1000, 1)
+
+        step_started_at = time.perf_counter()
+        CATALOG.get()
+        timings['catalog_ms'] = round((time.perf_counter() - step_started_at) * 1000, 1)
+
+        if MASTER_USER['id'] is None:
+            master_user_in_db = User.query.filter_by(email=MASTER_USER['email']).first()
+            if master_user_in_db:
+                MASTER_USER['id'] = master_user_in_db.id
+        db.session.remove()
+
+    timings['total_ms'] = round((time.perf_counter() - started_at) * 1000, 1)
+    logger.info("Worker aquecido: %s", timings)
+    return timings
+
+@click.command('warm-up')
+@with_appcontext
+def warm_up_command():
+    """Abre as conexões do pool e carrega o catálogo (para testar o aquecimento)."""
+    print(f"[INFO] Aquecimento concluído: {warm_up(current_app._get_current_object())}")
+
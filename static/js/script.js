@@ -2,6 +2,7 @@
 let currentUser = null
 let userOrders = []
 let userHistory = []
+let orderStream = null
 
 // Debug mode
 const DEBUG = true
@@ -211,9 +212,52 @@ function showMainApp() {
   updateCustomerDisplay()
   loadPizzas(); // Carrega as pizzas aqui, após o login/autenticação
   loadUserData()
+  connectOrderStream()
   showSection("meus-pedidos") // Mostra "Meus Pedidos" por padrão ao logar
 }
 
+// Acompanhar mudanças de status dos pedidos em tempo real (Server-Sent Events)
+function connectOrderStream() {
+  const token = localStorage.getItem("authToken")
+  if (!window.EventSource || !token || orderStream) {
+    return
+  }
+  orderStream = new EventSource(`/api/orders/stream?token=${encodeURIComponent(token)}`)
+
+  orderStream.addEventListener("order_created", (e) => {
+    const order = JSON.parse(e.data)
+    debugLog("Evento order_created recebido", order)
+    userOrders = [order].concat(userOrders.filter((o) => o.id !== order.id))
+    renderMyOrders()
+  })
+  orderStream.addEventListener("order_status", (e) => {
+    const order = JSON.parse(e.data)
+    debugLog("Evento order_status recebido", order)
+    if (order.originalOrderId !== undefined) {
+      // Pedido entregue foi movido para o histórico pelo worker (o id do pedido ativo é o originalOrderId)
+      userOrders = userOrders.filter((o) => o.id !== order.originalOrderId)
+      userHistory = [order].concat(userHistory.filter((o) => o.id !== order.id))
+      renderMyHistory()
+    } else {
+      userOrders = userOrders.map((o) => (o.id === order.id ? order : o))
+    }
+    renderMyOrders()
+  })
+  orderStream.addEventListener("order_deleted", (e) => {
+    const order = JSON.parse(e.data)
+    debugLog("Evento order_deleted recebido", order)
+    userOrders = userOrders.filter((o) => o.id !== order.id)
+    renderMyOrders()
+  })
+}
+
+function disconnectOrderStream() {
+  if (orderStream) {
+    orderStream.close()
+    orderStream = null
+  }
+}
+
 async function handleLogin(e) {
   e.preventDefault()
 
@@ -306,6 +350,7 @@ async function handleRegister(e) {
 }
 
 function logout() {
+  disconnectOrderStream()
   localStorage.removeItem("authToken")
   currentUser = null
   userOrders = []